@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from agent.config import agent
+from sonja.database import get_pool_statistics
 
 
 router = APIRouter()
@@ -14,3 +15,13 @@ def get_ping():
 def get_process_builds():
     agent.trigger()
     pass
+
+
+@router.get("/container_pool")
+def get_container_pool():
+    return agent.container_pool.statistics()
+
+
+@router.get("/database_pool")
+def get_database_pool():
+    return get_pool_statistics()
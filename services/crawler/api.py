@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from crawler.config import crawler
+from sonja.database import get_pool_statistics
 
 router = APIRouter()
 
@@ -13,3 +14,8 @@ def get_ping():
 def get_process_repo(repo_id: str, sha: str = "", ref: str = ""):
     crawler.process_repo(repo_id, sha, ref)
     crawler.trigger()
+
+
+@router.get("/database_pool")
+def get_database_pool():
+    return get_pool_statistics()
@@ -1,12 +1,13 @@
 from fastapi import APIRouter
 
 from public.api import build, channel, ecosystem, general, profile, repo, user, recipe, commit, package, run,\
-    log_line, github, configuration
+    log_line, github, configuration, api_token
 
 router = APIRouter()
 router.include_router(ecosystem.router, tags=["Ecosystem"])
 router.include_router(general.router, tags=["General"])
 router.include_router(user.router, tags=["User"])
+router.include_router(api_token.router, tags=["User"])
 router.include_router(repo.router, tags=["Repo"])
 router.include_router(profile.router, tags=["Profile"])
 router.include_router(channel.router, tags=["Channel"])
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from public.auth import get_permissions, get_read, get_user_id
+from public.crud.api_token import create_api_token_for_user, delete_api_token, read_api_token, read_api_tokens
+from public.crud.user import read_user_by_id
+from public.schemas.api_token import ApiTokenCreatedItem, ApiTokenReadList, ApiTokenWriteItem
+from public.schemas.user import PermissionEnum
+from sonja.database import get_session, Session
+from typing import List
+
+router = APIRouter()
+
+
+def _check_owner(user_id: str, current_user_id: str, permissions: List[PermissionEnum]):
+    if str(user_id) != current_user_id and PermissionEnum.admin not in permissions:
+        raise HTTPException(status_code=403, detail="Non-admins can only access their own API tokens")
+
+
+@router.get("/user/{user_id}/api_token", response_model=ApiTokenReadList, response_model_by_alias=False,
+            dependencies=[Depends(get_read)])
+def get_api_token_list(user_id: str, session: Session = Depends(get_session),
+                       current_user_id: str = Depends(get_user_id),
+                       permissions: List[PermissionEnum] = Depends(get_permissions)):
+    _check_owner(user_id, current_user_id, permissions)
+    return ApiTokenReadList.from_db(read_api_tokens(session, user_id))
+
+
+@router.post("/user/{user_id}/api_token", response_model=ApiTokenCreatedItem, response_model_by_alias=False,
+             status_code=status.HTTP_201_CREATED, dependencies=[Depends(get_read)])
+def post_api_token_item(user_id: str, api_token_item: ApiTokenWriteItem, session: Session = Depends(get_session),
+                        current_user_id: str = Depends(get_user_id),
+                        permissions: List[PermissionEnum] = Depends(get_permissions)):
+    _check_owner(user_id, current_user_id, permissions)
+    if read_user_by_id(session, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    api_token = create_api_token_for_user(session, user_id, api_token_item)
+    return ApiTokenCreatedItem.from_db(api_token)
+
+
+@router.delete("/api_token/{api_token_id}", dependencies=[Depends(get_read)])
+def delete_api_token_item(api_token_id: str, session: Session = Depends(get_session),
+                          current_user_id: str = Depends(get_user_id),
+                          permissions: List[PermissionEnum] = Depends(get_permissions)):
+    api_token = read_api_token(session, api_token_id)
+    if api_token is None:
+        raise HTTPException(status_code=404, detail="API token not found")
+    _check_owner(api_token.user_id, current_user_id, permissions)
+    delete_api_token(session, api_token)
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from public.auth import get_read, get_write
+from public.etag import etag, ETag
+from public.query import document_options, DocumentOptions
 from public.client import get_linux_agent, get_windows_agent, get_redis_client
 from public.schemas.build import BuildReadItem, BuildReadList, BuildWriteItem, StatusEnum
-from public.crud.build import read_builds, read_build, update_build
+from public.crud.build import read_builds_async, read_build_async, update_build
+from sonja.async_database import get_async_session
 from sonja.database import get_session, Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sonja.client import LinuxAgent, WindowsAgent
 from sonja.redis import RedisClient
 from sonja.config import logger
@@ -13,19 +18,26 @@ router = APIRouter()
 
 
 @router.get("/build", response_model=BuildReadList, response_model_by_alias=False, dependencies=[Depends(get_read)])
-def get_build_list(ecosystem_id: str, repo_id: Optional[str] = None, channel_id: Optional[str] = None,
-                   profile_id: Optional[str] = None, page: Optional[int] = None, per_page: Optional[int] = None,
-                   session: Session = Depends(get_session)):
-    return BuildReadList.from_db(**read_builds(session, ecosystem_id, repo_id, channel_id, profile_id, page, per_page))
+async def get_build_list(ecosystem_id: str, repo_id: Optional[str] = None, channel_id: Optional[str] = None,
+                         profile_id: Optional[str] = None, page: Optional[int] = None, per_page: Optional[int] = None,
+                         options: DocumentOptions = Depends(document_options("builds")),
+                         tag: ETag = Depends(etag("builds", type_="builds")),
+                         session: AsyncSession = Depends(get_async_session)):
+    builds = await read_builds_async(session, ecosystem_id, repo_id, channel_id, profile_id, page, per_page,
+                                     options.load_paths)
+    return JSONResponse(BuildReadList.serialize(**builds, fields=options.fields, include=options.include),
+                        headers=tag.headers)
 
 
 @router.get("/build/{build_id}", response_model=BuildReadItem, response_model_by_alias=False,
             dependencies=[Depends(get_read)])
-def get_build_item(build_id: str, session: Session = Depends(get_session)):
-    build = read_build(session, build_id)
+async def get_build_item(build_id: str, options: DocumentOptions = Depends(document_options("builds")),
+                         tag: ETag = Depends(etag("builds", type_="builds")),
+                         session: AsyncSession = Depends(get_async_session)):
+    build = await read_build_async(session, build_id, options.load_paths)
     if build is None:
         raise HTTPException(status_code=404, detail="Build not found")
-    return BuildReadItem.from_db(build)
+    return JSONResponse(BuildReadItem.serialize(build, options.fields, options.include), headers=tag.headers)
 
 
 @router.patch("/build/{build_id}", response_model=BuildReadItem, response_model_by_alias=False,
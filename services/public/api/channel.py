@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from public.auth import get_read, get_write
+from public.etag import etag
 from public.schemas.channel import ChannelReadItem, ChannelWriteItem
 from public.crud.channel import create_channel, delete_channel, read_channel, update_channel
 from sonja.database import get_session, Session
@@ -15,7 +16,7 @@ def post_channel_item(channel: ChannelWriteItem, session: Session = Depends(get_
 
 
 @router.get("/channel/{channel_id}", response_model=ChannelReadItem, response_model_by_alias=False,
-            dependencies=[Depends(get_read)])
+            dependencies=[Depends(get_read), Depends(etag("channels"))])
 def get_channel_item(channel_id: str, session: Session = Depends(get_session)):
     channel = read_channel(session, channel_id)
     if channel is None:
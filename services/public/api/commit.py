@@ -1,22 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from public.auth import get_read
 from public.schemas.commit import CommitReadItem, CommitReadList
-from public.crud.commit import read_commits, read_commit
-from sonja.database import get_session, Session
+from public.query import document_options, DocumentOptions
+from public.crud.commit import read_commits_async, read_commit_async
+from sonja.async_database import get_async_session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
 
 @router.get("/repo/{repo_id}/commit", response_model=CommitReadList, response_model_by_alias=False,
             dependencies=[Depends(get_read)])
-def get_commit_list(repo_id: str, session: Session = Depends(get_session)):
-    return CommitReadList.from_db(read_commits(session, repo_id))
+async def get_commit_list(repo_id: str, options: DocumentOptions = Depends(document_options("commits")),
+                          session: AsyncSession = Depends(get_async_session)):
+    commits = await read_commits_async(session, repo_id, options.load_paths)
+    return JSONResponse(CommitReadList.serialize(commits, fields=options.fields, include=options.include))
 
 
 @router.get("/commit/{commit_id}", response_model=CommitReadItem, response_model_by_alias=False,
             dependencies=[Depends(get_read)])
-def get_commit_item(commit_id: str, session: Session = Depends(get_session)):
-    commit = read_commit(session, commit_id)
+async def get_commit_item(commit_id: str, options: DocumentOptions = Depends(document_options("commits")),
+                          session: AsyncSession = Depends(get_async_session)):
+    commit = await read_commit_async(session, commit_id, options.load_paths)
     if commit is None:
         raise HTTPException(status_code=404, detail="Commit not found")
-    return CommitReadItem.from_db(commit)
+    return JSONResponse(CommitReadItem.serialize(commit, options.fields, options.include))
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from public.auth import get_read, get_write
+from public.etag import etag
 from public.schemas.ecosystem import EcosystemReadItem, EcosystemReadList, EcosystemWriteItem
 from public.crud.ecosystem import create_ecosystem, read_ecosystems, read_ecosystem, update_ecosystem,\
     delete_ecosystem
@@ -9,14 +10,14 @@ router = APIRouter()
 
 
 @router.get("/ecosystem", response_model=EcosystemReadList, response_model_by_alias=False,
-            dependencies=[Depends(get_read)])
+            dependencies=[Depends(get_read), Depends(etag("ecosystems"))])
 def get_ecosystem_list(session: Session = Depends(get_session)):
     ecosystems = read_ecosystems(session)
     return EcosystemReadList.from_db(ecosystems)
 
 
 @router.get("/ecosystem/{ecosystem_id}", response_model=EcosystemReadItem, response_model_by_alias=False,
-            dependencies=[Depends(get_read)])
+            dependencies=[Depends(get_read), Depends(etag("ecosystems"))])
 def get_ecosystem_item(ecosystem_id: str, session: Session = Depends(get_session)):
     ecosystem = read_ecosystem(session, ecosystem_id)
     if ecosystem is None:
@@ -1,22 +1,31 @@
 from datetime import timedelta
-from aioredis import Channel, Redis
+from aioredis import Redis
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi_plugins import depends_redis
 from sse_starlette.sse import EventSourceResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from public.auth import get_admin, get_write
 from public.schemas.build import BuildReadItem
-from public.crud.build import read_build
+from public.crud.build import read_build_async
 from public.schemas.run import RunReadItem
-from public.crud.run import read_run
+from public.crud.run import read_run_async
 from public.client import get_crawler, get_redis_client
-from sonja.database import get_session, Session, User, clear_ecosystems, session_scope
+from public.hub import hub
+from public.jsonapi import from_event
+from public.crud.api_token import read_api_token_by_value_async
+from public.crud.user import read_user_by_name_async
+from public.password import password_verifier, PasswordVerifierBusy
+from sonja.async_database import AsyncSessionLocal, get_async_pool_statistics, get_async_session
+from sonja.database import clear_ecosystems, get_pool_statistics
+from sonja.entity_cache import entity_cache
 from sonja.demo import populate_ecosystem, add_build, add_log_line, add_run
-from sonja.auth import test_password, create_access_token
+from sonja.auth import create_access_token
 from sonja.config import logger
 from sonja.client import Crawler
 from sonja.redis import RedisClient
-from typing import Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Union
+import json
 
 router = APIRouter()
 
@@ -26,6 +35,15 @@ def get_ping():
     pass
 
 
+@router.get("/database_pool", dependencies=[Depends(get_admin)])
+def get_database_pool():
+    return {
+        **get_pool_statistics(),
+        "async": get_async_pool_statistics(),
+        "entity_cache": entity_cache.statistics()
+    }
+
+
 @router.post("/clear_ecosystems", dependencies=[Depends(get_admin)])
 def post_clear_ecosystems():
     clear_ecosystems()
@@ -58,13 +76,23 @@ def post_process_repo(repo_id: str, crawler: Crawler = Depends(get_crawler)):
 
 
 @router.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    record = session.query(User).filter_by(user_name=form_data.username).first()
-    if not record or not record.password:
-        raise HTTPException(status_code=400, detail="Incorrect username or password")
-    if not test_password(form_data.password, record.password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_async_session)):
+    record = await read_user_by_name_async(session, form_data.username)
+    if not record:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
+    # a password can look like an API token, it is checked with bcrypt if it is not a token of the user
+    if not await read_api_token_by_value_async(session, record.id, form_data.password):
+        if not record.password:
+            raise HTTPException(status_code=400, detail="Incorrect username or password")
+        try:
+            valid = await password_verifier.verify(form_data.password, record.password)
+        except PasswordVerifierBusy:
+            raise HTTPException(status_code=503, detail="Too many concurrent logins",
+                                headers={"Retry-After": "1"})
+        if not valid:
+            raise HTTPException(status_code=400, detail="Incorrect username or password")
+
     access_token_expires = timedelta(minutes=240)
     access_token = create_access_token(str(record.id), expires_delta=access_token_expires)
 
@@ -73,31 +101,36 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = D
 
 @router.get("/event/general", response_model=Union[BuildReadItem, RunReadItem], response_model_by_alias=False)
 async def get_general_events(redis: Redis = Depends(depends_redis)):
-    return EventSourceResponse(subscribe(f"general", redis))
-
-
-async def subscribe(channel: str, redis: Redis):
-    (channel_subscription,) = await redis.subscribe(channel=Channel(channel, False))
-    while await channel_subscription.wait_message():
-        message = await channel_subscription.get_json()
-        item_json = None
-        with session_scope() as session:
-            item_id = str(message["id"])
-            item_type = message["type"]
-
-            if item_type == "build":
-                item = read_build(session, item_id)
-                if item:
-                    item_json = BuildReadItem.from_db(item).json()
-            elif item_type == "run":
-                item = read_run(session, item_id)
-                if item:
-                    item_json = RunReadItem.from_db(item).json()
-            else:
-                logger.warning("Did not send event for unsupported type '%s'", item_type)
+    return EventSourceResponse(hub.subscribe("general", redis, load_general_event))
 
+
+async def load_general_event(message: dict) -> Optional[dict]:
+    item_id = str(message["id"])
+    item_type = message["type"]
+
+    item_json = None
+    if "data" in message:
+        if item_type == "build":
+            item_json = json.dumps(BuildReadItem.serialize(from_event(message["data"])))
+        elif item_type == "run":
+            item_json = json.dumps(RunReadItem.serialize(from_event(message["data"])))
         if item_json:
-            logger.info("Send event '%s' received on '%s'", item_json, channel)
-            yield { "event": "update", "data": item_json }
+            return {"event": "update", "data": item_json}
+
+    async with AsyncSessionLocal() as session:
+        if item_type == "build":
+            item = await read_build_async(session, item_id)
+            if item:
+                item_json = json.dumps(BuildReadItem.serialize(item))
+        elif item_type == "run":
+            item = await read_run_async(session, item_id)
+            if item:
+                item_json = json.dumps(RunReadItem.serialize(item))
         else:
-            logger.warning("Could not read updated build '%s'", item_id)
+            logger.warning("Did not send event for unsupported type '%s'", item_type)
+            return None
+
+    if not item_json:
+        logger.warning("Could not read updated %s '%s'", item_type, item_id)
+        return None
+    return {"event": "update", "data": item_json}
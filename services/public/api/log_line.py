@@ -1,56 +1,201 @@
-from aioredis import Channel, Redis
-from fastapi import APIRouter, Depends, HTTPException
+from aioredis import Redis
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi_plugins import depends_redis
 from sse_starlette.sse import EventSourceResponse
 from public.auth import get_read
-from public.schemas.log_line import LogLineReadList, LogLineReadItem
-from public.crud.log_line import read_log_lines, read_log_line
-from sonja.database import get_session, Session, session_scope
+from public.hub import hub
+from public.jsonapi import STREAM_CHUNK_SIZE
+from public.log_search import QUERY_LENGTH, SEARCH_CONTEXT, SEARCH_LIMIT, create_matcher, search_lines
+from public.log_text import LOG_LINE_LIMIT, RangeNotSatisfiable, format_lines, get_line_range, \
+    parse_range, read_byte_range, read_byte_suffix
+from public.schemas.log_line import LogErrorSummary, LogLineBatch, LogLineReadList, LogLineReadItem, \
+    LogSearchResult
+from public.crud.log_line import read_log_lines_async, read_log_line_async, read_log_line_partitions_async, \
+    read_log_line_range_async, read_last_log_lines_async, read_last_log_line_number_async
+from public.crud.run import read_run_async
+from sonja.async_database import AsyncSessionLocal, get_async_session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sonja.config import logger
 from typing import Optional
+import json
+import os
+
+# the maximum number of lines per event when missed lines are replayed
+REPLAY_BATCH_SIZE = int(os.environ.get("SONJA_LOG_REPLAY_BATCH_SIZE", "500"))
+TEXT_TYPE = "text/plain; charset=utf-8"
 
 router = APIRouter()
 
 
 @router.get("/log_line", response_model=LogLineReadList, response_model_by_alias=False,
             dependencies=[Depends(get_read)])
-def get_log_line_list(run_id: str, page: Optional[int] = None, per_page:  Optional[int] = None,
-                      session: Session = Depends(get_session)):
-    return LogLineReadList.from_db(**read_log_lines(session, run_id, page, per_page))
+async def get_log_line_list(run_id: str, page: Optional[int] = None, per_page:  Optional[int] = None,
+                            session: AsyncSession = Depends(get_async_session)):
+    if page is None or per_page is None:
+        return StreamingResponse(stream_log_line_list(run_id), media_type="application/json")
+
+    log_lines = await read_log_lines_async(session, run_id, page, per_page)
+    return JSONResponse(LogLineReadList.serialize(**log_lines))
+
+
+async def stream_log_line_list(run_id: str):
+    # all lines of a run do not fit into memory, they are serialized while they are fetched
+    async with AsyncSessionLocal() as session:
+        async for chunk in LogLineReadList.stream_async(
+                read_log_line_partitions_async(session, run_id, STREAM_CHUNK_SIZE)):
+            yield chunk
+
+
+@router.get("/run/{run_id}/log.txt", response_class=Response, dependencies=[Depends(get_read)])
+async def get_log_text(run_id: str, tail: Optional[int] = Query(None, ge=1, le=LOG_LINE_LIMIT),
+                       range_: Optional[str] = Header(None, alias="Range"),
+                       session: AsyncSession = Depends(get_async_session)):
+    if await read_run_async(session, run_id) is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    if tail is not None:
+        if range_ is not None:
+            raise HTTPException(status_code=400, detail="A tail can not be combined with a range")
+        log_lines = await read_last_log_lines_async(session, run_id, tail)
+        return Response(format_lines(log_lines), media_type=TEXT_TYPE)
+
+    if range_ is None:
+        return StreamingResponse(stream_log_text(run_id), media_type=TEXT_TYPE,
+                                 headers={"Accept-Ranges": "bytes, lines"})
+
+    try:
+        log_range = parse_range(range_)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        if log_range.unit == "lines":
+            body, content_range = await read_line_range(session, run_id, log_range.first, log_range.last)
+        elif log_range.is_suffix:
+            body, content_range = await read_byte_suffix(
+                read_log_line_partitions_async(session, run_id, STREAM_CHUNK_SIZE), log_range.last)
+        else:
+            body, content_range = await read_byte_range(
+                read_log_line_partitions_async(session, run_id, STREAM_CHUNK_SIZE), log_range.first, log_range.last)
+    except RangeNotSatisfiable as e:
+        return Response(status_code=416, headers={"Content-Range": e.content_range})
+
+    return Response(body, status_code=206, media_type=TEXT_TYPE, headers={"Content-Range": content_range})
+
+
+async def read_line_range(session: AsyncSession, run_id: str, first: Optional[int], last: Optional[int]):
+    total = await read_last_log_line_number_async(session, run_id)
+    if first is None:
+        log_lines = await read_last_log_lines_async(session, run_id, min(last, LOG_LINE_LIMIT))
+    else:
+        log_lines = await read_log_line_range_async(session, run_id, first, last, limit=LOG_LINE_LIMIT)
+    if not log_lines:
+        raise RangeNotSatisfiable(f"lines */{total}")
+    return format_lines(log_lines), get_line_range(log_lines, total)
+
+
+async def stream_log_text(run_id: str):
+    async with AsyncSessionLocal() as session:
+        async for partition in read_log_line_partitions_async(session, run_id, STREAM_CHUNK_SIZE):
+            yield format_lines(partition)
+
+
+@router.get("/run/{run_id}/log/search", response_model=LogSearchResult, dependencies=[Depends(get_read)])
+async def get_log_search(run_id: str, query: str = Query(..., min_length=1, max_length=QUERY_LENGTH),
+                         regex: bool = False, context: int = Query(0, ge=0, le=SEARCH_CONTEXT),
+                         limit: int = Query(100, ge=1, le=SEARCH_LIMIT),
+                         session: AsyncSession = Depends(get_async_session)):
+    if await read_run_async(session, run_id) is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    try:
+        matches = create_matcher(query, regex)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results, truncated = await search_lines(read_log_line_partitions_async(session, run_id, STREAM_CHUNK_SIZE),
+                                            matches, context, limit)
+    return JSONResponse({"run_id": run_id, "matches": results, "truncated": truncated})
+
+
+@router.get("/run/{run_id}/log/errors", response_model=LogErrorSummary, dependencies=[Depends(get_read)])
+async def get_log_errors(run_id: str, session: AsyncSession = Depends(get_async_session)):
+    run = await read_run_async(session, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if run.error_summary is None:
+        raise HTTPException(status_code=404, detail="The run has not finished yet")
+    return JSONResponse({"run_id": run_id, **json.loads(run.error_summary)})
 
 
 @router.get("/log_line/{log_line_id}", response_model=LogLineReadItem, response_model_by_alias=False,
             dependencies=[Depends(get_read)])
-def get_log_line_item(log_line_id: str, session: Session = Depends(get_session)):
-    build = read_log_line(session, log_line_id)
+async def get_log_line_item(log_line_id: str, session: AsyncSession = Depends(get_async_session)):
+    build = await read_log_line_async(session, log_line_id)
     if build is None:
         raise HTTPException(status_code=404, detail="Log line not found")
-    return LogLineReadItem.from_db(build)
+    return JSONResponse(LogLineReadItem.serialize(build))
 
 
-@router.get("/event/run/{run_id}/log_line", response_model=LogLineReadItem, response_model_by_alias=False)
-async def get_line_events(run_id: str, redis: Redis = Depends(depends_redis)):
-    return EventSourceResponse(subscribe(f"run:{run_id}", redis))
+@router.get("/event/run/{run_id}/log_line", response_model=LogLineBatch, response_model_by_alias=False)
+async def get_line_events(run_id: str, last_event_id: Optional[int] = Header(None),
+                          redis: Redis = Depends(depends_redis)):
+    return EventSourceResponse(stream_log_lines(run_id, redis, last_event_id))
 
 
-async def subscribe(channel: str, redis: Redis):
-    (channel_subscription,) = await redis.subscribe(channel=Channel(channel, False))
-    while await channel_subscription.wait_message():
-        message = await channel_subscription.get_json()
-        item_json = None
-        with session_scope() as session:
-            item_id = str(message["id"])
-            item_type = message["type"]
+def create_log_line_event(batch: LogLineBatch) -> dict:
+    # the ID of an event is the number of its last line, a client which reconnects sends it as Last-Event-ID
+    return {"event": "log_lines", "id": str(batch.last), "data": batch.json()}
 
-            if item_type != "log_line":
-                logger.warning("Did not send event for unsupported type '%s'", item_type)
 
-            item = read_log_line(session, item_id)
-            if item:
-                item_json = LogLineReadItem.from_db(item).json()
+async def stream_log_lines(run_id: str, redis: Redis, last_number: Optional[int]):
+    async def replay():
+        after = last_number
+        while True:
+            async with AsyncSessionLocal() as session:
+                log_lines = await read_log_line_range_async(session, run_id, after + 1, limit=REPLAY_BATCH_SIZE)
+            if not log_lines:
+                return
+            batch = LogLineBatch.from_db(run_id, log_lines)
+            after = batch.last
+            yield create_log_line_event(batch)
 
-        if item_json:
-            logger.debug("Send log line event '%s' received on '%s'", item_json, channel)
-            yield { "event": "update", "data": item_json }
-        else:
-            logger.warning("Could not read updated log line '%s'", item_id)
+    # skip the live events which were already sent by the replay
+    sent = last_number or 0
+    events = hub.subscribe(f"run:{run_id}", redis, load_log_line_event, replay if last_number is not None else None)
+    try:
+        async for event in events:
+            last = int(event["id"])
+            if last <= sent:
+                continue
+            if last_number is not None:
+                batch = LogLineBatch.parse_raw(event["data"])
+                if batch.first <= sent:
+                    # a live batch which overlaps the replayed lines is sent without them
+                    lines = [line for line in batch.lines if line.number > sent]
+                    event = create_log_line_event(LogLineBatch(run_id=batch.run_id, first=lines[0].number,
+                                                               last=last, lines=lines))
+            sent = last
+            yield event
+    finally:
+        await events.aclose()
+
+
+async def load_log_line_event(message: dict) -> Optional[dict]:
+    if message["type"] != "log_lines":
+        logger.warning("Did not send event for unsupported type '%s'", message["type"])
+        return None
+
+    run_id = str(message["run_id"])
+    if "lines" in message:
+        batch = LogLineBatch(run_id=run_id, first=message["first"], last=message["last"], lines=message["lines"])
+        return create_log_line_event(batch)
+
+    async with AsyncSessionLocal() as session:
+        log_lines = await read_log_line_range_async(session, run_id, message["first"], message["last"])
+        if not log_lines:
+            logger.warning("Could not read updated log lines %d to %d of run '%s'", message["first"],
+                           message["last"], run_id)
+            return None
+        return create_log_line_event(LogLineBatch.from_db(run_id, log_lines))
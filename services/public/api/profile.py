@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from public.auth import get_read, get_write
+from public.etag import etag
 from public.schemas.profile import ProfileReadItem, ProfileWriteItem
 from public.crud.profile import create_profile, delete_profile, read_profile, update_profile
 from sonja.database import get_session, Session
@@ -15,7 +16,7 @@ def post_profile_item(profile: ProfileWriteItem, session: Session = Depends(get_
 
 
 @router.get("/profile/{profile_id}", response_model=ProfileReadItem, response_model_by_alias=False,
-            dependencies=[Depends(get_read)])
+            dependencies=[Depends(get_read), Depends(etag("profiles"))])
 def get_profile_item(profile_id: str, session: Session = Depends(get_session)):
     profile = read_profile(session, profile_id)
     if profile is None:
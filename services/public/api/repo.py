@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from public.auth import get_read, get_write
+from public.etag import etag
 from public.schemas.repo import RepoReadItem, RepoReadList, RepoWriteItem
 from public.crud.repo import create_repo, delete_repo, read_repos, read_repo, update_repo
 from sonja.database import get_session, Session
@@ -18,13 +19,13 @@ def post_repo_item(repo: RepoWriteItem, session: Session = Depends(get_session))
 
 
 @router.get("/ecosystem/{ecosystem_id}/repo", response_model=RepoReadList, response_model_by_alias=False,
-            dependencies=[Depends(get_read)])
+            dependencies=[Depends(get_read), Depends(etag("repos"))])
 def get_repo_list(ecosystem_id: str, session: Session = Depends(get_session)):
     return RepoReadList.from_db(read_repos(session, ecosystem_id))
 
 
 @router.get("/repo/{repo_id}", response_model=RepoReadItem, response_model_by_alias=False,
-            dependencies=[Depends(get_read)])
+            dependencies=[Depends(get_read), Depends(etag("repos"))])
 def get_repo_item(repo_id: str, session: Session = Depends(get_session)):
     repo = read_repo(session, repo_id)
     if repo is None:
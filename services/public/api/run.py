@@ -1,22 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from public.auth import get_read
-from public.crud.run import read_run, read_runs
+from public.query import document_options, DocumentOptions
+from public.crud.run import read_run_async, read_runs_async
 from public.schemas.run import RunReadItem, RunReadList
-from sonja.database import get_session, Session
+from sonja.async_database import get_async_session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
 
 @router.get("/build/{build_id}/run", response_model=RunReadList, response_model_by_alias=False,
             dependencies=[Depends(get_read)])
-def get_run_list(build_id: str, session: Session = Depends(get_session)):
-    return RunReadList.from_db(read_runs(session, build_id))
+async def get_run_list(build_id: str, options: DocumentOptions = Depends(document_options("runs")),
+                       session: AsyncSession = Depends(get_async_session)):
+    runs = await read_runs_async(session, build_id, options.load_paths)
+    return JSONResponse(RunReadList.serialize(runs, fields=options.fields, include=options.include))
 
 
 @router.get("/run/{run_id}", response_model=RunReadItem, response_model_by_alias=False,
             dependencies=[Depends(get_read)])
-def get_run_item(run_id: str, session: Session = Depends(get_session)):
-    run = read_run(session, run_id)
+async def get_run_item(run_id: str, options: DocumentOptions = Depends(document_options("runs")),
+                       session: AsyncSession = Depends(get_async_session)):
+    run = await read_run_async(session, run_id, options.load_paths)
     if run is None:
         raise HTTPException(status_code=404, detail="Run not found")
-    return RunReadItem.from_db(run)
+    return JSONResponse(RunReadItem.serialize(run, options.fields, options.include))
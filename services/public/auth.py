@@ -1,10 +1,11 @@
 from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from public.crud.user import read_user_by_id
-from public.crud.configuration import read_configuration
+from public.crud.user import read_user_by_id, read_user_by_id_async, permission_cache
 from public.schemas.user import PermissionEnum
+from sonja.async_database import AsyncSessionLocal
 from sonja.auth import decode_access_token, ExpiredSignatureError
 from sonja.database import get_session, Session, User
+from sonja.entity_cache import entity_cache
 from typing import List
 from hmac import HMAC, compare_digest
 from hashlib import sha256
@@ -13,38 +14,49 @@ from hashlib import sha256
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)) -> User:
+async def get_user_id(token: str = Depends(oauth2_scheme)) -> str:
     try:
-        user_id = decode_access_token(token)
+        return str(decode_access_token(token))
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Signature has expired")
+
+
+def get_current_user(user_id: str = Depends(get_user_id), session: Session = Depends(get_session)) -> User:
     return read_user_by_id(session, user_id)
 
 
-def get_permissions(user: User = Depends(get_current_user)) -> List[PermissionEnum]:
-    return [PermissionEnum(p.label.name) for p in user.permissions]
+async def get_permissions(user_id: str = Depends(get_user_id)) -> List[PermissionEnum]:
+    permissions = permission_cache.get(user_id)
+    if permissions is None:
+        async with AsyncSessionLocal() as session:
+            user = await read_user_by_id_async(session, user_id)
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            permissions = [PermissionEnum(p.label.name) for p in user.permissions]
+        permission_cache.set(user_id, permissions)
+    return permissions
 
 
-def get_read(permissions: List[PermissionEnum] = Depends(get_permissions)) -> bool:
+async def get_read(permissions: List[PermissionEnum] = Depends(get_permissions)) -> bool:
     if PermissionEnum.read not in permissions:
         raise HTTPException(status_code=403, detail="Operation not allowed")
     return True
 
 
-def get_write(permissions: List[PermissionEnum] = Depends(get_permissions)) -> bool:
+async def get_write(permissions: List[PermissionEnum] = Depends(get_permissions)) -> bool:
     if PermissionEnum.write not in permissions:
         raise HTTPException(status_code=403, detail="Operation not allowed")
     return True
 
 
-def get_admin(permissions: List[PermissionEnum] = Depends(get_permissions)) -> bool:
+async def get_admin(permissions: List[PermissionEnum] = Depends(get_permissions)) -> bool:
     if PermissionEnum.admin not in permissions:
         raise HTTPException(status_code=403, detail="Operation not allowed")
     return True
 
 
-async def get_github(request: Request, session: Session = Depends(get_session)):
-    configuration = read_configuration(session)
+async def get_github(request: Request):
+    configuration = entity_cache.configuration()
     if "X-Hub-Signature-256" not in request.headers:
         raise HTTPException(status_code=403, detail="Signature is not valid")
 
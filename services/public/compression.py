@@ -0,0 +1,26 @@
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+import os
+
+# responses smaller than this number of bytes are not compressed
+GZIP_MINIMUM_SIZE = int(os.environ.get("SONJA_GZIP_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.environ.get("SONJA_GZIP_LEVEL", "6"))
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compresses responses for clients which accept gzip.
+
+    Server-sent events are not compressed because the compressor buffers the events until its buffer is full. Responses
+    to requests with a 'Range' header are not compressed either because the range refers to the uncompressed content.
+    """
+    def __init__(self, app: ASGIApp, event_prefix: str, minimum_size: int = GZIP_MINIMUM_SIZE,
+                 compresslevel: int = GZIP_LEVEL):
+        super().__init__(app, minimum_size, compresslevel)
+        self.__event_prefix = event_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and (scope["path"].startswith(self.__event_prefix) or
+                                        any(name == b"range" for name, _ in scope["headers"])):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
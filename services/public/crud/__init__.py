@@ -0,0 +1,17 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload
+from typing import List, Type
+
+
+def get_load_options(model: Type, paths: List[List[str]]) -> list:
+    """Return the options which eagerly load the relationship paths, lazy loading is not available on async sessions."""
+    options = []
+    for path in paths:
+        current, option = model, None
+        for name in path:
+            attribute = getattr(current, name)
+            option = selectinload(attribute) if option is None else option.selectinload(attribute)
+            current = inspect(current).relationships[name].mapper.class_
+        if option is not None:
+            options.append(option)
+    return options
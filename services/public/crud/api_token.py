@@ -0,0 +1,39 @@
+from datetime import datetime
+from public.schemas.api_token import ApiTokenWriteItem
+from sonja.auth import create_api_token, hash_api_token
+from sonja.database import Session
+from sonja.model import ApiToken
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+
+def read_api_tokens(session: Session, user_id: str) -> List[ApiToken]:
+    return session.query(ApiToken).filter(ApiToken.user_id == user_id).all()
+
+
+def read_api_token(session: Session, api_token_id: str) -> ApiToken:
+    return session.query(ApiToken).filter(ApiToken.id == api_token_id).first()
+
+
+async def read_api_token_by_value_async(session: AsyncSession, user_id: int, token: str) -> ApiToken:
+    statement = select(ApiToken).filter(ApiToken.token_hash == hash_api_token(token), ApiToken.user_id == user_id)
+    return (await session.scalars(statement)).first()
+
+
+def create_api_token_for_user(session: Session, user_id: str, api_token_item: ApiTokenWriteItem) -> ApiToken:
+    """Create an API token, the returned object carries the token itself in its attribute 'token'."""
+    token = create_api_token()
+    api_token = ApiToken(**api_token_item.data.attributes.dict(exclude_unset=True, by_alias=True))
+    api_token.user_id = int(user_id)
+    api_token.token_hash = hash_api_token(token)
+    api_token.created = datetime.utcnow()
+    session.add(api_token)
+    session.commit()
+    api_token.token = token
+    return api_token
+
+
+def delete_api_token(session: Session, api_token: ApiToken):
+    session.delete(api_token)
+    session.commit()
@@ -1,7 +1,10 @@
+from public.crud import get_load_options
 from public.schemas.build import BuildWriteItem, StatusEnum
 from sonja.database import Build, Channel, Commit, Profile, Repo, Session
-from sqlalchemy import desc
-from typing import Optional
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 
 from sonja.model import BuildStatus
 from sonja.redis import RedisClient
@@ -54,6 +57,65 @@ def read_build(session: Session, build_id: str) -> Build:
     return session.query(Build).filter(Build.id == build_id).first()
 
 
+# lazy loading is not available on an async session, load the relationships which the serializer can not take from
+# a foreign key column
+_build_load_options = (
+    selectinload(Build.missing_packages),
+    selectinload(Build.missing_recipes)
+)
+
+
+async def read_builds_async(session: AsyncSession, ecosystem_id: str, repo_id: Optional[str] = None,
+                            channel_id: Optional[str] = None, profile_id: Optional[str] = None,
+                            page: Optional[int] = None, per_page:  Optional[int] = None,
+                            load_paths: Optional[List[List[str]]] = None) -> dict:
+    statement = select(Build)\
+        .join(Build.profile)\
+        .join(Build.commit)\
+        .join(Commit.channel)\
+        .join(Commit.repo)\
+        .filter(Profile.ecosystem_id == ecosystem_id)
+
+    if repo_id:
+        statement = statement.filter(Repo.id == repo_id)
+
+    if profile_id:
+        statement = statement.filter(Profile.id == profile_id)
+
+    if channel_id:
+        statement = statement.filter(Channel.id == channel_id)
+
+    objs = statement.order_by(desc(Build.created), Build.id)\
+        .options(*_build_load_options, *get_load_options(Build, load_paths or []))
+
+    if page is not None and per_page is not None:
+        count = await session.scalar(select(func.count()).select_from(statement.subquery()))
+
+        objs = objs\
+            .limit(per_page)\
+            .offset(per_page * (page - 1))
+
+        total_pages = count // per_page
+        if count % per_page:
+            total_pages += 1
+
+        return {
+            "objs": (await session.scalars(objs)).all(),
+            "total_pages": total_pages
+        }
+    else:
+        return {
+            "objs": (await session.scalars(objs)).all()
+        }
+
+
+async def read_build_async(session: AsyncSession, build_id: str, load_paths: Optional[List[List[str]]] = None) \
+        -> Build:
+    statement = select(Build).filter(Build.id == build_id)\
+        .options(*_build_load_options, *get_load_options(Build, load_paths or []))
+    return (await session.scalars(statement)).first()
+
+
 def update_build(session: Session, redis_client: RedisClient, build_id: str, build_item: BuildWriteItem) -> Build:
     build = session.query(Build).filter(Build.id == build_id).with_for_update().first()
 
@@ -74,5 +136,7 @@ def update_build(session: Session, redis_client: RedisClient, build_id: str, bui
 
     session.commit()
     redis_client.publish_build_update(build)
+    if build.status == BuildStatus.stopping:
+        redis_client.publish_build_cancel(build)
 
     return build
@@ -1,5 +1,9 @@
+from public.crud import get_load_options
 from sonja.database import Commit, Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 
 
 def read_commits(session: Session, repo_id: str) -> List[Commit]:
@@ -8,3 +12,22 @@ def read_commits(session: Session, repo_id: str) -> List[Commit]:
 
 def read_commit(session: Session, commit_id: str) -> Commit:
     return session.query(Commit).filter(Commit.id == commit_id).first()
+
+
+_commit_load_options = (
+    selectinload(Commit.builds),
+)
+
+
+async def read_commits_async(session: AsyncSession, repo_id: str, load_paths: Optional[List[List[str]]] = None) \
+        -> List[Commit]:
+    statement = select(Commit).filter(Commit.repo_id == repo_id)\
+        .options(*_commit_load_options, *get_load_options(Commit, load_paths or []))
+    return (await session.scalars(statement)).all()
+
+
+async def read_commit_async(session: AsyncSession, commit_id: str, load_paths: Optional[List[List[str]]] = None) \
+        -> Commit:
+    statement = select(Commit).filter(Commit.id == commit_id)\
+        .options(*_commit_load_options, *get_load_options(Commit, load_paths or []))
+    return (await session.scalars(statement)).first()
@@ -1,6 +1,8 @@
 from sonja.database import Session
 from sonja.model import LogLine, Run
-from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional
 
 
 def read_log_lines(session: Session, run_id: str, page: Optional[int] = None, per_page:  Optional[int] = None)\
@@ -35,3 +37,70 @@ def read_log_lines(session: Session, run_id: str, page: Optional[int] = None, pe
 
 def read_log_line(session: Session, log_line_id: str) -> LogLine:
     return session.query(LogLine).filter(LogLine.id == log_line_id).first()
+
+
+async def read_log_lines_async(session: AsyncSession, run_id: str, page: Optional[int] = None,
+                               per_page:  Optional[int] = None) -> dict:
+    statement = select(LogLine).\
+        filter(LogLine.run_id == run_id).\
+        order_by(LogLine.number, LogLine.id)
+
+    if page is not None and per_page is not None:
+        objs = statement\
+            .limit(per_page)\
+            .offset(per_page * (page - 1))
+        count = await session.scalar(select(func.count(LogLine.id)).filter(LogLine.run_id == run_id))
+
+        total_pages = count // per_page
+        if count % per_page:
+            total_pages += 1
+
+        return {
+            "objs": (await session.scalars(objs)).all(),
+            "total_pages": total_pages
+        }
+    else:
+        return {
+            "objs": (await session.scalars(statement)).all()
+        }
+
+
+async def read_log_line_partitions_async(session: AsyncSession, run_id: str, size: int) \
+        -> AsyncIterator[List[LogLine]]:
+    """Yield the log lines of a run in partitions of the given size, the rows are fetched with a server-side
+    cursor."""
+    statement = select(LogLine).\
+        filter(LogLine.run_id == run_id).\
+        order_by(LogLine.number, LogLine.id).\
+        execution_options(yield_per=size)
+    result = await session.stream_scalars(statement)
+    async for partition in result.partitions(size):
+        yield partition
+
+
+async def read_log_line_async(session: AsyncSession, log_line_id: str) -> LogLine:
+    return (await session.scalars(select(LogLine).filter(LogLine.id == log_line_id))).first()
+
+
+async def read_log_line_range_async(session: AsyncSession, run_id: str, first: int, last: Optional[int] = None,
+                                    limit: Optional[int] = None) -> List[LogLine]:
+    statement = select(LogLine).filter(LogLine.run_id == run_id, LogLine.number >= first)
+    if last is not None:
+        statement = statement.filter(LogLine.number <= last)
+    statement = statement.order_by(LogLine.number, LogLine.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return (await session.scalars(statement)).all()
+
+
+async def read_last_log_lines_async(session: AsyncSession, run_id: str, count: int) -> List[LogLine]:
+    """Return the last lines of a run in ascending order, only these rows are read from the index."""
+    statement = select(LogLine).\
+        filter(LogLine.run_id == run_id).\
+        order_by(LogLine.number.desc(), LogLine.id.desc()).\
+        limit(count)
+    return list(reversed((await session.scalars(statement)).all()))
+
+
+async def read_last_log_line_number_async(session: AsyncSession, run_id: str) -> int:
+    return await session.scalar(select(func.max(LogLine.number)).filter(LogLine.run_id == run_id)) or 0
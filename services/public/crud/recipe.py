@@ -1,11 +1,21 @@
 from sonja.database import Recipe, Session, RecipeRevision
-from typing import List
+from sqlalchemy.orm import selectinload
+from typing import Iterator, List
 
 
 def read_recipes(session: Session, ecosystem_id: str) -> List[Recipe]:
     return session.query(Recipe).filter(Recipe.ecosystem_id == ecosystem_id).all()
 
 
+def read_recipes_per(session: Session, ecosystem_id: str, size: int) -> Iterator[Recipe]:
+    """Yield the recipes of an ecosystem while they are fetched in batches of the given size."""
+    return session.query(Recipe)\
+        .filter(Recipe.ecosystem_id == ecosystem_id)\
+        .order_by(Recipe.id)\
+        .options(selectinload(Recipe.required_by))\
+        .yield_per(size)
+
+
 def read_recipe(session: Session, recipe_id: str) -> Recipe:
     return session.query(Recipe).filter(Recipe.id == recipe_id).first()
 
@@ -1,6 +1,9 @@
+from public.crud import get_load_options
 from sonja.model import Run
 from sonja.database import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 
 def read_runs(session: Session, build_id: str) -> List[Run]:
@@ -9,3 +12,14 @@ def read_runs(session: Session, build_id: str) -> List[Run]:
 
 def read_run(session: Session, run_id: str) -> Run:
     return session.query(Run).filter(Run.id == run_id).first()
+
+
+async def read_runs_async(session: AsyncSession, build_id: str, load_paths: Optional[List[List[str]]] = None) \
+        -> List[Run]:
+    statement = select(Run).filter(Run.build_id == build_id).options(*get_load_options(Run, load_paths or []))
+    return (await session.scalars(statement)).all()
+
+
+async def read_run_async(session: AsyncSession, run_id: str, load_paths: Optional[List[List[str]]] = None) -> Run:
+    statement = select(Run).filter(Run.id == run_id).options(*get_load_options(Run, load_paths or []))
+    return (await session.scalars(statement)).first()
@@ -1,12 +1,30 @@
 from public.schemas.user import UserWriteItem
+from sonja.cache import TtlCache
 from sonja.database import Session, User, remove_but_last_user, OperationFailed, NotFound
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List
+import os
+
+# the permissions of a user by user ID, a change made by another process of the API is seen after the TTL at latest
+PERMISSION_CACHE_TTL_SECONDS = float(os.environ.get("SONJA_PERMISSION_CACHE_TTL", "30"))
+permission_cache = TtlCache(PERMISSION_CACHE_TTL_SECONDS)
 
 
 def read_user_by_id(session: Session, user_id: str) -> User:
     return session.query(User).filter(User.id == user_id).first()
 
 
+async def read_user_by_name_async(session: AsyncSession, user_name: str) -> User:
+    return (await session.scalars(select(User).filter(User.user_name == user_name))).first()
+
+
+async def read_user_by_id_async(session: AsyncSession, user_id: str) -> User:
+    statement = select(User).filter(User.id == user_id).options(selectinload(User.permissions))
+    return (await session.scalars(statement)).first()
+
+
 def read_users(session: Session) -> List[User]:
     return session.query(User).all()
 
@@ -23,8 +41,10 @@ def update_user(session: Session, user: User, user_item: UserWriteItem) -> User:
     for attribute in data:
         setattr(user, attribute, data[attribute])
     session.commit()
+    permission_cache.invalidate(str(user.id))
     return user
 
 
 def delete_user(session: Session, user_id: str):
     remove_but_last_user(session, user_id)
+    permission_cache.invalidate(str(user_id))
@@ -0,0 +1,115 @@
+from aioredis import Redis
+from fastapi import Depends, Header, Request, Response
+from fastapi_plugins import depends_redis
+from public.jsonapi import get_included_types, parse_include
+from sonja.config import logger
+from sonja.redis import VERSION_KEY
+from typing import Callable, List, Optional
+import hashlib
+import time
+
+# the versions of the resources which can be included in a document, resources without version are not cached
+INCLUDED_VERSIONS = {
+    "builds": "builds",
+    "channels": "channels",
+    "commits": "commits",
+    "ecosystems": "ecosystems",
+    "packages": "recipes",
+    "profiles": "profiles",
+    "recipe-revisions": "recipes",
+    "recipes": "recipes",
+    "repos": "repos"
+}
+
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+class ETag(object):
+    """The entity tag of a response, it is None if the versions of the resources are not available."""
+    def __init__(self, value: Optional[str]):
+        self.value = value
+
+    @property
+    def headers(self) -> dict:
+        return {"ETag": self.value} if self.value else dict()
+
+
+async def read_versions(redis: Redis, names: List[str]) -> Optional[List[int]]:
+    """Return the versions of the resources or None if Redis is not available."""
+    keys = [VERSION_KEY.format(name) for name in names]
+    try:
+        versions = await redis.mget(*keys)
+        if None in versions:
+            # start versions which were never bumped like bump_versions() does
+            for key, version in zip(keys, versions):
+                if version is None:
+                    await redis.set(key, int(time.time() * 1000), exist=redis.SET_IF_NOT_EXIST)
+            versions = await redis.mget(*keys)
+        return [int(version) for version in versions]
+    except Exception as e:
+        logger.warning("Failed to read versions of %s: %s", names, e)
+        return None
+
+
+def get_etag(versions: List[int], url: str) -> str:
+    digest = hashlib.sha1(f"{url} {versions}".encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    return any(tag.strip() in (etag, "*") for tag in if_none_match.split(","))
+
+
+def get_included_versions(type_: str, include: Optional[str]) -> Optional[List[str]]:
+    """Return the names of the versions of the resources which are included in a document of the given type or None
+    if one of them has no version."""
+    try:
+        types = get_included_types(type_, parse_include(include))
+    except ValueError:
+        return None
+    if any(t not in INCLUDED_VERSIONS for t in types):
+        return None
+    return sorted(set(INCLUDED_VERSIONS[t] for t in types))
+
+
+def etag(*names: str, type_: Optional[str] = None) -> Callable[..., ETag]:
+    """Return a dependency which answers a request with 304 if the resources did not change since the client received
+    the response with the entity tag in 'If-None-Match'.
+
+    If the type of the document is given the versions of the resources in its 'include' parameter are part of the
+    entity tag too.
+
+    The entity tag is computed from the URL and the versions of the resources in Redis, no database access is needed
+    to decide that a response did not change. The versions are read before the response so that the entity tag is at
+    most older than the response.
+    """
+    async def get_etag_dependency(request: Request, response: Response,
+                                  if_none_match: Optional[str] = Header(None),
+                                  redis: Redis = Depends(depends_redis), include: Optional[str] = None) -> ETag:
+        version_names = list(names)
+        if type_ and include:
+            included = get_included_versions(type_, include)
+            if included is None:
+                return ETag(None)
+            version_names += [name for name in included if name not in version_names]
+
+        versions = await read_versions(redis, version_names)
+        if versions is None:
+            return ETag(None)
+
+        value = get_etag(versions, str(request.url))
+        if matches(value, if_none_match):
+            raise NotModified(value)
+
+        response.headers["ETag"] = value
+        return ETag(value)
+
+    return get_etag_dependency
+
+
+def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers={"ETag": exc.etag})
@@ -0,0 +1,114 @@
+from aioredis import Channel, Redis
+from sonja.config import logger
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import os
+
+
+SSE_QUEUE_SIZE = int(os.environ.get("SONJA_SSE_QUEUE_SIZE", "100"))
+
+# turns a message received on a channel into the server-sent event or None if there is nothing to send
+Loader = Callable[[dict], Awaitable[Optional[dict]]]
+# yields the events a client missed before it receives the events of the channel
+Replay = Callable[[], AsyncIterator[dict]]
+
+
+class EventHub(object):
+    """Forwards the messages of a Redis channel to all server-sent event clients of this process.
+
+    The hub subscribes once per channel and loads and serializes each updated entity once, the JSON is put into a
+    bounded queue per client. A client which does not keep up with its queue is disconnected, the browser reconnects
+    by itself. The subscription of a channel ends with its last client.
+    """
+    def __init__(self, queue_size: int = SSE_QUEUE_SIZE):
+        self.__queue_size = queue_size
+        self.__clients: Dict[str, Set[asyncio.Queue]] = dict()
+        self.__tasks: Dict[str, asyncio.Task] = dict()
+        self.__subscribed: Dict[str, asyncio.Event] = dict()
+
+    def client_count(self, channel: str) -> int:
+        return len(self.__clients.get(channel, set()))
+
+    async def subscribe(self, channel: str, redis: Redis, load: Loader, replay: Optional[Replay] = None) \
+            -> AsyncIterator[dict]:
+        queue = asyncio.Queue(self.__queue_size)
+        clients = self.__clients.setdefault(channel, set())
+        clients.add(queue)
+        if channel not in self.__tasks:
+            self.__subscribed[channel] = asyncio.Event()
+            self.__tasks[channel] = asyncio.create_task(self.__listen(channel, redis, load,
+                                                                      self.__subscribed[channel]))
+        subscribed = self.__subscribed[channel]
+
+        try:
+            # the channel is subscribed before the replay so that the client does not miss events in between
+            if replay:
+                await subscribed.wait()
+                async for event in replay():
+                    yield event
+
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            clients.discard(queue)
+            if not clients and self.__clients.get(channel) is clients:
+                del self.__clients[channel]
+                task = self.__tasks.pop(channel, None)
+                self.__subscribed.pop(channel, None)
+                if task:
+                    task.cancel()
+
+    async def __listen(self, channel: str, redis: Redis, load: Loader, subscribed: asyncio.Event):
+        try:
+            (subscription,) = await redis.subscribe(Channel(channel, False))
+            logger.info("Subscribed to channel '%s'", channel)
+            subscribed.set()
+            while await subscription.wait_message():
+                message = await subscription.get_json()
+                try:
+                    event = await load(message)
+                except Exception as e:
+                    logger.error("Failed to load event for message '%s' on '%s': %s", message, channel, e)
+                    continue
+
+                if event:
+                    logger.debug("Send event '%s' received on '%s'", event, channel)
+                    self.__broadcast(channel, event)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error("Lost subscription of channel '%s': %s", channel, e)
+        finally:
+            subscribed.set()
+            if asyncio.current_task() is self.__tasks.get(channel):
+                # the subscription ended by itself, let the clients reconnect
+                del self.__tasks[channel]
+                del self.__subscribed[channel]
+                for queue in self.__clients.pop(channel, set()):
+                    self.__close(queue)
+            if channel not in self.__tasks:
+                try:
+                    await redis.unsubscribe(channel)
+                    logger.info("Unsubscribed from channel '%s'", channel)
+                except Exception as e:
+                    logger.warning("Failed to unsubscribe from channel '%s': %s", channel, e)
+
+    def __broadcast(self, channel: str, event: dict):
+        for queue in list(self.__clients.get(channel, set())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning("Disconnect slow client of channel '%s'", channel)
+                self.__close(queue)
+
+    @staticmethod
+    def __close(queue: asyncio.Queue):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+
+hub = EventHub()
@@ -1,5 +1,15 @@
+from datetime import date, datetime
+from enum import Enum
 from pydantic import create_model, BaseModel
-from typing import List, Type, Union, Optional
+from pydantic.fields import ModelField, SHAPE_SINGLETON
+from types import SimpleNamespace
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Mapping, Set, Tuple, \
+    Type, Union, Optional
+import json
+import os
+
+# the number of resources which are serialized into one chunk of a streamed document
+STREAM_CHUNK_SIZE = int(os.environ.get("SONJA_STREAM_CHUNK_SIZE", "500"))
 
 
 def attributes(cls: Type):
@@ -40,6 +50,195 @@ def _create_data_obj(cls: Type, obj: object):
     return data_obj
 
 
+def _get_converter(field: ModelField) -> Optional[Callable]:
+    """Return the function which turns the ORM value of a field into its JSON value or None if the field needs the
+    validation by pydantic."""
+    type_ = field.type_
+    if field.shape != SHAPE_SINGLETON or not isinstance(type_, type):
+        return None
+    if issubclass(type_, Enum):
+        return lambda v: type_(v).value
+    if issubclass(type_, (datetime, date)):
+        return lambda v: v.isoformat() if isinstance(v, (datetime, date)) else v
+    if issubclass(type_, str):
+        return lambda v: v if isinstance(v, str) else v.decode() if isinstance(v, bytes) else str(v)
+    if issubclass(type_, bool):
+        return bool
+    if issubclass(type_, (int, float)):
+        return type_
+    return None
+
+
+# the sparse fieldsets of a request by resource type
+Fields = Optional[Dict[str, Set[str]]]
+# the relationship paths of a request, e.g. [["commit"], ["commit", "repo"]] for include=commit.repo
+Include = Optional[List[List[str]]]
+
+
+def _create_data_serializer(cls: Type) -> Callable[[object, Optional[Set[str]]], dict]:
+    """Precompute how the data objects of the item (list) class are built from the column values of an ORM object.
+
+    The result is the same as the one of from_db() followed by json() but skips the validation by pydantic. Classes
+    with attributes which are not plain values fall back to from_db(). If a set of fields is passed only these
+    attributes and relationships are serialized.
+    """
+    data_cls = cls.__fields__["data"].type_
+    type_ = data_cls.__fields__["type"].default
+    has_id = "id" in data_cls.__fields__
+    plan = []
+    for field in data_cls.__fields__["attributes"].type_.__fields__.values():
+        converter = _get_converter(field)
+        if not converter:
+            plan = None
+            break
+        plan.append((field.name, field.alias, field.get_default(), converter))
+
+    relationships = []
+    if "relationships" in data_cls.__fields__:
+        relationships = [(f.name, f.type_.serialize)
+                         for f in data_cls.__fields__["relationships"].type_.__fields__.values()]
+
+    def serialize_validated(obj: object, fields: Optional[Set[str]] = None) -> dict:
+        data_obj = json.loads(data_cls(**_create_data_obj(cls, obj)).json())
+        if fields is not None:
+            data_obj["attributes"] = {k: v for k, v in data_obj["attributes"].items() if k in fields}
+            if "relationships" in data_obj:
+                data_obj["relationships"] = {k: v for k, v in data_obj["relationships"].items() if k in fields}
+        return data_obj
+
+    def serialize(obj: object, fields: Optional[Set[str]] = None) -> dict:
+        values = dict()
+        for name, alias, default, converter in plan:
+            if fields is not None and name not in fields:
+                continue
+            value = getattr(obj, alias, default)
+            values[name] = None if value is None else converter(value)
+
+        data_obj = dict()
+        if has_id:
+            data_obj["id"] = None if obj.id is None else str(obj.id)
+        data_obj["type"] = type_
+        data_obj["attributes"] = values
+        if relationships:
+            data_obj["relationships"] = {name: serialize_relationship(obj) for name, serialize_relationship in
+                                         relationships if fields is None or name in fields}
+        return data_obj
+
+    return serialize if plan is not None else serialize_validated
+
+
+# the item classes which represent the resources of compound documents by type
+_resources = dict()
+
+
+def resource(cls: Type):
+    """Register the item class as the representation of its resource type in the 'included' part of documents."""
+    _resources[cls.__fields__["data"].type_.__fields__["type"].default] = cls
+    return cls
+
+
+def _get_resource(type_: str) -> Type:
+    if type_ not in _resources:
+        raise ValueError(f"Resources of type '{type_}' can not be included")
+    return _resources[type_]
+
+
+def _get_relationship(type_: str, name: str) -> Tuple[str, bool]:
+    """Return the type of the related resource and if it is a to-many relationship."""
+    relationships = _get_resource(type_).__fields__["data"].type_.__fields__.get("relationships")
+    model = relationships.type_.__fields__.get(name) if relationships else None
+    if not model or not hasattr(model.type_, "related_type"):
+        raise ValueError(f"Resources of type '{type_}' have no relationship '{name}'")
+    return model.type_.related_type, model.type_.many
+
+
+def parse_include(include: Optional[str]) -> Include:
+    if not include:
+        return None
+    return [path.split(".") for path in include.split(",") if path]
+
+
+def parse_fields(query_params: Mapping[str, str]) -> Fields:
+    """Collect the sparse fieldsets from query parameters of the form fields[TYPE]=FIELD,FIELD."""
+    fields = dict()
+    for key, value in query_params.items():
+        if key.startswith("fields[") and key.endswith("]"):
+            fields[key[7:-1]] = set(f for f in value.split(",") if f)
+    return fields or None
+
+
+def check_include(type_: str, include: Include):
+    """Raise a ValueError if one of the relationship paths does not exist for resources of the given type."""
+    for path in include or []:
+        current_type = type_
+        for name in path:
+            current_type, _ = _get_relationship(current_type, name)
+            _get_resource(current_type)
+
+
+def get_included_types(type_: str, include: Include) -> Set[str]:
+    """Return the types of the resources which are included by the relationship paths."""
+    types = set()
+    for path in include or []:
+        current_type = type_
+        for name in path:
+            current_type, _ = _get_relationship(current_type, name)
+            types.add(current_type)
+    return types
+
+
+def get_load_paths(type_: str, include: Include) -> List[List[str]]:
+    """Return the relationship paths which have to be loaded to serialize the included resources.
+
+    These are the included paths and the to-many relationships of the included resources, the to-one relationships
+    are serialized from their foreign key columns.
+    """
+    paths = []
+    for path in include or []:
+        current_type = type_
+        for i, name in enumerate(path):
+            current_type, _ = _get_relationship(current_type, name)
+            relationships = _get_resource(current_type).__fields__["data"].type_.__fields__.get("relationships")
+            for model in relationships.type_.__fields__.values() if relationships else []:
+                if getattr(model.type_, "many", False):
+                    paths.append(path[:i + 1] + [model.name])
+        paths.append(path)
+    return paths
+
+
+def _get_included(type_: str, objs: list, fields: Fields, include: Include) -> list:
+    # each resource appears once in a document, the primary resources are not repeated
+    primary = set((type_, str(obj.id)) for obj in objs)
+    included = dict()
+    for path in include or []:
+        current_type, current = type_, objs
+        for name in path:
+            current_type, many = _get_relationship(current_type, name)
+            related = []
+            for obj in current:
+                value = getattr(obj, name)
+                if many:
+                    related += value
+                elif value is not None:
+                    related.append(value)
+            serialize_data = _get_resource(current_type).serialize_data
+            for obj in related:
+                key = (current_type, str(obj.id))
+                if key not in included and key not in primary:
+                    included[key] = serialize_data(obj, (fields or {}).get(current_type))
+            current = related
+    return list(included.values())
+
+
+def from_event(value):
+    """Turn the entity data attached to an event into an object which can be passed to from_db()."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: from_event(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [from_event(v) for v in value]
+    return value
+
+
 def item(cls: Type):
     @staticmethod
     def from_db(obj: object):
@@ -51,6 +250,24 @@ def item(cls: Type):
 
     setattr(cls, "from_db", from_db)
 
+    serialize_data = _create_data_serializer(cls)
+    type_ = cls.__fields__["data"].type_.__fields__["type"].default
+
+    @staticmethod
+    def serialize(obj: object, fields: Fields = None, include: Include = None) -> dict:
+        """Return the JSON document of the object without validating it."""
+        values = {
+            "data": serialize_data(obj, (fields or {}).get(type_))
+        }
+
+        if include:
+            values["included"] = _get_included(type_, [obj], fields, include)
+
+        return values
+
+    setattr(cls, "serialize", serialize)
+    setattr(cls, "serialize_data", staticmethod(serialize_data))
+
     example = dict()
     example["data"] = cls.__fields__['data'].type_.Config.schema_extra["example"]
     setattr(cls.Config, "schema_extra", dict())
@@ -87,6 +304,67 @@ def item_list(cls: Type):
 
     setattr(cls, "from_db", from_db)
 
+    serialize_data = _create_data_serializer(cls)
+    type_ = cls.__fields__["data"].type_.__fields__["type"].default
+    has_meta = "meta" in cls.__fields__
+
+    @staticmethod
+    def serialize(objs: list, total_pages: int = None, fields: Fields = None, include: Include = None) -> dict:
+        """Return the JSON document of the objects without validating them."""
+        objs = list(objs)
+        values = {
+            "data": [serialize_data(obj, (fields or {}).get(type_)) for obj in objs]
+        }
+
+        if has_meta:
+            values["meta"] = {"total_pages": total_pages} if total_pages else None
+
+        if include:
+            values["included"] = _get_included(type_, objs, fields, include)
+
+        return values
+
+    setattr(cls, "serialize", serialize)
+
+    # the document is written like JSONResponse writes it
+    def dumps(value) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps_chunk(chunk: list, first: bool, fields: Fields) -> str:
+        items = ",".join(dumps(serialize_data(obj, (fields or {}).get(type_))) for obj in chunk)
+        return items if first else "," + items
+
+    def end() -> str:
+        return '],"meta":null}' if has_meta else "]}"
+
+    @staticmethod
+    def stream(objs: Iterable, fields: Fields = None) -> Iterator[str]:
+        """Yield the JSON document of the objects in chunks while the objects are fetched."""
+        yield '{"data":['
+        chunk, first = [], True
+        for obj in objs:
+            chunk.append(obj)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield dumps_chunk(chunk, first, fields)
+                chunk, first = [], False
+        if chunk:
+            yield dumps_chunk(chunk, first, fields)
+        yield end()
+
+    @staticmethod
+    async def stream_async(partitions: AsyncIterable[list], fields: Fields = None) -> AsyncIterator[str]:
+        """Yield the JSON document of the partitions of objects while they are fetched."""
+        yield '{"data":['
+        first = True
+        async for partition in partitions:
+            if partition:
+                yield dumps_chunk(partition, first, fields)
+                first = False
+        yield end()
+
+    setattr(cls, "stream", stream)
+    setattr(cls, "stream_async", stream_async)
+
     example = dict()
     example["data"] = [cls.__fields__['data'].type_.Config.schema_extra["example"]]
     if "meta" in cls.__fields__:
@@ -120,7 +398,14 @@ class Link:
         def from_db(obj: object):
             return model().dict()
 
+        links = model().dict()
+
+        @staticmethod
+        def serialize(obj: object):
+            return links
+
         setattr(model, "from_db", from_db)
+        setattr(model, "serialize", serialize)
         return model
 
 
@@ -151,7 +436,21 @@ class DataItem:
                 return {"data": None}
             return {"data": {"id": related.id, "type": self.type_}}
 
+        @staticmethod
+        def serialize(obj: object):
+            # prefer the foreign key column, it does not load the related object
+            related_id = getattr(obj, f"{self.name}_id", None)
+            if related_id is None:
+                related = getattr(obj, self.name)
+                related_id = related.id if related else None
+            if related_id is None:
+                return {"data": None}
+            return {"data": {"type": self.type_, "id": str(related_id)}}
+
         setattr(model, "from_db", from_db)
+        setattr(model, "serialize", serialize)
+        setattr(model, "related_type", self.type_)
+        setattr(model, "many", False)
         return model
 
 
@@ -179,7 +478,14 @@ class DataList:
         def from_db(obj: object):
             return {"data": [{"id": o.id, "type": self.type_} for o in getattr(obj, self.name)]}
 
+        @staticmethod
+        def serialize(obj: object):
+            return {"data": [{"type": self.type_, "id": str(o.id)} for o in getattr(obj, self.name)]}
+
         setattr(model, "from_db", from_db)
+        setattr(model, "serialize", serialize)
+        setattr(model, "related_type", self.type_)
+        setattr(model, "many", True)
         return model
 
 
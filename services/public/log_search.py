@@ -0,0 +1,55 @@
+from collections import deque
+from public.log_text import decode_content
+from typing import AsyncIterator, Callable, List, Tuple
+import os
+import re
+
+SEARCH_LIMIT = int(os.environ.get("SONJA_LOG_SEARCH_LIMIT", "1000"))
+SEARCH_CONTEXT = 10
+QUERY_LENGTH = 256
+
+
+def create_matcher(query: str, regex: bool) -> Callable[[str], bool]:
+    """Return a function which tests if a line contains the query, an invalid regular expression raises a
+    ValueError."""
+    if not regex:
+        return lambda content: query in content
+    try:
+        pattern = re.compile(query)
+    except re.error as e:
+        raise ValueError(f"Invalid regular expression: {e}")
+    return lambda content: pattern.search(content) is not None
+
+
+async def search_lines(partitions: AsyncIterator[list], matches: Callable[[str], bool], context: int, limit: int) \
+        -> Tuple[List[dict], bool]:
+    """Return the first ``limit`` matching lines with ``context`` lines before and after them and whether there are
+    more matches.
+
+    The partitions are searched while they are read, the search stops as soon as the result is complete.
+    """
+    results = []
+    incomplete = []
+    before = deque(maxlen=context)
+    truncated = False
+    async for partition in partitions:
+        for log_line in partition:
+            line = {"number": log_line.number, "content": decode_content(log_line)}
+            for result in incomplete:
+                result["after"].append(line)
+            incomplete = [result for result in incomplete if len(result["after"]) < context]
+
+            if matches(line["content"]):
+                if len(results) < limit:
+                    result = {**line, "before": list(before), "after": []}
+                    results.append(result)
+                    if context:
+                        incomplete.append(result)
+                else:
+                    truncated = True
+
+            if truncated and not incomplete:
+                return results, True
+            before.append(line)
+
+    return results, truncated
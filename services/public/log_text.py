@@ -0,0 +1,108 @@
+from collections import deque
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+import os
+import re
+
+# the maximum number of lines of a tail or line range and the maximum size of a byte range
+LOG_LINE_LIMIT = int(os.environ.get("SONJA_LOG_LINE_LIMIT", "10000"))
+LOG_BYTE_LIMIT = int(os.environ.get("SONJA_LOG_BYTE_LIMIT", str(8 * 1024 * 1024)))
+
+_RANGE_PATTERN = re.compile(r"^\s*(bytes|lines)\s*=\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+class RangeNotSatisfiable(Exception):
+    def __init__(self, content_range: str):
+        self.content_range = content_range
+
+
+class LogRange(object):
+    """A single range of a 'Range' header, ``first`` is None for a suffix range of the last ``last`` units."""
+    def __init__(self, unit: str, first: Optional[int], last: Optional[int]):
+        self.unit = unit
+        self.first = first
+        self.last = last
+
+    @property
+    def is_suffix(self) -> bool:
+        return self.first is None
+
+
+def parse_range(header: str) -> LogRange:
+    """Parse a 'Range' header with a single range of bytes or lines, e.g. 'lines=10-20', 'bytes=100-' or 'lines=-50'.
+
+    Line ranges refer to the numbers of the log lines, byte ranges to the UTF-8 encoded text.
+    """
+    match = _RANGE_PATTERN.match(header)
+    if not match:
+        raise ValueError(f"Unsupported range '{header}'")
+
+    unit, first, last = match.group(1), match.group(2), match.group(3)
+    if not first and not last:
+        raise ValueError(f"Unsupported range '{header}'")
+    if not first:
+        if int(last) == 0:
+            raise ValueError(f"Unsupported range '{header}'")
+        return LogRange(unit, None, int(last))
+    if last and int(last) < int(first):
+        raise ValueError(f"Unsupported range '{header}'")
+    return LogRange(unit, int(first), int(last) if last else None)
+
+
+def decode_content(log_line) -> str:
+    content = log_line.content
+    return content.decode("cp1252", errors="replace") if isinstance(content, bytes) else content
+
+
+def format_line(log_line) -> bytes:
+    return f"{decode_content(log_line)}\n".encode()
+
+
+def format_lines(log_lines: Iterable) -> bytes:
+    return b"".join(format_line(log_line) for log_line in log_lines)
+
+
+async def read_byte_range(partitions: AsyncIterator[list], first: int, last: Optional[int]) -> Tuple[bytes, str]:
+    """Return the given bytes of the log and their 'Content-Range', the partitions are read until the range is
+    complete."""
+    last = first + LOG_BYTE_LIMIT - 1 if last is None else min(last, first + LOG_BYTE_LIMIT - 1)
+    chunks = []
+    offset = 0
+    async for partition in partitions:
+        for log_line in partition:
+            line = format_line(log_line)
+            end = offset + len(line)
+            if end > first:
+                chunks.append(line[max(first - offset, 0):last - offset + 1])
+            offset = end
+            if offset > last:
+                return b"".join(chunks), f"bytes {first}-{last}/*"
+
+    if offset <= first:
+        raise RangeNotSatisfiable(f"bytes */{offset}")
+    return b"".join(chunks), f"bytes {first}-{offset - 1}/{offset}"
+
+
+async def read_byte_suffix(partitions: AsyncIterator[list], length: int) -> Tuple[bytes, str]:
+    """Return the last bytes of the log and their 'Content-Range', only the lines which end the log are kept in
+    memory."""
+    length = min(length, LOG_BYTE_LIMIT)
+    lines: deque = deque()
+    kept = 0
+    size = 0
+    async for partition in partitions:
+        for log_line in partition:
+            line = format_line(log_line)
+            lines.append(line)
+            kept += len(line)
+            size += len(line)
+            while kept - len(lines[0]) >= length:
+                kept -= len(lines.popleft())
+
+    if not size:
+        raise RangeNotSatisfiable("bytes */0")
+    body = b"".join(lines)[-length:]
+    return body, f"bytes {size - len(body)}-{size - 1}/{size}"
+
+
+def get_line_range(log_lines: List, total: int) -> str:
+    return f"lines {log_lines[0].number}-{log_lines[-1].number}/{total}"
@@ -1,7 +1,12 @@
 from fastapi import FastAPI
 from fastapi_plugins import redis_plugin
 from public.api import router
+from public.client import redisClient
+from public.compression import CompressionMiddleware
 from public.config import api_prefix
+from public.etag import NotModified, not_modified_handler
+from public.password import password_verifier
+from sonja.entity_cache import entity_cache
 
 app = FastAPI(title="Public", openapi_url="/api/v1/openapi.json", docs_url="/api/v1/docs", redoc_url="/api/v1/redoc")
 
@@ -10,11 +15,16 @@ app = FastAPI(title="Public", openapi_url="/api/v1/openapi.json", docs_url="/api
 async def on_startup() -> None:
     await redis_plugin.init_app(app)
     await redis_plugin.init()
+    entity_cache.start(redisClient)
 
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
     await redis_plugin.terminate()
+    password_verifier.shutdown()
+    entity_cache.stop()
 
 
+app.add_middleware(CompressionMiddleware, event_prefix=f"{api_prefix}/event/")
+app.add_exception_handler(NotModified, not_modified_handler)
 app.include_router(router, prefix=api_prefix)
@@ -0,0 +1,75 @@
+from concurrent.futures import ProcessPoolExecutor
+from sonja.auth import test_password
+from sonja.config import logger
+from typing import Optional
+import asyncio
+import multiprocessing
+import os
+
+
+PASSWORD_WORKERS = int(os.environ.get("SONJA_PASSWORD_WORKERS", "2"))
+PASSWORD_QUEUE_SIZE = int(os.environ.get("SONJA_PASSWORD_QUEUE_SIZE", "16"))
+PASSWORD_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("SONJA_PASSWORD_QUEUE_TIMEOUT", "5"))
+
+
+class PasswordVerifierBusy(Exception):
+    pass
+
+
+class PasswordVerifier(object):
+    """Checks passwords in a separate pool of processes so that bcrypt does not block the API.
+
+    At most ``workers`` checks run at the same time and at most ``queue_size`` further checks wait for a worker. A
+    check which does not get a worker within ``queue_timeout`` seconds fails with PasswordVerifierBusy.
+    """
+    def __init__(self, workers: int = PASSWORD_WORKERS, queue_size: int = PASSWORD_QUEUE_SIZE,
+                 queue_timeout: float = PASSWORD_QUEUE_TIMEOUT_SECONDS):
+        self.__workers = workers
+        self.__queue_size = queue_size
+        self.__queue_timeout = queue_timeout
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__slots: Optional[asyncio.Semaphore] = None
+        self.__running: Optional[asyncio.Semaphore] = None
+        self.__rejected = 0
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        if not self.__executor:
+            self.__executor = ProcessPoolExecutor(self.__workers, mp_context=multiprocessing.get_context("spawn"))
+            self.__slots = asyncio.Semaphore(self.__workers + self.__queue_size)
+            self.__running = asyncio.Semaphore(self.__workers)
+
+        if self.__slots.locked():
+            self.__reject("the queue is full")
+        await self.__slots.acquire()
+        try:
+            try:
+                await asyncio.wait_for(self.__running.acquire(), self.__queue_timeout)
+            except asyncio.TimeoutError:
+                self.__reject("no worker became available")
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.__executor, test_password, password, hashed)
+            finally:
+                self.__running.release()
+        finally:
+            self.__slots.release()
+
+    def statistics(self) -> dict:
+        return {
+            "workers": self.__workers,
+            "queue_size": self.__queue_size,
+            "rejected": self.__rejected
+        }
+
+    def shutdown(self):
+        if self.__executor:
+            self.__executor.shutdown(wait=False)
+            self.__executor = None
+
+    def __reject(self, reason: str):
+        self.__rejected += 1
+        logger.warning("Reject password check because %s", reason)
+        raise PasswordVerifierBusy()
+
+
+password_verifier = PasswordVerifier()
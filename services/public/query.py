@@ -0,0 +1,25 @@
+from fastapi import HTTPException, Request
+from public.jsonapi import check_include, get_load_paths, parse_fields, parse_include, Fields, Include
+from typing import Callable, List, Optional
+
+
+class DocumentOptions(object):
+    """The sparse fieldsets and included relationships requested for a JSON:API document."""
+    def __init__(self, fields: Fields, include: Include, load_paths: List[List[str]]):
+        self.fields = fields
+        self.include = include
+        self.load_paths = load_paths
+
+
+def document_options(type_: str) -> Callable[..., DocumentOptions]:
+    """Return a dependency which parses the 'fields[TYPE]' and 'include' query parameters of a request for resources
+    of the given type."""
+    def get_document_options(request: Request, include: Optional[str] = None) -> DocumentOptions:
+        paths = parse_include(include)
+        try:
+            check_include(type_, paths)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return DocumentOptions(parse_fields(request.query_params), paths, get_load_paths(type_, paths))
+
+    return get_document_options
@@ -0,0 +1,103 @@
+from datetime import datetime
+from public.jsonapi import attributes, data, item, item_list, create_relationships, DataItem
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+@attributes
+class ApiTokenWrite(BaseModel):
+    name: str = ""
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "name": "CI"
+            }
+        }
+
+
+@attributes
+class ApiTokenRead(ApiTokenWrite):
+    created: Optional[datetime]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "name": "CI",
+                "created": "2000-01-02T13:30:00"
+            }
+        }
+
+
+@attributes
+class ApiTokenCreated(ApiTokenRead):
+    token: str = ""
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "name": "CI",
+                "created": "2000-01-02T13:30:00",
+                "token": "sonja_0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef"
+            }
+        }
+
+
+api_token_relationships = create_relationships("ApiTokenRelationships", [
+    DataItem("user", "users")
+])
+
+
+@data
+class ApiTokenWriteData(BaseModel):
+    type: str = "api-tokens"
+    attributes: ApiTokenWrite = Field(default_factory=ApiTokenWrite)
+
+    class Config:
+        pass
+
+
+@item
+class ApiTokenWriteItem(BaseModel):
+    data: ApiTokenWriteData = Field(default_factory=ApiTokenWriteData)
+
+    class Config:
+        pass
+
+
+@data
+class ApiTokenReadData(BaseModel):
+    id: Optional[str]
+    type: str = "api-tokens"
+    attributes: ApiTokenRead = Field(default_factory=ApiTokenRead)
+    relationships: api_token_relationships = Field(default_factory=api_token_relationships)
+
+    class Config:
+        pass
+
+
+@item_list
+class ApiTokenReadList(BaseModel):
+    data: List[ApiTokenReadData] = Field(default_factory=list)
+
+    class Config:
+        pass
+
+
+@data
+class ApiTokenCreatedData(BaseModel):
+    id: Optional[str]
+    type: str = "api-tokens"
+    attributes: ApiTokenCreated = Field(default_factory=ApiTokenCreated)
+    relationships: api_token_relationships = Field(default_factory=api_token_relationships)
+
+    class Config:
+        pass
+
+
+@item
+class ApiTokenCreatedItem(BaseModel):
+    data: ApiTokenCreatedData = Field(default_factory=ApiTokenCreatedData)
+
+    class Config:
+        pass
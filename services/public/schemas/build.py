@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from public.jsonapi import attributes, data, item, item_list, create_relationships, DataItem, DataList, \
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, DataItem, DataList, \
     PagedItemListMeta, Link
 from pydantic import BaseModel, Field
 from typing import List, Optional
@@ -79,6 +79,7 @@ class BuildReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class BuildReadItem(BaseModel):
     data: BuildReadData = Field(default_factory=BuildReadData)
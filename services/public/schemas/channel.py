@@ -1,4 +1,4 @@
-from public.jsonapi import attributes, data, item, item_list, create_relationships, Link, DataItem
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, Link, DataItem
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
@@ -14,6 +14,8 @@ class Channel(BaseModel):
     conan_channel: Optional[str]
     conan_remote: Optional[str]
     ref_pattern: Optional[str]
+    log_keep_runs: Optional[int]
+    log_retention_days: Optional[int]
 
     class Config:
         schema_extra = {
@@ -21,7 +23,9 @@ class Channel(BaseModel):
                 "name": "Releases",
                 "conan_channel": "stable",
                 "conan_remote": "default",
-                "ref_pattern": "main"
+                "ref_pattern": "main",
+                "log_keep_runs": 5,
+                "log_retention_days": 30
             }
         }
 
@@ -66,6 +70,7 @@ class ChannelReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class ChannelReadItem(BaseModel):
     data: ChannelReadData = Field(default_factory=ChannelReadData)
@@ -1,4 +1,4 @@
-from public.jsonapi import attributes, data, item, item_list, create_relationships, Link, DataItem, DataList
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, Link, DataItem, DataList
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
@@ -39,6 +39,7 @@ class CommitReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class CommitReadItem(BaseModel):
     data: CommitReadData = Field(default_factory=CommitReadData)
@@ -1,4 +1,4 @@
-from public.jsonapi import attributes, data, item, item_list, create_relationships, Link, DataList
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, Link, DataList
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
@@ -17,6 +17,8 @@ class Ecosystem(BaseModel):
     conan_config_url: Optional[str]
     conan_config_path: Optional[str]
     conan_config_branch: Optional[str]
+    log_keep_runs: Optional[int]
+    log_retention_days: Optional[int]
     conan_credentials: List[ConanCredential] = Field(default_factory=list, alias="conan_credential_values")
 
     class Config:
@@ -27,6 +29,8 @@ class Ecosystem(BaseModel):
                 "conan_config_url": "git@github.com:uboot/conan-config.git",
                 "conan_config_path": "default",
                 "conan_config_branch": "master",
+                "log_keep_runs": 10,
+                "log_retention_days": 90,
                 "conan_credentials": [{
                     "remote": "default",
                     "username": "agent",
@@ -72,6 +76,7 @@ class EcosystemReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class EcosystemReadItem(BaseModel):
     data: EcosystemReadData = Field(default_factory=EcosystemReadData)
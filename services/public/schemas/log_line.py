@@ -1,5 +1,5 @@
 from datetime import datetime
-from public.jsonapi import attributes, data, item, item_list, PagedItemListMeta
+from public.jsonapi import attributes, data, item, item_list, resource, PagedItemListMeta
 from pydantic import BaseModel, Field
 from typing import Optional, List
 
@@ -30,6 +30,7 @@ class LogLineReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class LogLineReadItem(BaseModel):
     data: LogLineReadData = Field(default_factory=LogLineReadData)
@@ -45,3 +46,90 @@ class LogLineReadList(BaseModel):
 
     class Config:
         pass
+
+
+class LogLineBatchLine(BaseModel):
+    id: str
+    number: int
+    time: datetime
+    content: str
+
+    class Config:
+        orm_mode = True
+
+
+class LogLineBatch(BaseModel):
+    run_id: str
+    first: int
+    last: int
+    lines: List[LogLineBatchLine] = Field(default_factory=list)
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "run_id": "1",
+                "first": 10,
+                "last": 11,
+                "lines": [
+                    {"id": "1", "number": 10, "time": "2000-01-02T13:30:00", "content": "Start build..."},
+                    {"id": "2", "number": 11, "time": "2000-01-02T13:30:01", "content": "Build finished"}
+                ]
+            }
+        }
+
+    @staticmethod
+    def from_db(run_id: str, objs: list):
+        return LogLineBatch(run_id=run_id, first=objs[0].number, last=objs[-1].number, lines=objs)
+
+
+class LogSearchLine(BaseModel):
+    number: int
+    content: str
+
+
+class LogSearchMatch(LogSearchLine):
+    before: List[LogSearchLine] = Field(default_factory=list)
+    after: List[LogSearchLine] = Field(default_factory=list)
+
+
+class LogSearchResult(BaseModel):
+    run_id: str
+    matches: List[LogSearchMatch] = Field(default_factory=list)
+    truncated: bool = False
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "run_id": "1",
+                "matches": [
+                    {"number": 11, "content": "main.cpp:5:3: error: expected ';'",
+                     "before": [{"number": 10, "content": "Building main.cpp"}],
+                     "after": [{"number": 12, "content": "make: *** [all] Error 1"}]}
+                ],
+                "truncated": False
+            }
+        }
+
+
+class LogError(BaseModel):
+    number: int
+    category: str
+    content: str
+
+
+class LogErrorSummary(BaseModel):
+    run_id: str
+    count: int = 0
+    errors: List[LogError] = Field(default_factory=list)
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "run_id": "1",
+                "count": 2,
+                "errors": [
+                    {"number": 11, "category": "compiler", "content": "main.cpp:5:3: error: expected ';'"},
+                    {"number": 20, "category": "conan", "content": "ERROR: hello/1.0: Error in build() method"}
+                ]
+            }
+        }
@@ -1,4 +1,4 @@
-from public.jsonapi import attributes, data, item, item_list, create_relationships, Link, DataItem, DataList
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, Link, DataItem, DataList
 from pydantic import BaseModel, Field
 from typing import Optional
 
@@ -34,6 +34,7 @@ class PackageReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class PackageReadItem(BaseModel):
     data: PackageReadData = Field(default_factory=PackageReadData)
@@ -1,5 +1,5 @@
 from enum import Enum
-from public.jsonapi import attributes, data, item, item_list, create_relationships, Link, DataItem
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, Link, DataItem
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
@@ -69,6 +69,7 @@ class ProfileReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class ProfileReadItem(BaseModel):
     data: ProfileReadData = Field(default_factory=ProfileReadData)
@@ -1,4 +1,4 @@
-from public.jsonapi import attributes, data, item, item_list, create_relationships, Link, DataItem, DataList
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, Link, DataItem, DataList
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
@@ -40,6 +40,7 @@ class RecipeReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class RecipeReadItem(BaseModel):
     data: RecipeReadData = Field(default_factory=RecipeReadData)
@@ -86,6 +87,7 @@ class RecipeRevisionReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class RecipeRevisionReadItem(BaseModel):
     data: RecipeRevisionReadData = Field(default_factory=RecipeRevisionReadData)
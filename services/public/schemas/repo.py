@@ -1,4 +1,4 @@
-from public.jsonapi import attributes, data, item, item_list, create_relationships, Link, DataItem
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, Link, DataItem
 from public.schemas.profile import Label
 from pydantic import BaseModel, Field
 from typing import List, Optional
@@ -76,6 +76,7 @@ class RepoReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class RepoReadItem(BaseModel):
     data: RepoReadData = Field(default_factory=RepoReadData)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from public.jsonapi import attributes, data, item, item_list, create_relationships, DataItem
+from public.jsonapi import attributes, data, item, item_list, resource, create_relationships, DataItem
 from pydantic import BaseModel, Field
 from typing import Optional, List
 
@@ -43,6 +43,7 @@ class RunReadData(BaseModel):
         pass
 
 
+@resource
 @item
 class RunReadItem(BaseModel):
     data: RunReadData = Field(default_factory=RunReadData)
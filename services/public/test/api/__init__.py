@@ -1,11 +1,13 @@
 import unittest
 
+from fastapi_plugins import depends_redis
 from starlette.datastructures import FormData
 from starlette.testclient import TestClient
 
 from public.config import api_prefix
 from public.main import app
 from public.client import get_crawler, get_linux_agent, get_windows_agent, get_redis_client
+from public.crud.user import permission_cache
 from unittest.mock import Mock
 
 from sonja.database import session_scope, reset_database
@@ -16,6 +18,7 @@ crawler_mock = Mock()
 linux_agent_mock = Mock()
 windows_agent_mock = Mock()
 redis_client_mock = Mock()
+version_redis = util.FakeVersionRedis()
 
 
 def get_crawler_override():
@@ -34,10 +37,15 @@ def get_redis_client_override():
     return redis_client_mock
 
 
+async def depends_redis_override():
+    return version_redis
+
+
 app.dependency_overrides[get_crawler] = get_crawler_override
 app.dependency_overrides[get_linux_agent] = get_linux_agent_override
 app.dependency_overrides[get_windows_agent] = get_windows_agent_override
 app.dependency_overrides[get_redis_client] = get_redis_client_override
+app.dependency_overrides[depends_redis] = depends_redis_override
 
 SECRET = "0123467890abcdef0123467890abcdef"
 client = TestClient(app)
@@ -63,6 +71,7 @@ class ApiTestCase(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         reset_database()
+        permission_cache.clear()
         with session_scope() as session:
             configuration = Configuration()
             configuration.github_secret = SECRET
@@ -81,4 +90,5 @@ class ApiTestCase(unittest.TestCase):
         cls.crawler_mock = crawler_mock
         cls.linux_agent_mock = linux_agent_mock
         cls.windows_agent_mock = windows_agent_mock
-        cls.redis_client_mock = redis_client_mock
\ No newline at end of file
+        cls.redis_client_mock = redis_client_mock
+        cls.version_redis = version_redis
\ No newline at end of file
@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+
+from public.config import api_prefix
+from public.main import app
+from public.test.api import ApiTestCase
+from sonja.auth import hash_password
+from sonja.database import session_scope
+from sonja.test.util import create_user, run_create_operation
+
+client = TestClient(app)
+
+
+class TestApiToken(ApiTestCase):
+    def create_api_token(self, user_id: int, headers: dict):
+        return client.post(f"{api_prefix}/user/{user_id}/api_token", json={
+            "data": {
+                "type": "api-tokens",
+                "attributes": {
+                    "name": "CI"
+                }
+            }
+        }, headers=headers)
+
+    def test_create_api_token(self):
+        user_id = run_create_operation(create_user, {"user.user_name": "test_create_api_token"})
+        response = self.create_api_token(user_id, self.admin_headers)
+        self.assertEqual(201, response.status_code)
+        attributes = response.json()["data"]["attributes"]
+        self.assertEqual("CI", attributes["name"])
+        self.assertTrue(attributes["token"].startswith("sonja_"))
+
+        response = client.get(f"{api_prefix}/user/{user_id}/api_token", headers=self.admin_headers)
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn("token", response.json()["data"][0]["attributes"])
+
+    def test_create_api_token_for_other_user(self):
+        user_id = run_create_operation(create_user, {"user.user_name": "test_other_api_token"})
+        response = self.create_api_token(user_id, self.reader_headers)
+        self.assertEqual(403, response.status_code)
+
+    def test_login_with_api_token(self):
+        user_id = run_create_operation(create_user, {"user.user_name": "test_login_api_token"})
+        token = self.create_api_token(user_id, self.admin_headers).json()["data"]["attributes"]["token"]
+        response = client.post(f"{api_prefix}/token", data={"username": "test_login_api_token", "password": token})
+        self.assertEqual(200, response.status_code)
+        self.assertIn("access_token", response.json())
+
+        response = client.post(f"{api_prefix}/token", data={"username": "test_login_api_token",
+                                                              "password": "sonja_wrong"})
+        self.assertEqual(400, response.status_code)
+
+    def test_login_with_password_like_api_token(self):
+        with session_scope() as session:
+            user = create_user({"user.user_name": "test_login_token_password"})
+            user.password = hash_password("sonja_password")
+            session.add(user)
+
+        response = client.post(f"{api_prefix}/token", data={"username": "test_login_token_password",
+                                                              "password": "sonja_password"})
+        self.assertEqual(200, response.status_code)
+
+    def test_delete_api_token(self):
+        user_id = run_create_operation(create_user, {"user.user_name": "test_delete_api_token"})
+        response = self.create_api_token(user_id, self.admin_headers)
+        api_token_id = response.json()["data"]["id"]
+        token = response.json()["data"]["attributes"]["token"]
+
+        response = client.delete(f"{api_prefix}/api_token/{api_token_id}", headers=self.admin_headers)
+        self.assertEqual(200, response.status_code)
+        response = client.post(f"{api_prefix}/token", data={"username": "test_delete_api_token", "password": token})
+        self.assertEqual(400, response.status_code)
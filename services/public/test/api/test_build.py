@@ -36,6 +36,7 @@ class TestBuild(ApiTestCase):
         attributes = response.json()["data"]["attributes"]
         self.assertEqual("stopping", attributes["status"])
         self.redis_client_mock.publish_build_update.assert_called_once()
+        self.redis_client_mock.publish_build_cancel.assert_called_once()
 
     def test_patch_stop_new_build(self):
         build_id = run_create_operation(create_build, {"build.status": BuildStatus.new})
@@ -51,6 +52,7 @@ class TestBuild(ApiTestCase):
         attributes = response.json()["data"]["attributes"]
         self.assertEqual("stopped", attributes["status"])
         self.redis_client_mock.publish_build_update.assert_called_once()
+        self.redis_client_mock.publish_build_cancel.assert_not_called()
 
     def test_patch_start_active_build(self):
         build_id = run_create_operation(create_build, {"build.status": BuildStatus.active})
@@ -93,6 +95,22 @@ class TestBuild(ApiTestCase):
         attributes = response.json()["data"]["attributes"]
         self.assertEqual("new", attributes["status"])
 
+    def test_get_build_include(self):
+        build_id = run_create_operation(create_build, dict())
+        response = client.get(f"{api_prefix}/build/{build_id}?include=commit.repo,profile"
+                              f"&fields[builds]=status,commit&fields[repos]=url", headers=self.reader_headers)
+        self.assertEqual(200, response.status_code)
+        data = response.json()["data"]
+        self.assertEqual(["status"], list(data["attributes"].keys()))
+        self.assertEqual(["commit"], list(data["relationships"].keys()))
+        included = response.json()["included"]
+        self.assertEqual(["commits", "repos", "profiles"], [r["type"] for r in included])
+        self.assertEqual(["url"], list(included[1]["attributes"].keys()))
+
+    def test_get_build_include_unknown_relationship(self):
+        response = client.get(f"{api_prefix}/build?ecosystem_id=1&include=runs", headers=self.reader_headers)
+        self.assertEqual(400, response.status_code)
+
     def test_get_build_list(self):
         response = client.get(f"{api_prefix}/build?ecosystem_id=1", headers=self.reader_headers)
         self.assertEqual(200, response.status_code)
@@ -3,6 +3,7 @@ from fastapi.testclient import TestClient
 from public.config import api_prefix
 from public.main import app
 from public.test.api import ApiTestCase
+from unittest.mock import patch
 from sonja.test.util import create_channel, create_ecosystem, create_profile, run_create_operation
 
 client = TestClient(app)
@@ -14,6 +15,19 @@ class TestEcosystem(ApiTestCase):
         response = client.get(f"{api_prefix}/ecosystem", headers=self.reader_headers)
         self.assertEqual(200, response.status_code)
 
+    def test_get_ecosystems_not_modified(self):
+        response = client.get(f"{api_prefix}/ecosystem", headers=self.reader_headers)
+        etag = response.headers["ETag"]
+        response = client.get(f"{api_prefix}/ecosystem", headers={"If-None-Match": etag, **self.reader_headers})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b"", response.content)
+
+        with patch("sonja.redis.bump_versions", self.version_redis.bump_versions):
+            run_create_operation(create_ecosystem, dict())
+        response = client.get(f"{api_prefix}/ecosystem", headers={"If-None-Match": etag, **self.reader_headers})
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers["ETag"])
+
     def test_get_ecosystem(self):
         ecosystem_id = run_create_operation(create_ecosystem, dict())
         run_create_operation(create_profile, dict(), ecosystem_id)
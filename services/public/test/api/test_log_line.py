@@ -1,9 +1,17 @@
 from fastapi.testclient import TestClient
 
+from public.api.log_line import stream_log_lines
 from public.config import api_prefix
 from public.main import app
 from public.test.api import ApiTestCase
-from sonja.test.util import create_log_line, run_create_operation
+from public.test.test_hub import FakeRedis
+from sonja.async_database import async_engine
+from sonja.database import session_scope
+from sonja.model import Run
+from sonja.test.util import create_log_line, create_run, run_create_operation
+
+import asyncio
+import json
 
 client = TestClient(app)
 
@@ -23,3 +31,136 @@ class TestLog(ApiTestCase):
         log_line_id = run_create_operation(create_log_line, dict())
         response = client.get(f"{api_prefix}/log_line/{log_line_id}", headers=self.reader_headers)
         self.assertEqual(200, response.status_code)
+
+    def test_replay_missed_log_lines(self):
+        run_id = run_create_operation(create_run, dict())
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=run_id).first()
+            for number in range(1, 6):
+                log_line = create_log_line(dict())
+                log_line.number = number
+                run.log_lines.append(log_line)
+        redis = FakeRedis()
+
+        async def receive():
+            events = stream_log_lines(str(run_id), redis, 2)
+            replayed = await events.__anext__()
+            redis.publish(f"run:{run_id}", {"type": "log_lines", "run_id": run_id, "first": 5, "last": 5})
+            redis.publish(f"run:{run_id}", {"type": "log_lines", "run_id": run_id, "first": 6, "last": 6,
+                                            "lines": [{"id": 100, "number": 6, "time": "2000-01-02T13:50:00",
+                                                       "content": "Build finished"}]})
+            live = await events.__anext__()
+            await events.aclose()
+            await async_engine.dispose()
+            return replayed, live
+
+        replayed, live = asyncio.run(receive())
+        self.assertEqual("5", replayed["id"])
+        self.assertEqual([3, 4, 5], [line["number"] for line in json.loads(replayed["data"])["lines"]])
+        self.assertEqual("6", live["id"])
+        self.assertEqual("Build finished", json.loads(live["data"])["lines"][0]["content"])
+
+    def test_skip_replayed_lines_of_live_batch(self):
+        run_id = self.create_run_with_lines(5)
+        redis = FakeRedis()
+
+        async def receive():
+            events = stream_log_lines(str(run_id), redis, 2)
+            replayed = await events.__anext__()
+            redis.publish(f"run:{run_id}", {"type": "log_lines", "run_id": run_id, "first": 4, "last": 6,
+                                            "lines": [{"id": 100 + number, "number": number,
+                                                       "time": "2000-01-02T13:50:00", "content": f"line {number}"}
+                                                      for number in range(4, 7)]})
+            live = await events.__anext__()
+            await events.aclose()
+            await async_engine.dispose()
+            return replayed, live
+
+        replayed, live = asyncio.run(receive())
+        self.assertEqual("5", replayed["id"])
+        self.assertEqual("6", live["id"])
+        batch = json.loads(live["data"])
+        self.assertEqual(6, batch["first"])
+        self.assertEqual([6], [line["number"] for line in batch["lines"]])
+
+    def create_run_with_lines(self, count: int) -> int:
+        run_id = run_create_operation(create_run, dict())
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=run_id).first()
+            for number in range(1, count + 1):
+                log_line = create_log_line(dict())
+                log_line.number = number
+                log_line.content = f"line {number}"
+                run.log_lines.append(log_line)
+        return run_id
+
+    def test_get_log_text(self):
+        run_id = self.create_run_with_lines(3)
+        response = client.get(f"{api_prefix}/run/{run_id}/log.txt", headers=self.reader_headers)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("line 1\nline 2\nline 3\n", response.text)
+        self.assertEqual("bytes, lines", response.headers["Accept-Ranges"])
+
+    def test_get_log_text_of_unknown_run(self):
+        response = client.get(f"{api_prefix}/run/1000/log.txt", headers=self.reader_headers)
+        self.assertEqual(404, response.status_code)
+
+    def test_get_log_text_tail(self):
+        run_id = self.create_run_with_lines(5)
+        response = client.get(f"{api_prefix}/run/{run_id}/log.txt?tail=2", headers=self.reader_headers)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("line 4\nline 5\n", response.text)
+
+    def test_get_log_text_line_range(self):
+        run_id = self.create_run_with_lines(5)
+        response = client.get(f"{api_prefix}/run/{run_id}/log.txt",
+                              headers={**self.reader_headers, "Range": "lines=2-3"})
+        self.assertEqual(206, response.status_code)
+        self.assertEqual("line 2\nline 3\n", response.text)
+        self.assertEqual("lines 2-3/5", response.headers["Content-Range"])
+
+    def test_get_log_text_byte_range(self):
+        run_id = self.create_run_with_lines(3)
+        response = client.get(f"{api_prefix}/run/{run_id}/log.txt",
+                              headers={**self.reader_headers, "Range": "bytes=14-"})
+        self.assertEqual(206, response.status_code)
+        self.assertEqual("line 3\n", response.text)
+        self.assertEqual("bytes 14-20/21", response.headers["Content-Range"])
+
+    def test_get_log_text_unsatisfiable_range(self):
+        run_id = self.create_run_with_lines(3)
+        response = client.get(f"{api_prefix}/run/{run_id}/log.txt",
+                              headers={**self.reader_headers, "Range": "lines=10-"})
+        self.assertEqual(416, response.status_code)
+        self.assertEqual("lines */3", response.headers["Content-Range"])
+
+    def test_get_log_text_tail_with_range(self):
+        run_id = self.create_run_with_lines(3)
+        response = client.get(f"{api_prefix}/run/{run_id}/log.txt?tail=1",
+                              headers={**self.reader_headers, "Range": "lines=1-2"})
+        self.assertEqual(400, response.status_code)
+
+    def test_search_log(self):
+        run_id = self.create_run_with_lines(5)
+        response = client.get(f"{api_prefix}/run/{run_id}/log/search?query=line%20[24]&regex=true&context=1",
+                              headers=self.reader_headers)
+        self.assertEqual(200, response.status_code)
+        matches = response.json()["matches"]
+        self.assertEqual([2, 4], [match["number"] for match in matches])
+        self.assertEqual([{"number": 1, "content": "line 1"}], matches[0]["before"])
+
+    def test_search_log_with_invalid_regex(self):
+        run_id = self.create_run_with_lines(1)
+        response = client.get(f"{api_prefix}/run/{run_id}/log/search?query=(&regex=true",
+                              headers=self.reader_headers)
+        self.assertEqual(400, response.status_code)
+
+    def test_get_log_errors(self):
+        run_id = run_create_operation(create_run, dict())
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=run_id).first()
+            run.error_summary = '{"count": 1, "errors": [{"number": 3, "category": "conan", "content": "ERROR: x"}]}'
+        response = client.get(f"{api_prefix}/run/{run_id}/log/errors", headers=self.reader_headers)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, response.json()["count"])
+        self.assertEqual("conan", response.json()["errors"][0]["category"])
@@ -55,6 +55,24 @@ class TestUser(ApiTestCase):
         self.assertEqual("First", attributes["first_name"])
         self.assertEqual("read", attributes["permissions"][0]["permission"])
 
+    def test_patch_user_permissions(self):
+        user_id = run_create_operation(create_user, {"user.user_name": "test_update_permissions"})
+        response = client.post(f"{api_prefix}/token", data={"username": "test_update_permissions",
+                                                              "password": "password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        self.assertEqual(200, client.get(f"{api_prefix}/user/me", headers=headers).status_code)
+
+        response = client.patch(f"{api_prefix}/user/{user_id}", json={
+            "data": {
+                "type": "users",
+                "attributes": {
+                    "permissions": []
+                }
+            }
+        }, headers=self.admin_headers)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(403, client.get(f"{api_prefix}/user/me", headers=headers).status_code)
+
     def test_patch_my_user(self):
         response = client.patch(f"{api_prefix}/user/3", json={
             "data": {
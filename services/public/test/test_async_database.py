@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+from public.crud.build import read_build, read_build_async, read_builds_async
+from public.crud.commit import read_commit_async
+from public.crud.log_line import read_log_line_partitions_async, read_log_lines_async
+from public.crud.run import read_run, read_run_async, read_runs_async
+from public.schemas.build import BuildReadItem
+from sonja.async_database import AsyncSessionLocal, async_engine
+from sonja.database import reset_database, session_scope
+from sonja.test import util
+
+import asyncio
+import unittest
+
+# the default size of the thread pool which runs the sync endpoints of FastAPI
+THREAD_POOL_SIZE = 40
+CONCURRENT_REQUESTS = 200
+
+
+class TestAsyncDatabase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        reset_database()
+        cls.ecosystem_id = util.run_create_operation(util.create_ecosystem, dict())
+        cls.run_id = util.run_create_operation(util.create_run, {"build.with_missing": True}, cls.ecosystem_id)
+        with session_scope() as session:
+            run = read_run(session, cls.run_id)
+            run.log_lines = [util.create_log_line(dict())]
+            cls.build_id = run.build_id
+
+    def run_async(self, coroutine):
+        async def run_and_dispose():
+            try:
+                return await coroutine
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(run_and_dispose())
+
+    def test_read_build(self):
+        async def read():
+            async with AsyncSessionLocal() as session:
+                return await read_build_async(session, self.build_id)
+
+        build = self.run_async(read())
+        self.assertEqual(self.build_id, build.id)
+        self.assertIsNotNone(build.commit_id)
+        self.assertEqual(1, len(build.missing_packages))
+        self.assertEqual(1, len(build.missing_recipes))
+        self.assertEqual(str(build.commit_id),
+                         BuildReadItem.serialize(build)["data"]["relationships"]["commit"]["data"]["id"])
+
+    def test_read_builds_paged(self):
+        async def read():
+            async with AsyncSessionLocal() as session:
+                return await read_builds_async(session, str(self.ecosystem_id), page=1, per_page=10)
+
+        builds = self.run_async(read())
+        self.assertEqual(1, builds["total_pages"])
+        self.assertEqual(self.build_id, builds["objs"][0].id)
+
+    def test_read_runs(self):
+        async def read():
+            async with AsyncSessionLocal() as session:
+                return await read_runs_async(session, self.build_id)
+
+        runs = self.run_async(read())
+        self.assertEqual(self.run_id, runs[0].id)
+        self.assertEqual(self.build_id, runs[0].build_id)
+
+    def test_read_commit(self):
+        async def read():
+            async with AsyncSessionLocal() as session:
+                build = await read_build_async(session, self.build_id)
+                return await read_commit_async(session, build.commit_id)
+
+        commit = self.run_async(read())
+        self.assertEqual(self.build_id, commit.builds[0].id)
+        self.assertIsNotNone(commit.repo_id)
+
+    def test_read_log_lines_paged(self):
+        async def read():
+            async with AsyncSessionLocal() as session:
+                return await read_log_lines_async(session, str(self.run_id), page=1, per_page=10)
+
+        log_lines = self.run_async(read())
+        self.assertEqual(1, log_lines["total_pages"])
+        self.assertEqual(1, len(log_lines["objs"]))
+
+    def test_read_log_line_partitions(self):
+        async def read():
+            async with AsyncSessionLocal() as session:
+                return [partition async for partition in read_log_line_partitions_async(session, str(self.run_id), 10)]
+
+        partitions = self.run_async(read())
+        self.assertEqual(1, len(partitions))
+        self.assertEqual(1, len(partitions[0]))
+
+    def test_concurrent_reads(self):
+        """The async path serves more concurrent requests than the thread pool of the sync path has threads and
+        returns the same results."""
+        def read_sync(_):
+            with session_scope() as session:
+                return read_build(session, self.build_id).commit_id, read_run(session, self.run_id).id
+
+        with ThreadPoolExecutor(THREAD_POOL_SIZE) as executor:
+            sync_results = list(executor.map(read_sync, range(CONCURRENT_REQUESTS)))
+
+        active = 0
+        max_active = 0
+
+        async def read_async():
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            try:
+                async with AsyncSessionLocal() as session:
+                    build = await read_build_async(session, self.build_id)
+                    run = await read_run_async(session, self.run_id)
+                    return build.commit_id, run.id
+            finally:
+                active -= 1
+
+        async def read_all_async():
+            return await asyncio.gather(*(read_async() for _ in range(CONCURRENT_REQUESTS)))
+
+        async_results = self.run_async(read_all_async())
+
+        self.assertEqual(sync_results, async_results)
+        self.assertGreater(max_active, THREAD_POOL_SIZE)
@@ -0,0 +1,39 @@
+from public.compression import CompressionMiddleware
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import unittest
+
+
+def large(request):
+    return PlainTextResponse("x" * 10000)
+
+
+def small(request):
+    return PlainTextResponse("x")
+
+
+app = Starlette(routes=[Route("/large", large), Route("/small", small), Route("/event/large", large)])
+app.add_middleware(CompressionMiddleware, event_prefix="/event/", minimum_size=1024)
+client = TestClient(app)
+
+
+class TestCompression(unittest.TestCase):
+    def test_compress_large_response(self):
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual("gzip", response.headers["Content-Encoding"])
+        self.assertEqual("x" * 10000, response.text)
+
+    def test_do_not_compress_small_response(self):
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_do_not_compress_events(self):
+        response = client.get("/event/large", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    def test_do_not_compress_ranges(self):
+        response = client.get("/large", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-"})
+        self.assertNotIn("Content-Encoding", response.headers)
@@ -0,0 +1,95 @@
+from public.etag import etag, get_etag, get_included_versions, matches, read_versions, NotModified
+from sonja.redis import VERSION_KEY
+from sonja.test.util import FakeVersionRedis
+from unittest.mock import Mock
+import asyncio
+# registers the resources of builds which are needed to resolve the included resources
+import public.schemas.build  # noqa: F401
+import unittest
+
+
+class FailingRedis(object):
+    async def mget(self, *keys):
+        raise ConnectionError()
+
+
+class TestEtag(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeVersionRedis()
+
+    def get_etag(self, if_none_match=None, redis=None):
+        request = Mock()
+        request.url = "http://localhost/api/v1/ecosystem"
+        response = Mock()
+        response.headers = dict()
+        dependency = etag("ecosystems", "profiles")
+        tag = asyncio.run(dependency(request, response, if_none_match, redis or self.redis))
+        return tag, response.headers
+
+    def get_build_etag(self, if_none_match=None, include=None):
+        request = Mock()
+        request.url = "http://localhost/api/v1/build"
+        response = Mock()
+        response.headers = dict()
+        dependency = etag("builds", type_="builds")
+        return asyncio.run(dependency(request, response, if_none_match, self.redis, include))
+
+    def test_read_versions_initializes_missing_versions(self):
+        self.redis.values[VERSION_KEY.format("repos")] = b"3"
+        versions = asyncio.run(read_versions(self.redis, ["repos", "builds"]))
+        self.assertEqual(3, versions[0])
+        self.assertGreater(versions[1], 1000000)
+        self.assertEqual(versions, asyncio.run(read_versions(self.redis, ["repos", "builds"])))
+
+    def test_read_versions_without_redis(self):
+        self.assertIsNone(asyncio.run(read_versions(FailingRedis(), ["repos"])))
+
+    def test_get_etag(self):
+        self.assertEqual(get_etag([1, 2], "/ecosystem"), get_etag([1, 2], "/ecosystem"))
+        self.assertNotEqual(get_etag([1, 2], "/ecosystem"), get_etag([1, 3], "/ecosystem"))
+        self.assertNotEqual(get_etag([1, 2], "/ecosystem"), get_etag([1, 2], "/ecosystem?page=2"))
+        self.assertTrue(get_etag([1], "/ecosystem").startswith('W/"'))
+
+    def test_matches(self):
+        self.assertTrue(matches('W/"a"', 'W/"b", W/"a"'))
+        self.assertTrue(matches('W/"a"', '*'))
+        self.assertFalse(matches('W/"a"', 'W/"b"'))
+        self.assertFalse(matches('W/"a"', None))
+
+    def test_etag_header(self):
+        tag, headers = self.get_etag()
+        self.assertEqual({"ETag": tag.value}, headers)
+        self.assertEqual(headers, tag.headers)
+
+    def test_not_modified(self):
+        tag, _ = self.get_etag()
+        with self.assertRaises(NotModified) as context:
+            self.get_etag(tag.value)
+        self.assertEqual(tag.value, context.exception.etag)
+
+    def test_modified_after_bump(self):
+        tag, _ = self.get_etag()
+        self.redis.bump_versions(["profiles"])
+        new_tag, _ = self.get_etag(tag.value)
+        self.assertNotEqual(tag.value, new_tag.value)
+
+    def test_no_etag_without_redis(self):
+        tag, headers = self.get_etag(redis=FailingRedis())
+        self.assertIsNone(tag.value)
+        self.assertEqual(dict(), headers)
+
+    def test_get_included_versions(self):
+        self.assertEqual(["profiles", "recipes"], get_included_versions("builds", "profile,package,missing_recipes"))
+        self.assertIsNone(get_included_versions("builds", "unknown"))
+
+    def test_modified_after_bump_of_included_resource(self):
+        tag = self.get_build_etag(include="commit")
+        self.redis.bump_versions(["commits"])
+        new_tag = self.get_build_etag(tag.value, include="commit")
+        self.assertNotEqual(tag.value, new_tag.value)
+
+    def test_not_modified_with_included_resource(self):
+        tag = self.get_build_etag(include="commit")
+        self.redis.bump_versions(["repos"])
+        with self.assertRaises(NotModified):
+            self.get_build_etag(tag.value, include="commit")
@@ -0,0 +1,150 @@
+from public.hub import EventHub
+from json import dumps
+import asyncio
+import unittest
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.channels = dict()
+        self.subscribe_count = 0
+        self.unsubscribe_count = 0
+
+    async def subscribe(self, channel):
+        self.subscribe_count += 1
+        self.channels[channel.name.decode()] = channel
+        return [channel]
+
+    async def unsubscribe(self, channel: str):
+        self.unsubscribe_count += 1
+        self.channels.pop(channel).close()
+
+    def publish(self, channel: str, message: dict):
+        self.channels[channel].put_nowait(dumps(message).encode())
+
+
+class TestEventHub(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.loaded = []
+
+    async def load(self, message: dict):
+        self.loaded.append(message["id"])
+        return {"event": "update", "data": dumps({"data": {"id": message["id"]}})}
+
+    async def receive(self, events, count: int):
+        return [await events.__anext__() for _ in range(count)]
+
+    def test_subscribe_once_per_channel(self):
+        hub = EventHub()
+
+        async def run():
+            first = hub.subscribe("general", self.redis, self.load)
+            second = hub.subscribe("general", self.redis, self.load)
+            first_events = asyncio.create_task(self.receive(first, 2))
+            second_events = asyncio.create_task(self.receive(second, 2))
+            await asyncio.sleep(0.01)
+            self.assertEqual(2, hub.client_count("general"))
+            self.redis.publish("general", {"id": 1, "type": "build"})
+            self.redis.publish("general", {"id": 2, "type": "build"})
+            result = await first_events, await second_events
+            await first.aclose()
+            await second.aclose()
+            return result
+
+        first_events, second_events = asyncio.run(run())
+        self.assertEqual(1, self.redis.subscribe_count)
+        self.assertEqual([1, 2], self.loaded)
+        self.assertEqual(first_events, second_events)
+        self.assertEqual({"event": "update", "data": '{"data": {"id": 1}}'}, first_events[0])
+
+    def test_unsubscribe_after_last_client(self):
+        hub = EventHub()
+
+        async def run():
+            events = hub.subscribe("run:1", self.redis, self.load)
+            receive = asyncio.create_task(self.receive(events, 1))
+            await asyncio.sleep(0.01)
+            self.redis.publish("run:1", {"id": 1, "type": "log_line"})
+            await receive
+            await events.aclose()
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        self.assertEqual(0, hub.client_count("run:1"))
+        self.assertEqual(1, self.redis.unsubscribe_count)
+
+    def test_disconnect_slow_client(self):
+        hub = EventHub(queue_size=2)
+
+        async def run():
+            slow = hub.subscribe("general", self.redis, self.load)
+            fast = hub.subscribe("general", self.redis, self.load)
+            first_slow_event = asyncio.create_task(slow.__anext__())
+            fast_events = asyncio.create_task(self.receive(fast, 4))
+            await asyncio.sleep(0.01)
+            self.redis.publish("general", {"id": 0, "type": "build"})
+            await first_slow_event
+            for i in range(1, 4):
+                self.redis.publish("general", {"id": i, "type": "build"})
+                await asyncio.sleep(0.01)
+            await fast_events
+            remaining_slow_events = [event async for event in slow]
+            await fast.aclose()
+            return remaining_slow_events
+
+        remaining_slow_events = asyncio.run(run())
+        self.assertEqual([], remaining_slow_events)
+
+    def test_skip_failing_load(self):
+        hub = EventHub()
+
+        async def load(message: dict):
+            if message["id"] == 1:
+                raise RuntimeError("failed")
+            return {"event": "update", "data": dumps(message)}
+
+        async def run():
+            events = hub.subscribe("general", self.redis, load)
+            receive = asyncio.create_task(self.receive(events, 1))
+            await asyncio.sleep(0.01)
+            self.redis.publish("general", {"id": 1, "type": "build"})
+            self.redis.publish("general", {"id": 2, "type": "build"})
+            result = await receive
+            await events.aclose()
+            return result
+
+        self.assertEqual('{"id": 2, "type": "build"}', asyncio.run(run())[0]["data"])
+
+    def test_close_clients_if_subscription_ends(self):
+        hub = EventHub()
+
+        async def run():
+            events = hub.subscribe("general", self.redis, self.load)
+            receive = asyncio.create_task(self.receive(events, 1))
+            await asyncio.sleep(0.01)
+            self.redis.publish("general", {"id": 1, "type": "build"})
+            await receive
+            self.redis.channels["general"].close()
+            return [event async for event in events]
+
+        self.assertEqual([], asyncio.run(run()))
+        self.assertEqual(0, hub.client_count("general"))
+
+    def test_replay_before_live_events(self):
+        hub = EventHub()
+
+        async def replay():
+            await asyncio.sleep(0.01)
+            self.redis.publish("run:1", {"id": 2, "type": "log_line"})
+            yield {"event": "update", "data": "replayed"}
+
+        async def run():
+            events = hub.subscribe("run:1", self.redis, self.load, replay)
+            result = await self.receive(events, 2)
+            await events.aclose()
+            return result
+
+        replayed, live = asyncio.run(run())
+        self.assertEqual("replayed", replayed["data"])
+        self.assertEqual('{"data": {"id": 2}}', live["data"])
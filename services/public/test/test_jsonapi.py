@@ -1,6 +1,12 @@
-from public.jsonapi import attributes, create_relationships, DataItem, DataList, data, item, item_list, Link
+from public.jsonapi import attributes, check_include, create_relationships, DataItem, DataList, data, from_event, \
+    get_load_paths, item, item_list, Link, parse_fields, parse_include, resource
 from pydantic import BaseModel, Field
+from sonja.config import logger
 from typing import List, Optional
+from unittest.mock import patch
+import asyncio
+import json
+import time
 import unittest
 
 
@@ -36,6 +42,7 @@ class UserData(BaseModel):
         pass
 
 
+@resource
 @item
 class UserItem(BaseModel):
     data: UserData = Field(default_factory=UserData)
@@ -52,8 +59,47 @@ class UserList(BaseModel):
         pass
 
 
+@attributes
+class Company(BaseModel):
+    name: Optional[str]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "name": "Acme"
+            }
+        }
+
+
+company_relationships = create_relationships("CompanyRelationships", [
+    DataList("employees", "users")
+])
+
+
+@data
+class CompanyData(BaseModel):
+    id: Optional[str]
+    type: str = "companies"
+    attributes: Company = Field(default_factory=Company)
+    relationships: company_relationships = Field(default_factory=company_relationships)
+
+    class Config:
+        pass
+
+
+@resource
+@item
+class CompanyItem(BaseModel):
+    data: CompanyData = Field(default_factory=CompanyData)
+
+    class Config:
+        pass
+
+
 class CompanyModel:
     id = 1
+    name = "Acme"
+    employees = []
 
 
 class HobbyModel:
@@ -140,3 +186,109 @@ class TestJsonapi(unittest.TestCase):
                                                           'hobbies': {'data': [{'id': '3', 'type': 'hobbies'},
                                                                                {'id': '4', 'type': 'hobbies'}]}
                                                          }}]}, user_list.dict())
+
+    def test_item_from_event(self):
+        user_model = UserModel(id_ = 2, user_id = "user", name = "Joe", company = CompanyModel(),
+                               hobbies = [HobbyModel(3), HobbyModel(4)])
+        user_event = from_event({"id": 2, "user_id": "user", "name": "Joe", "company": {"id": 1},
+                                 "hobbies": [{"id": 3}, {"id": 4}]})
+        self.assertDictEqual(UserItem.from_db(user_model).dict(), UserItem.from_db(user_event).dict())
+
+    def test_serialize_item(self):
+        user_model = UserModel(id_ = 2, user_id = "user", name = "Joe", company = CompanyModel(),
+                               hobbies = [HobbyModel(3), HobbyModel(4)])
+        self.assertEqual(UserItem.from_db(user_model).json(), json.dumps(UserItem.serialize(user_model)))
+
+    def test_serialize_item_empty_relationship(self):
+        user_model = UserModel(id_ = 2, user_id = "user", name = None, company = None, hobbies = [])
+        self.assertEqual(UserItem.from_db(user_model).json(), json.dumps(UserItem.serialize(user_model)))
+
+    def test_serialize_list(self):
+        user_models = [UserModel(id_ = i, user_id = f"user{i}", name = "Joe", company = CompanyModel(),
+                                 hobbies = [HobbyModel(3)]) for i in range(3)]
+        self.assertEqual(UserList.from_db(user_models).json(), json.dumps(UserList.serialize(user_models)))
+
+    def test_serialize_benchmark(self):
+        user_models = [UserModel(id_ = i, user_id = f"user{i}", name = "Joe", company = CompanyModel(),
+                                 hobbies = [HobbyModel(3), HobbyModel(4)]) for i in range(500)]
+
+        start = time.perf_counter()
+        validated = UserList.from_db(user_models).json()
+        validated_duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        serialized = json.dumps(UserList.serialize(user_models))
+        serialized_duration = time.perf_counter() - start
+
+        logger.info("Serialize 500 items: %.1f ms with validation, %.1f ms precompiled",
+                    validated_duration * 1000, serialized_duration * 1000)
+        self.assertEqual(validated, serialized)
+        self.assertLess(serialized_duration, validated_duration)
+
+    def test_parse_fields(self):
+        query_params = {"fields[users]": "name", "fields[companies]": "name,employees", "page": "1"}
+        self.assertDictEqual({"users": {"name"}, "companies": {"name", "employees"}}, parse_fields(query_params))
+        self.assertIsNone(parse_fields({"page": "1"}))
+
+    def test_parse_include(self):
+        self.assertEqual([["company"], ["company", "employees"]], parse_include("company,company.employees"))
+        self.assertIsNone(parse_include(""))
+
+    def test_check_include(self):
+        check_include("users", [["company", "employees"]])
+        self.assertRaises(ValueError, check_include, "users", [["employer"]])
+        self.assertRaises(ValueError, check_include, "users", [["friends"]])
+        self.assertRaises(ValueError, check_include, "users", [["hobbies"]])
+
+    def test_get_load_paths(self):
+        self.assertEqual([["company", "employees"], ["company"]], get_load_paths("users", [["company"]]))
+
+    def test_serialize_sparse_fieldsets(self):
+        user_model = UserModel(id_ = 2, user_id = "user", name = "Joe", company = CompanyModel(),
+                               hobbies = [HobbyModel(3)])
+        self.assertDictEqual({"data": {"id": "2", "type": "users", "attributes": {"name": "Joe"},
+                                       "relationships": {"company": {"data": {"id": "1", "type": "companies"}}}}},
+                             UserItem.serialize(user_model, fields={"users": {"name", "company"}}))
+
+    def test_serialize_included(self):
+        company = CompanyModel()
+        user_models = [UserModel(id_ = i, user_id = f"user{i}", name = "Joe", company = company, hobbies = [])
+                       for i in range(3)]
+        company.employees = user_models
+        document = UserList.serialize(user_models, fields={"companies": {"name"}}, include=[["company"]])
+        self.assertEqual([{"id": "1", "type": "companies", "attributes": {"name": "Acme"}, "relationships": {}}],
+                         document["included"])
+
+    def test_serialize_included_nested(self):
+        company = CompanyModel()
+        user_model = UserModel(id_ = 2, user_id = "user", name = "Joe", company = company, hobbies = [])
+        colleague = UserModel(id_ = 3, user_id = "colleague", name = "Jane", company = company, hobbies = [])
+        company.employees = [user_model, colleague]
+        document = UserItem.serialize(user_model, fields={"users": {"name"}}, include=[["company", "employees"]])
+        self.assertEqual([("companies", "1"), ("users", "3")], [(r["type"], r["id"]) for r in document["included"]])
+        self.assertDictEqual({"name": "Jane"}, document["included"][1]["attributes"])
+
+    def test_stream(self):
+        user_models = [UserModel(id_ = i, user_id = f"user{i}", name = "Jöe", company = CompanyModel(),
+                                 hobbies = [HobbyModel(3)]) for i in range(5)]
+        with patch("public.jsonapi.STREAM_CHUNK_SIZE", 2):
+            chunks = list(UserList.stream(iter(user_models)))
+        self.assertEqual(5, len(chunks))
+        self.assertEqual(UserList.serialize(user_models), json.loads("".join(chunks)))
+
+    def test_stream_empty(self):
+        self.assertEqual({"data": []}, json.loads("".join(UserList.stream([]))))
+
+    def test_stream_async(self):
+        user_models = [UserModel(id_ = i, user_id = f"user{i}", name = "Joe", company = None, hobbies = [])
+                       for i in range(5)]
+
+        async def partitions():
+            yield user_models[:3]
+            yield user_models[3:]
+
+        async def read():
+            return [chunk async for chunk in UserList.stream_async(partitions(), {"users": {"name"}})]
+
+        document = json.loads("".join(asyncio.run(read())))
+        self.assertEqual(UserList.serialize(user_models, fields={"users": {"name"}}), document)
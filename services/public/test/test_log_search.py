@@ -0,0 +1,39 @@
+from public.log_search import create_matcher, search_lines
+from public.test.test_log_text import create_lines, partitions
+
+import asyncio
+import unittest
+
+
+class TestLogSearch(unittest.TestCase):
+    def setUp(self):
+        self.log_lines = create_lines("start", "error: one", "middle", b"error: two", "end")
+
+    def search(self, query, regex=False, context=0, limit=10):
+        return asyncio.run(search_lines(partitions(self.log_lines), create_matcher(query, regex), context, limit))
+
+    def test_search_substring(self):
+        results, truncated = self.search("error")
+        self.assertEqual([2, 4], [result["number"] for result in results])
+        self.assertEqual("error: two", results[1]["content"])
+        self.assertFalse(truncated)
+
+    def test_search_regex(self):
+        results, _ = self.search(r"^e.*o$", regex=True)
+        self.assertEqual([4], [result["number"] for result in results])
+
+    def test_search_with_context(self):
+        results, _ = self.search("error", context=1)
+        self.assertEqual([1], [line["number"] for line in results[0]["before"]])
+        self.assertEqual([3], [line["number"] for line in results[0]["after"]])
+        self.assertEqual([3], [line["number"] for line in results[1]["before"]])
+        self.assertEqual([5], [line["number"] for line in results[1]["after"]])
+
+    def test_search_with_limit(self):
+        results, truncated = self.search("error", limit=1)
+        self.assertEqual([2], [result["number"] for result in results])
+        self.assertTrue(truncated)
+
+    def test_invalid_regex(self):
+        with self.assertRaises(ValueError):
+            create_matcher("(", True)
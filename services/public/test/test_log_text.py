@@ -0,0 +1,62 @@
+from public.log_text import RangeNotSatisfiable, format_lines, parse_range, read_byte_range, read_byte_suffix
+from types import SimpleNamespace
+
+import asyncio
+import unittest
+
+
+def create_lines(*contents):
+    return [SimpleNamespace(number=number, content=content) for number, content in enumerate(contents, 1)]
+
+
+async def partitions(log_lines, size=2):
+    for start in range(0, len(log_lines), size):
+        yield log_lines[start:start + size]
+
+
+class TestLogText(unittest.TestCase):
+    def setUp(self):
+        # "line 1\n" has 7 bytes, the encoded text has 21 bytes
+        self.log_lines = create_lines("line 1", b"line 2", "line 3")
+
+    def test_parse_range(self):
+        log_range = parse_range("lines=10-20")
+        self.assertEqual(("lines", 10, 20), (log_range.unit, log_range.first, log_range.last))
+        log_range = parse_range("bytes=100-")
+        self.assertEqual(("bytes", 100, None), (log_range.unit, log_range.first, log_range.last))
+        log_range = parse_range("lines=-5")
+        self.assertTrue(log_range.is_suffix)
+        self.assertEqual(5, log_range.last)
+
+    def test_parse_invalid_range(self):
+        for header in ["items=1-2", "bytes=-", "bytes=5-1", "bytes=-0", "bytes=1-2,4-5"]:
+            with self.assertRaises(ValueError):
+                parse_range(header)
+
+    def test_format_lines(self):
+        self.assertEqual(b"line 1\nline 2\nline 3\n", format_lines(self.log_lines))
+
+    def test_read_byte_range(self):
+        body, content_range = asyncio.run(read_byte_range(partitions(self.log_lines), 5, 9))
+        self.assertEqual(b"1\nlin", body)
+        self.assertEqual("bytes 5-9/*", content_range)
+
+    def test_read_open_byte_range(self):
+        body, content_range = asyncio.run(read_byte_range(partitions(self.log_lines), 14, None))
+        self.assertEqual(b"line 3\n", body)
+        self.assertEqual("bytes 14-20/21", content_range)
+
+    def test_read_unsatisfiable_byte_range(self):
+        with self.assertRaises(RangeNotSatisfiable) as context:
+            asyncio.run(read_byte_range(partitions(self.log_lines), 21, None))
+        self.assertEqual("bytes */21", context.exception.content_range)
+
+    def test_read_byte_suffix(self):
+        body, content_range = asyncio.run(read_byte_suffix(partitions(self.log_lines), 9))
+        self.assertEqual(b"2\nline 3\n", body)
+        self.assertEqual("bytes 12-20/21", content_range)
+
+    def test_read_byte_suffix_longer_than_log(self):
+        body, content_range = asyncio.run(read_byte_suffix(partitions(self.log_lines), 100))
+        self.assertEqual(format_lines(self.log_lines), body)
+        self.assertEqual("bytes 0-20/21", content_range)
@@ -0,0 +1,59 @@
+from public.password import PasswordVerifier, PasswordVerifierBusy
+from unittest.mock import patch
+
+import asyncio
+import bcrypt
+import time
+import unittest
+
+
+def slow_test_password(password, hashed):
+    time.sleep(0.5)
+    return True
+
+
+class TestPasswordVerifier(unittest.TestCase):
+    def setUp(self):
+        self.hashed = str(bcrypt.hashpw(b"password", bcrypt.gensalt(rounds=4)), "utf-8")
+
+    def test_verify(self):
+        verifier = PasswordVerifier(workers=1)
+
+        async def verify():
+            return await verifier.verify("password", self.hashed), await verifier.verify("wrong", self.hashed)
+
+        try:
+            self.assertEqual((True, False), asyncio.run(verify()))
+        finally:
+            verifier.shutdown()
+
+    def test_reject_if_queue_is_full(self):
+        verifier = PasswordVerifier(workers=1, queue_size=1, queue_timeout=10)
+
+        async def verify():
+            return await asyncio.gather(*(verifier.verify("password", self.hashed) for _ in range(3)),
+                                        return_exceptions=True)
+
+        try:
+            with patch("public.password.test_password", slow_test_password):
+                results = asyncio.run(verify())
+        finally:
+            verifier.shutdown()
+        self.assertEqual([True, True], results[:2])
+        self.assertIsInstance(results[2], PasswordVerifierBusy)
+        self.assertEqual(1, verifier.statistics()["rejected"])
+
+    def test_reject_after_queue_timeout(self):
+        verifier = PasswordVerifier(workers=1, queue_size=1, queue_timeout=0.1)
+
+        async def verify():
+            return await asyncio.gather(*(verifier.verify("password", self.hashed) for _ in range(2)),
+                                        return_exceptions=True)
+
+        try:
+            with patch("public.password.test_password", slow_test_password):
+                results = asyncio.run(verify())
+        finally:
+            verifier.shutdown()
+        self.assertTrue(results[0])
+        self.assertIsInstance(results[1], PasswordVerifierBusy)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from scheduler.config import scheduler
+from sonja.database import get_pool_statistics
 
 
 router = APIRouter()
@@ -13,3 +14,8 @@ def get_ping():
 @router.get("/process_commits")
 def get_process_commits():
     scheduler.trigger()
+
+
+@router.get("/database_pool")
+def get_database_pool():
+    return get_pool_statistics()
@@ -1,13 +1,19 @@
 from datetime import datetime
-from typing import List
+from typing import Callable, List, Tuple
 
 from sonja.builder import Builder, BuildFailed
+from sonja.conan_cache import ConanCache
 from sonja.config import connect_to_database, logger
-from sonja.database import session_scope, get_current_configuration
+from sonja.container_pool import ContainerPool
+from sonja.database import session_scope, update_run_heartbeats
+from sonja.entity_cache import entity_cache
+from sonja.git_mirror import GitMirror
+from sonja.images import ImageManager
+from sonja.log_errors import ErrorSummary
 from sonja.redis import RedisClient
 from sonja.client import Scheduler
 from sonja.manager import Manager
-from sonja.model import BuildStatus, Build, Profile, Platform, Run, RunStatus, LogLine
+from sonja.model import BuildStatus, Build, Configuration, Profile, Platform, Run, RunStatus, LogLine
 from sonja.worker import Worker
 from sqlalchemy.exc import OperationalError
 import asyncio
@@ -16,17 +22,82 @@ import time
 
 
 sonja_os = os.environ.get("SONJA_AGENT_OS", "Linux")
+sonja_platform = Platform.linux if sonja_os == "Linux" else Platform.windows
 TIMEOUT = 10
+LOG_FLUSH_PERIOD_SECONDS = 0.25
+HEARTBEAT_PERIOD_SECONDS = 10
+CANCEL_CHECK_PERIOD_SECONDS = 60
 
 
 async def _run_build(builder):
     loop = asyncio.get_running_loop()
     await loop.run_in_executor(None, builder.pull_image)
     await loop.run_in_executor(None, builder.create_build_files)
+    await loop.run_in_executor(None, builder.update_git_mirror)
     await loop.run_in_executor(None, builder.setup_container)
     await loop.run_in_executor(None, builder.run_build)
 
 
+async def _monitor_build(builder: Builder, cancel_event: asyncio.Event,
+                         append_to_logs: Callable[[List[Tuple[datetime, str]]], None],
+                         update_run: Callable[[], None], cancel_stopping_build: Callable[[], bool]) -> bool:
+    """Run the build and process its logs, heartbeats and cancel requests until it finishes.
+
+    Returns False if the build was stopped.
+    """
+    loop = asyncio.get_running_loop()
+    log_event = asyncio.Event()
+    builder.set_log_callback(lambda: loop.call_soon_threadsafe(log_event.set))
+    builder_task = asyncio.create_task(_run_build(builder))
+    next_log_flush = loop.time()
+    next_heartbeat = loop.time() + HEARTBEAT_PERIOD_SECONDS
+    next_cancel_check = loop.time() + CANCEL_CHECK_PERIOD_SECONDS
+    while True:
+        log_task = asyncio.create_task(log_event.wait())
+        cancel_task = asyncio.create_task(cancel_event.wait())
+        wait_for = {builder_task, cancel_task}
+        deadline = min(next_heartbeat, next_cancel_check)
+        if loop.time() < next_log_flush:
+            # limit the rate of database commits for builds which produce logs continuously
+            deadline = min(deadline, next_log_flush)
+        else:
+            wait_for.add(log_task)
+        await asyncio.wait(wait_for, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED)
+        log_task.cancel()
+        cancel_task.cancel()
+
+        if builder_task.done() or (log_event.is_set() and loop.time() >= next_log_flush):
+            log_event.clear()
+            append_to_logs(list(builder.get_log_lines()))
+            next_log_flush = loop.time() + LOG_FLUSH_PERIOD_SECONDS
+
+        if builder_task.done():
+            update_run()
+            builder_task.result()
+            return True
+
+        if loop.time() >= next_heartbeat:
+            update_run()
+            next_heartbeat = loop.time() + HEARTBEAT_PERIOD_SECONDS
+
+        if cancel_event.is_set() or loop.time() >= next_cancel_check:
+            cancel_event.clear()
+            next_cancel_check = loop.time() + CANCEL_CHECK_PERIOD_SECONDS
+            if cancel_stopping_build():
+                builder_task.cancel()
+                return False
+
+
+def _get_docker_credentials(configuration: Configuration) -> List[dict]:
+    return [
+        {
+            "server": c.server,
+            "username": c.username,
+            "password": c.password
+        } for c in configuration.docker_credentials
+    ]
+
+
 class Agent(Worker):
     def __init__(self, scheduler: Scheduler, redis_client: RedisClient):
         super().__init__()
@@ -34,11 +105,29 @@ class Agent(Worker):
         self.__build_id = None
         self.__run_id = None
         self.__log_line_counter = None
+        self.__error_summary = None
+        self.__cancel_event = None
+        self.__cancel_subscriber = None
         self.__scheduler = scheduler
         self.__redis_client = redis_client
         self.__manager = Manager(redis_client)
+        self.__image_manager = ImageManager()
+        self.__container_pool = ContainerPool()
+        self.__conan_cache = ConanCache(container_pool=self.__container_pool)
+        self.__git_mirror = GitMirror(container_pool=self.__container_pool)
+
+    @property
+    def container_pool(self) -> ContainerPool:
+        return self.__container_pool
+
+    def cancel_build(self, build_id: int):
+        self.post(lambda: self.__request_cancel(build_id))
 
     async def work(self, payload):
+        if not self.__cancel_subscriber:
+            self.__cancel_subscriber = self.__redis_client.subscribe_build_cancels(self.cancel_build)
+        entity_cache.start(self.__redis_client)
+        self.__prewarm_images()
         new_builds = True
         while new_builds:
             try:
@@ -48,16 +137,40 @@ class Agent(Worker):
                 logger.info("Retry in %i seconds", TIMEOUT)
                 time.sleep(TIMEOUT)
 
+    def cleanup(self):
+        if self.__cancel_subscriber:
+            self.__cancel_subscriber.stop()
+        entity_cache.stop()
+        self.__container_pool.clear()
+
+    def __request_cancel(self, build_id: int):
+        if self.__build_id == build_id and self.__cancel_event:
+            logger.info("Received cancel request for build '%d'", build_id)
+            self.__cancel_event.set()
+
+    def __prewarm_images(self):
+        try:
+            configuration = entity_cache.configuration()
+            with session_scope() as session:
+                docker_credentials = _get_docker_credentials(configuration) if configuration else []
+                images = [container for (container,) in session.query(Profile.container)
+                          .filter(Profile.platform == sonja_platform, Profile.container != None)
+                          .distinct()]
+        except OperationalError as e:
+            logger.error("Failed to query images to pre-warm: %s", e)
+            return
+
+        self.__image_manager.prewarm(images, docker_credentials)
+
     async def __process_builds(self):
         logger.info("Start processing builds")
-        platform = Platform.linux if sonja_os == "Linux" else Platform.windows
         try:
+            configuration = entity_cache.configuration()
             with session_scope() as session:
-                configuration = get_current_configuration(session)
                 build = session\
                     .query(Build)\
                     .join(Build.profile)\
-                    .filter(Profile.platform == platform,\
+                    .filter(Profile.platform == sonja_platform,\
                             Build.status == BuildStatus.new)\
                     .populate_existing()\
                     .with_for_update(skip_locked=True, of=Build)\
@@ -69,6 +182,7 @@ class Agent(Worker):
 
                 logger.info("Set status of build '%d' to 'active'", build.id)
                 self.__build_id = build.id
+                self.__cancel_event = asyncio.Event()
                 build.status = BuildStatus.active
                 run = Run()
                 run.build = build
@@ -78,15 +192,24 @@ class Agent(Worker):
                 session.commit()
                 self.__run_id = run.id
                 self.__log_line_counter = 1
+                self.__error_summary = ErrorSummary()
                 self.__redis_client.publish_build_update(build)
                 self.__redis_client.publish_run_update(run)
 
-                container = build.profile.container
-                ecosystem = build.profile.ecosystem
-                profile = build.profile
+                # the configuration of the build changes rarely, read it from the cache
+                profile = entity_cache.profile(build.profile_id)
+                ecosystem = entity_cache.ecosystem(profile.ecosystem_id) if profile else None
                 commit = build.commit
-                channel = build.commit.channel
-                repo = build.commit.repo
+                channel = entity_cache.channel(commit.channel_id)
+                repo = entity_cache.repo(commit.repo_id)
+                if not configuration or not profile or not ecosystem or not channel or not repo:
+                    # the entities might have been deleted after the build was read
+                    logger.error("Failed to read the configuration, profile, ecosystem, channel or repo of build '%d'",
+                                 build.id)
+                    self.__set_build_status(BuildStatus.error, RunStatus.error)
+                    self.__reset_build()
+                    return True
+                container = profile.container
                 parameters = {
                     "conan_config_url": ecosystem.conan_config_url,
                     "conan_config_path": ecosystem.conan_config_path,
@@ -94,8 +217,8 @@ class Agent(Worker):
                     "conan_remote": channel.conan_remote,
                     "conan_profile": profile.conan_profile,
                     "conan_options": " ".join(["-o {0}={1}".format(option.key, option.value)
-                                               for option in commit.repo.options]),
-                    "git_url": commit.repo.url,
+                                               for option in repo.options]),
+                    "git_url": repo.url,
                     "git_sha": commit.sha,
                     "git_credentials": [
                         {
@@ -111,13 +234,7 @@ class Agent(Worker):
                             if repo.path != "" else "./conanfile.py",
                     "ssh_key": configuration.ssh_key,
                     "known_hosts": configuration.known_hosts,
-                    "docker_credentials": [
-                        {
-                            "server": c.server,
-                            "username": c.username,
-                            "password": c.password
-                        } for c in configuration.docker_credentials
-                    ],
+                    "docker_credentials": _get_docker_credentials(configuration),
                     "conan_credentials": [
                         {
                             "remote": c.remote,
@@ -125,7 +242,9 @@ class Agent(Worker):
                             "password": c.password
                         } for c in ecosystem.conan_credentials
                     ],
-                    "mtu": os.environ.get("SONJA_MTU", "1500")
+                    "mtu": os.environ.get("SONJA_MTU", "1500"),
+                    "conan_cache_volume": self.__conan_cache.volume_name(profile.id),
+                    "git_mirror_volume": self.__git_mirror.volume_name(repo.url)
                 }
         except OperationalError as e:
             logger.error("Failed to access database: %s", e)
@@ -134,25 +253,11 @@ class Agent(Worker):
             return True
 
         try:
-            with Builder(sonja_os, container, parameters) as builder:
+            with Builder(sonja_os, container, parameters, self.__image_manager, self.__container_pool,
+                         self.__git_mirror) as builder:
                 try:
-                    builder_task = asyncio.create_task(_run_build(builder))
-                    while True:
-                        # wait 10 seconds
-                        done, _ = await asyncio.wait({builder_task}, timeout=10)
-                        log_lines = [line for line in builder.get_log_lines()]
-                        self.__append_to_logs(log_lines)
-                        self.__update_run()
-
-                        # if finished exit
-                        if done:
-                            builder_task.result()
-                            break
-
-                        # check if the build was stopped and cancel it
-                        # if necessary
-                        if self.__cancel_stopping_build(builder):
-                            return True
+                    if not await self.__wait_for_build(builder):
+                        return True
 
                     logger.info("Process build output")
                     result = self.__manager.process_success(self.__build_id, builder.build_output)
@@ -163,7 +268,7 @@ class Agent(Worker):
                 except BuildFailed as e:
                     logger.info("Build '%d' failed", self.__build_id)
                     logger.info("%s", e)
-                    self.__append_to_logs([str(e)])
+                    self.__append_to_logs([(datetime.utcnow(), str(e))])
                     self.__manager.process_failure(self.__build_id, builder.build_output)
                     self.__set_build_status(BuildStatus.error, RunStatus.error)
         except asyncio.CancelledError:
@@ -174,12 +279,23 @@ class Agent(Worker):
             logger.error("Unexpected error while building: ", e)
             self.__set_build_status(BuildStatus.new, RunStatus.error)
         finally:
-            self.__build_id = None
-            self.__run_id = None
-            self.__log_line_counter = None
-            
+            self.__reset_build()
+
+        await asyncio.get_running_loop().run_in_executor(None, self.__conan_cache.cleanup)
+        await asyncio.get_running_loop().run_in_executor(None, self.__git_mirror.cleanup)
         return True
 
+    def __reset_build(self):
+        self.__build_id = None
+        self.__run_id = None
+        self.__log_line_counter = None
+        self.__error_summary = None
+        self.__cancel_event = None
+
+    async def __wait_for_build(self, builder: Builder) -> bool:
+        return await _monitor_build(builder, self.__cancel_event, self.__append_to_logs, self.__update_run,
+                                    lambda: self.__cancel_stopping_build(builder))
+
     def __set_build_status(self, status: BuildStatus, run_status: RunStatus):
         logger.info("Set status of build '%d' to '%s'", self.__build_id, status)
 
@@ -194,6 +310,7 @@ class Agent(Worker):
                 if run and run.build:
                     logger.info("Set status of run '%d' to '%s'", run.id , run_status)
                     run.status = run_status
+                    run.error_summary = self.__error_summary.to_json()
                     run.build.status = status
                     session.commit()
                     self.__redis_client.publish_build_update(run.build)
@@ -206,31 +323,34 @@ class Agent(Worker):
     def __update_run(self):
         try:
             with session_scope() as session:
-                run = session.query(Run) \
-                    .filter_by(id=self.__run_id) \
-                    .first()
-                if run and run.build:
-                    logger.debug("Update run '%d' to '%s'", run.id)
-                    run.updated = datetime.utcnow()
-                    session.commit()
+                if update_run_heartbeats(session, [self.__run_id]):
+                    logger.debug("Updated run '%d'", self.__run_id)
                 else:
-                    logger.error("Failed to find run '%d' and/or its build in database", self.__run_id)
+                    logger.error("Failed to find run '%d' in database", self.__run_id)
         except OperationalError as e:
             logger.error("Failed to update run: %s", e)
 
-    def __append_to_logs(self, log_lines: List[str]):
+    def __append_to_logs(self, log_lines: List[Tuple[datetime, str]]):
+        if not log_lines:
+            return
+
         try:
             with session_scope() as session:
-                for line in log_lines:
+                new_log_lines = []
+                for log_time, line in log_lines:
                     log_line = LogLine()
                     log_line.content = line.encode("cp1252", errors="replace")
-                    log_line.time = datetime.utcnow()
+                    log_line.time = log_time
                     log_line.run_id = self.__run_id
                     log_line.number = self.__log_line_counter
+                    self.__error_summary.add(self.__log_line_counter, line)
                     self.__log_line_counter += 1
                     session.add(log_line)
-                    session.commit()
-                    self.__redis_client.publish_log_line_update(log_line)
+                    new_log_lines.append(log_line)
+                # the published log lines must not be read again from the database
+                session.expire_on_commit = False
+                session.commit()
+                self.__redis_client.publish_log_line_updates(self.__run_id, new_log_lines)
         except OperationalError as e:
             logger.error("Failed to update logs: %s", e)
 
@@ -252,6 +372,7 @@ class Agent(Worker):
                 logger.info("Set status of build '%d' to 'stopped'", self.__build_id)
                 build.status = BuildStatus.stopped
                 run.status = RunStatus.stopped
+                run.error_summary = self.__error_summary.to_json()
                 session.commit()
                 self.__redis_client.publish_build_update(build)
                 self.__redis_client.publish_run_update(run)
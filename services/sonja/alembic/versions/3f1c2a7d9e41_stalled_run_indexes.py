@@ -0,0 +1,26 @@
+"""Indexes for the stalled run detection
+
+Revision ID: 3f1c2a7d9e41
+Revises: be92d3ad0807
+Create Date: 2026-10-19 10:12:31.512904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7d9e41'
+down_revision = 'be92d3ad0807'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_build_status', 'build', ['status'])
+    op.create_index('ix_run_build_id_updated', 'run', ['build_id', 'updated'])
+
+
+def downgrade():
+    op.drop_index('ix_run_build_id_updated', table_name='run')
+    op.drop_index('ix_build_status', table_name='build')
@@ -0,0 +1,33 @@
+"""API tokens for automated logins
+
+Revision ID: 5d2b9c4e1f73
+Revises: 8a4d6e0b2c57
+Create Date: 2026-10-19 14:21:07.418356
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2b9c4e1f73'
+down_revision = '8a4d6e0b2c57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('api_token',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('name', sa.String(length=255), nullable=False),
+                    sa.Column('token_hash', sa.String(length=64), nullable=False),
+                    sa.Column('created', sa.DateTime(), nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('token_hash')
+                    )
+
+
+def downgrade():
+    op.drop_table('api_token')
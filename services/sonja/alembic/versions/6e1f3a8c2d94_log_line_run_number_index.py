@@ -0,0 +1,24 @@
+"""Composite index for reading ranges and tails of logs
+
+Revision ID: 6e1f3a8c2d94
+Revises: 5d2b9c4e1f73
+Create Date: 2026-10-19 16:02:35.731904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e1f3a8c2d94'
+down_revision = '5d2b9c4e1f73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_log_line_run_id_number', 'log_line', ['run_id', 'number'])
+
+
+def downgrade():
+    op.drop_index('ix_log_line_run_id_number', table_name='log_line')
@@ -0,0 +1,36 @@
+"""Composite indexes for the hot status and lookup queries
+
+Revision ID: 8a4d6e0b2c57
+Revises: 3f1c2a7d9e41
+Create Date: 2026-10-19 11:03:48.205316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d6e0b2c57'
+down_revision = '3f1c2a7d9e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_build_status_profile_id', 'build', ['status', 'profile_id'])
+    op.drop_index('ix_build_status', table_name='build')
+    op.create_index('ix_commit_status', 'commit', ['status'])
+    op.create_index('ix_commit_repo_id_channel_id_sha', 'commit', ['repo_id', 'channel_id', 'sha'])
+    op.create_index('ix_recipe_ecosystem_id_name_version', 'recipe', ['ecosystem_id', 'name', 'version'])
+    op.create_index('ix_recipe_revision_recipe_id_revision', 'recipe_revision', ['recipe_id', 'revision'])
+    op.create_index('ix_package_recipe_revision_id_package_id', 'package', ['recipe_revision_id', 'package_id'])
+
+
+def downgrade():
+    op.drop_index('ix_package_recipe_revision_id_package_id', table_name='package')
+    op.drop_index('ix_recipe_revision_recipe_id_revision', table_name='recipe_revision')
+    op.drop_index('ix_recipe_ecosystem_id_name_version', table_name='recipe')
+    op.drop_index('ix_commit_repo_id_channel_id_sha', table_name='commit')
+    op.drop_index('ix_commit_status', table_name='commit')
+    op.create_index('ix_build_status', 'build', ['status'])
+    op.drop_index('ix_build_status_profile_id', table_name='build')
@@ -0,0 +1,24 @@
+"""Error summary of runs
+
+Revision ID: 9c2e7b4a1d05
+Revises: 6e1f3a8c2d94
+Create Date: 2026-10-19 17:12:48.306517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e7b4a1d05'
+down_revision = '6e1f3a8c2d94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('run', sa.Column('error_summary', sa.Text(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('run', 'error_summary')
@@ -0,0 +1,32 @@
+"""Log retention policies and archived runs
+
+Revision ID: b47d0e9f3a62
+Revises: 9c2e7b4a1d05
+Create Date: 2026-10-19 18:05:11.520873
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b47d0e9f3a62'
+down_revision = '9c2e7b4a1d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ecosystem', sa.Column('log_keep_runs', sa.Integer(), nullable=True))
+    op.add_column('ecosystem', sa.Column('log_retention_days', sa.Integer(), nullable=True))
+    op.add_column('channel', sa.Column('log_keep_runs', sa.Integer(), nullable=True))
+    op.add_column('channel', sa.Column('log_retention_days', sa.Integer(), nullable=True))
+    op.add_column('run', sa.Column('log_archived', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('run', 'log_archived')
+    op.drop_column('channel', 'log_retention_days')
+    op.drop_column('channel', 'log_keep_runs')
+    op.drop_column('ecosystem', 'log_retention_days')
+    op.drop_column('ecosystem', 'log_keep_runs')
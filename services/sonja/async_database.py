@@ -0,0 +1,59 @@
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sonja.database import connection_string, pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping, \
+    isolation_level, statement_timeout_ms
+
+
+# the public API serves its hot read endpoints from the event loop, the other services keep using the blocking
+# engine in sonja.database
+async_connection_string = connection_string.replace("mysql+mysqldb://", "mysql+aiomysql://", 1)
+
+
+def _create_async_engine():
+    options = {
+        "echo": False,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping
+    }
+    if isolation_level:
+        options["isolation_level"] = isolation_level
+    new_engine = create_async_engine(async_connection_string, **options)
+
+    if statement_timeout_ms:
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def set_statement_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET SESSION max_execution_time = {statement_timeout_ms}")
+            cursor.close()
+
+    return new_engine
+
+
+async_engine = _create_async_engine()
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def get_async_session():
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+            await session.commit()
+        except:
+            await session.rollback()
+            raise
+
+
+def get_async_pool_statistics() -> dict:
+    pool = async_engine.pool
+    checked_out = pool.checkedout()
+    capacity = pool.size() + max_overflow
+    return {
+        "size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "utilization": checked_out / capacity if capacity else 0.0
+    }
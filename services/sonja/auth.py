@@ -1,20 +1,34 @@
 import bcrypt
+import hashlib
 import os
 
 from datetime import datetime, timedelta
 from jose import jwt, ExpiredSignatureError
+from secrets import token_hex
 
 secret_key = os.environ.get('SONJA_SECRET_KEY', '1234567890abcdef1234567890abcdef1234567890abcdef1234567890abcdef')
+# the cost of new password hashes, existing hashes keep the cost they were created with
+bcrypt_rounds = int(os.environ.get('SONJA_BCRYPT_ROUNDS', '12'))
+API_TOKEN_PREFIX = "sonja_"
 
 
 def hash_password(password):
-    return str(bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()), "utf-8")
+    return str(bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=bcrypt_rounds)), "utf-8")
 
 
 def test_password(password, hashed):
     return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
 
 
+def create_api_token() -> str:
+    return f"{API_TOKEN_PREFIX}{token_hex(32)}"
+
+
+def hash_api_token(token: str) -> str:
+    # API tokens are random, a fast hash is sufficient
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def create_access_token(data: str, expires_delta: timedelta):
     expire = datetime.utcnow() + expires_delta
     to_encode = {
@@ -1,19 +1,22 @@
 import docker
+import hashlib
 import os
-import re
 import string
 import tarfile
 import threading
 
 from sonja.config import logger
+from sonja.container_pool import ContainerPool
 from sonja.credential_helper import build_credential_helper
+from sonja.git_mirror import GitMirror
+from sonja.images import ImageManager, PullFailed
+from sonja.log_stream import LogBuffer, frame_lines, parse_log_line
 from sonja.ssh import decode
+from datetime import datetime
 from io import BytesIO, FileIO
-from queue import Empty, SimpleQueue
+from typing import Callable, Iterator, Tuple
 
 
-docker_image_pattern = ("(([a-z0-9-]+\\.[a-z0-9\\.-]+(:[0-9]+)?/)?"
-                        "[a-z0-9\\.-/]+)[:@]([a-z0-9\\.-]+)$")
 build_package_dir_name = "conan_build_package"
 build_output_dir_name = "conan_output"
 
@@ -49,8 +52,12 @@ def _extract_output_tar(data: FileIO):
 
 
 class Builder(object):
-    def __init__(self, build_os: str, image: str, parameters: dict):
+    def __init__(self, build_os: str, image: str, parameters: dict, image_manager: ImageManager = None,
+                 container_pool: ContainerPool = None, git_mirror: GitMirror = None):
         self.__client = None
+        self.__image_manager = image_manager if image_manager else ImageManager()
+        self.__container_pool = container_pool
+        self.__git_mirror = git_mirror if git_mirror else GitMirror()
         self.__parameters = parameters
         self.__image = image
         self.__build_os = build_os
@@ -59,7 +66,7 @@ class Builder(object):
         self.__container_logs = None
         self.__cancel_lock = threading.Lock()
         self.__cancelled = False
-        self.__logs = SimpleQueue()
+        self.__logs = LogBuffer()
         self.build_output = dict()
 
     def __enter__(self):
@@ -104,6 +111,20 @@ class Builder(object):
         else:
             return "C:\\{0}".format(build_output_dir_name)
 
+    @property
+    def __conan_cache_dir(self):
+        if self.__build_os == "Linux":
+            return "/conan_cache"
+        else:
+            return "C:\\conan_cache"
+
+    @property
+    def __git_mirror_dir(self):
+        if self.__build_os == "Linux":
+            return "/git_mirror"
+        else:
+            return "C:\\git_mirror"
+
     @property
     def __build_command(self):
         if self.__build_os == "Linux":
@@ -111,6 +132,27 @@ class Builder(object):
         else:
             return 'cmd /s /c "powershell -File {0}\\build.ps1"'.format(self.__build_package_dir)
 
+    @property
+    def __mirror_template(self):
+        if self.__build_os == "Linux":
+            return "mirror.sh.in"
+        else:
+            return "mirror.ps1.in"
+
+    @property
+    def __mirror_command(self):
+        if self.__build_os == "Linux":
+            return "sh {0}/mirror.sh".format(self.__build_package_dir)
+        else:
+            return 'cmd /s /c "powershell -File {0}\\mirror.ps1"'.format(self.__build_package_dir)
+
+    @property
+    def __git_mirror_repo(self):
+        if self.__build_os == "Linux":
+            return f"{self.__git_mirror_dir}/repo.git"
+        else:
+            return f"{self.__git_mirror_dir}\\repo.git"
+
     def __setup_conan_users(self, conan_credentials: dict) -> str:
         commands = []
         for c in conan_credentials:
@@ -126,35 +168,118 @@ class Builder(object):
             commands.append(s)
         return "\n".join(commands)
 
+    @staticmethod
+    def __open_windows_lock(variable: str, path: str) -> str:
+        return "\n".join([
+            f"${variable} = $null",
+            f"while (-not ${variable}) {{",
+            f"    try {{ ${variable} = [System.IO.File]::Open('{path}', 'OpenOrCreate', 'ReadWrite', 'None') }}",
+            "    catch { Start-Sleep -Seconds 1 }",
+            "}"
+        ])
+
+    def __lock_conan_cache(self) -> str:
+        if not self.__parameters.get("conan_cache_volume", ""):
+            return ""
+
+        # the image must provide 'flock' (util-linux) to serialize builds which share the cache volume
+        if self.__build_os == "Linux":
+            return "\n".join([
+                "if ! command -v flock > /dev/null; then",
+                "    echo 'The image must provide flock to use the Conan cache volume' >&2",
+                "    exit 1",
+                "fi",
+                f"exec 9>{self.__conan_cache_dir}/sonja.lock",
+                "flock 9"
+            ])
+        else:
+            return self.__open_windows_lock("lock", f"{self.__conan_cache_dir}\\sonja.lock")
+
+    def __checkout_sha(self) -> str:
+        parameters = self.__parameters
+        sha = parameters["git_sha"]
+        if not parameters.get("git_mirror_volume", ""):
+            if self.__build_os == "Linux":
+                return "\n".join([
+                    f"git fetch origin {sha}",
+                    "git checkout FETCH_HEAD"
+                ])
+            else:
+                return "\n".join([
+                    f"git fetch origin {sha}; ThrowOnNonZero",
+                    "git checkout FETCH_HEAD; ThrowOnNonZero"
+                ])
+
+        # the mirror is updated by a separate container before the build and mounted read-only
+        mirror = self.__git_mirror_repo
+        if self.__build_os == "Linux":
+            return "\n".join([
+                f"echo {mirror}/objects > .git/objects/info/alternates",
+                f"git checkout {sha}"
+            ])
+        else:
+            return "\n".join([
+                f"Set-Content -Path .git\\objects\\info\\alternates -Value '{mirror}\\objects' -Encoding Ascii",
+                f"git checkout {sha}; ThrowOnNonZero"
+            ])
+
+    def __install_conan_config(self, config_args: str) -> str:
+        parameters = self.__parameters
+        if not parameters.get("conan_cache_volume", ""):
+            if self.__build_os == "Linux":
+                return f"conan config install {config_args}"
+            else:
+                return f"conan config install {config_args}; ThrowOnNonZero"
+
+        # the configuration is only installed if the arguments or the head of the configuration repo changed
+        args_hash = hashlib.sha256(config_args.encode("utf-8")).hexdigest()
+        ref = parameters["conan_config_branch"] if parameters["conan_config_branch"] else "HEAD"
+        url = parameters["conan_config_url"]
+        # the remotes of the installed configuration are restored for every build because other channels using the same
+        # cache enable different remotes
+        if self.__build_os == "Linux":
+            hash_file = f"{self.__conan_cache_dir}/config_hash"
+            remotes_file = f"{self.__conan_cache_dir}/.conan/remotes.json"
+            saved_remotes_file = f"{self.__conan_cache_dir}/config_remotes.json"
+            return "\n".join([
+                f"config_sha=$(git ls-remote {url} {ref} | head -n 1 | cut -f 1)",
+                f"if [ -n \"$config_sha\" ] && [ \"{args_hash}-$config_sha\" = \"$(cat {hash_file} 2>/dev/null)\" ] "
+                f"&& [ -f {saved_remotes_file} ]; then",
+                "    echo 'Conan configuration is up to date'",
+                f"    cp {saved_remotes_file} {remotes_file}",
+                "else",
+                f"    conan config install {config_args}",
+                f"    cp {remotes_file} {saved_remotes_file}",
+                f"    echo \"{args_hash}-$config_sha\" > {hash_file}",
+                "fi"
+            ])
+        else:
+            hash_file = f"{self.__conan_cache_dir}\\config_hash"
+            remotes_file = f"{self.__conan_cache_dir}\\.conan\\remotes.json"
+            saved_remotes_file = f"{self.__conan_cache_dir}\\config_remotes.json"
+            return "\n".join([
+                f"$config_sha = \"$(git ls-remote {url} {ref} | Select-Object -First 1)\".Split()[0]",
+                f"if ($config_sha -and \"{args_hash}-$config_sha\" -eq "
+                f"(Get-Content '{hash_file}' -ErrorAction SilentlyContinue) -and (Test-Path '{saved_remotes_file}')) {{",
+                "    echo 'Conan configuration is up to date'",
+                f"    Copy-Item -Path '{saved_remotes_file}' -Destination '{remotes_file}' -Force",
+                "} else {",
+                f"    conan config install {config_args}; ThrowOnNonZero",
+                f"    Copy-Item -Path '{remotes_file}' -Destination '{saved_remotes_file}' -Force",
+                f"    Set-Content -Path '{hash_file}' -Value \"{args_hash}-$config_sha\"",
+                "}"
+            ])
+
     def pull_image(self):
         try:
             self.__client = docker.from_env()
         except docker.errors.DockerException as e:
             raise BuildFailed(f"Failed to instantiate docker client: '{e}")
 
-        m = re.match(docker_image_pattern, self.__image)
-        if not m:
-            raise BuildFailed(f"The image '{self.__image}' is not a valid docker image name")
-        tag = m.group(4)
-        repository = m.group(1)
-        server = m.group(2).strip("/") if m.group(2) else ""
-        if tag == "local":
-            logger.info("Do not pull local image '%s'", self.__image)
-            return
-
-        auth_config = None
-        credentials = next((c for c in self.__parameters['docker_credentials'] if c["server"] == server), None)
-        if credentials is not None:
-            auth_config = {
-                "username": credentials['username'],
-                "password": credentials['password']
-            }
-
-        logger.info("Pull docker image '%s'", self.__image)
         try:
-            self.__client.images.pull(repository=repository, tag=tag, auth_config=auth_config)
-        except docker.errors.APIError as e:
-            raise BuildFailed(f"Failed to pull docker container '{self.__image}': {e}")
+            self.__image_manager.pull(self.__client, self.__image, self.__parameters['docker_credentials'])
+        except PullFailed as e:
+            raise BuildFailed(str(e))
 
     def create_build_files(self):
         logger.info("Create build tar")
@@ -173,9 +298,13 @@ class Builder(object):
         lock_file_user_arg = "--user {0} --channel {1}".format(parameters["sonja_user"], parameters["channel"]) \
             if parameters["sonja_user"] else ""
 
+        config_args = " ".join([config_url, config_branch, config_path])
         patched_parameters = {
             **parameters,
-            "conan_config_args": " ".join([config_url, config_branch, config_path]),
+            "conan_config_args": config_args,
+            "install_conan_config": self.__install_conan_config(config_args),
+            "lock_conan_cache": self.__lock_conan_cache(),
+            "checkout_sha": self.__checkout_sha(),
             "build_package_dir": self.__build_package_dir,
             "escaped_build_package_dir": self.__escaped_build_package_dir,
             "build_output_dir": self.__build_output_dir,
@@ -185,10 +314,9 @@ class Builder(object):
             "setup_conan_users": self.__setup_conan_users(parameters["conan_credentials"])
         }
 
-        setup_file_path = os.path.join(os.path.dirname(__file__), self.__script_template)
-        with open(setup_file_path) as setup_template_file:
-            template = string.Template(setup_template_file.read())
-        script = template.substitute(patched_parameters)
+        script = self.__substitute(self.__script_template, patched_parameters)
+        mirror_script = self.__substitute(self.__mirror_template, {**patched_parameters,
+                                                                   "git_mirror": self.__git_mirror_repo})
 
         credential_helper = build_credential_helper(patched_parameters["git_credentials"])
 
@@ -197,6 +325,7 @@ class Builder(object):
         tar = tarfile.open(mode="w", fileobj=f, dereference=True)
         script_name = self.__script_template[:-3]
         _add_content(tar, script_name, script)
+        _add_content(tar, self.__mirror_template[:-3], mirror_script)
         _add_content(tar, "credential_helper.sh", credential_helper, is_script=True)
         _add_content(tar, "id_rsa", decode(parameters["ssh_key"]))
         _add_content(tar, "known_hosts", decode(parameters["known_hosts"]))
@@ -205,15 +334,86 @@ class Builder(object):
 
         self.__build_tar = f
 
+    @staticmethod
+    def __substitute(template_name: str, parameters: dict) -> str:
+        template_path = os.path.join(os.path.dirname(__file__), template_name)
+        with open(template_path) as template_file:
+            template = string.Template(template_file.read())
+        return template.substitute(parameters)
+
+    def update_git_mirror(self):
+        git_mirror_volume = self.__parameters.get("git_mirror_volume", "")
+        if not git_mirror_volume:
+            return
+
+        with self.__git_mirror.lock():
+            logger.info("Update git mirror volume '%s'", git_mirror_volume)
+            try:
+                container = self.__client.containers.create(
+                    image=self.__image, command=self.__mirror_command,
+                    volumes={git_mirror_volume: {"bind": self.__git_mirror_dir, "mode": "rw"}})
+            except docker.errors.APIError as e:
+                raise BuildFailed(f"Failed to create docker container from image '{self.__image}': {e}")
+
+            try:
+                with self.__cancel_lock:
+                    if self.__cancelled:
+                        logger.info("Build was cancelled")
+                        return
+                    container.put_archive(self.__root_dir, data=self.__build_tar)
+                    self.__build_tar.seek(0)
+                    container.start()
+                    self.__container_logs = container.logs(stream=True, follow=True, timestamps=True)
+
+                for line in frame_lines(self.__container_logs):
+                    self.__logs.put(*parse_log_line(line))
+                with self.__cancel_lock:
+                    self.__container_logs = None
+                    if self.__cancelled:
+                        logger.info("Build was cancelled")
+                        return
+
+                status_code = container.wait().get("StatusCode")
+                if status_code:
+                    raise BuildFailed(f"Failed to update git mirror, container '{container.short_id}' returned "
+                                      f"status code '{status_code}'")
+            except docker.errors.APIError as e:
+                raise BuildFailed(f"Failed to update git mirror in container '{container.short_id}': {e}")
+            finally:
+                try:
+                    container.remove(force=True)
+                except docker.errors.APIError:
+                    pass
+
     def setup_container(self):
         logger.info("Setup docker container")
 
-        try:
-            self.__container = self.__client.containers.create(image=self.__image,
-                                                               command=self.__build_command)
-            logger.info("Created docker container '%s'", self.__container.short_id)
-        except docker.errors.APIError as e:
-            raise BuildFailed(f"Failed to create docker container from image '{self.__image}': {e}")
+        volumes = dict()
+        environment = None
+        conan_cache_volume = self.__parameters.get("conan_cache_volume", "")
+        if conan_cache_volume:
+            logger.info("Mount Conan cache volume '%s'", conan_cache_volume)
+            volumes[conan_cache_volume] = {"bind": self.__conan_cache_dir, "mode": "rw"}
+            environment = {"CONAN_USER_HOME": self.__conan_cache_dir}
+        git_mirror_volume = self.__parameters.get("git_mirror_volume", "")
+        if git_mirror_volume:
+            logger.info("Mount git mirror volume '%s'", git_mirror_volume)
+            volumes[git_mirror_volume] = {"bind": self.__git_mirror_dir, "mode": "ro"}
+        volumes = volumes if volumes else None
+
+        if self.__container_pool:
+            self.__container = self.__container_pool.acquire(self.__client, self.__image, self.__build_command,
+                                                             volumes, environment)
+
+        if not self.__container:
+            try:
+                self.__container = self.__client.containers.create(image=self.__image,
+                                                                   command=self.__build_command,
+                                                                   volumes=volumes,
+                                                                   environment=environment)
+                logger.info("Created docker container '%s'", self.__container.short_id)
+            except docker.errors.APIError as e:
+                raise BuildFailed(f"Failed to create docker container from image '{self.__image}': {e}")
 
         try:
             self.__container.put_archive(self.__root_dir, data=self.__build_tar)
@@ -231,13 +431,12 @@ class Builder(object):
                         .format(self.__container.short_id))
             try:
                 self.__container.start()
-                self.__container_logs = self.__container.logs(stream=True, follow=True)
+                self.__container_logs = self.__container.logs(stream=True, follow=True, timestamps=True)
             except docker.errors.APIError as e:
                 raise BuildFailed(f"Failed to start container: {e}")
 
-        for byte_data in self.__container_logs:
-            line = byte_data.decode("utf-8", errors="replace").strip('\n\r')
-            self.__logs.put(line)
+        for line in frame_lines(self.__container_logs):
+            self.__logs.put(*parse_log_line(line))
         with self.__cancel_lock:
             self.__container_logs = None
             if self.__cancelled:
@@ -280,9 +479,8 @@ class Builder(object):
         except docker.errors.APIError:
             pass
 
-    def get_log_lines(self):
-        try:
-            while True:
-                yield self.__logs.get_nowait()
-        except Empty:
-            pass
+    def set_log_callback(self, callback: Callable[[], None]):
+        self.__logs.set_callback(callback)
+
+    def get_log_lines(self) -> Iterator[Tuple[datetime, str]]:
+        yield from self.__logs.get_all()
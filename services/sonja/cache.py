@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import threading
+import time
+
+
+class TtlCache(object):
+    """Keeps values in memory for at most ``ttl`` seconds.
+
+    If more than ``max_size`` values are stored the least recently used ones are dropped. The cache is shared by the
+    threads of a process.
+    """
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self.__ttl = ttl
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+        self.__values = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self.__lock:
+            entry = self.__values.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self.__values.pop(key, None)
+                self.__misses += 1
+                return default
+            self.__values.move_to_end(key)
+            self.__hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self.__lock:
+            self.__values[key] = (time.monotonic() + self.__ttl, value)
+            self.__values.move_to_end(key)
+            while len(self.__values) > self.__max_size:
+                self.__values.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self.__lock:
+            self.__values.pop(key, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__values.clear()
+
+    def statistics(self) -> dict:
+        with self.__lock:
+            return {
+                "size": len(self.__values),
+                "max_size": self.__max_size,
+                "hits": self.__hits,
+                "misses": self.__misses
+            }
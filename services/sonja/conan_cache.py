@@ -0,0 +1,55 @@
+import docker
+import os
+import threading
+import time
+
+from sonja.config import logger, sonja_agent_id
+from sonja.container_pool import ContainerPool
+from sonja.volumes import remove_large_volumes
+from typing import Optional
+
+
+CONAN_CACHE_ENABLED = os.environ.get("SONJA_CONAN_CACHE", "1") == "1"
+CONAN_CACHE_MAX_SIZE_MB = int(os.environ.get("SONJA_CONAN_CACHE_MAX_SIZE", "20480"))
+CONAN_CACHE_CHECK_PERIOD_SECONDS = 600
+
+
+class ConanCache(object):
+    """Manages the persistent Conan cache volumes of an agent.
+
+    There is one docker volume per profile. Concurrent builds using the same volume are serialized by a lock file
+    inside the volume (see the build scripts). Volumes which grow beyond the configured size are removed and
+    recreated empty by the next build. Pooled containers which mount such a volume are removed before.
+    """
+    def __init__(self, enabled: bool = CONAN_CACHE_ENABLED, max_size_mb: int = CONAN_CACHE_MAX_SIZE_MB,
+                 agent_id: str = sonja_agent_id, container_pool: Optional[ContainerPool] = None):
+        self.__enabled = enabled
+        self.__container_pool = container_pool
+        self.__max_size = max_size_mb * 1024 * 1024
+        self.__prefix = f"sonja-conan-{agent_id}-"
+        self.__lock = threading.Lock()
+        self.__last_check = None
+
+    def volume_name(self, profile_id: int) -> str:
+        if not self.__enabled:
+            return ""
+        return f"{self.__prefix}{profile_id}"
+
+    def cleanup(self, client: docker.DockerClient = None, force: bool = False):
+        if not self.__enabled:
+            return
+
+        with self.__lock:
+            now = time.monotonic()
+            if not force and self.__last_check is not None \
+                    and now - self.__last_check < CONAN_CACHE_CHECK_PERIOD_SECONDS:
+                return
+            self.__last_check = now
+
+        try:
+            client = client if client else docker.from_env()
+        except docker.errors.DockerException as e:
+            logger.error("Failed to instantiate docker client for the cleanup of the Conan cache: %s", e)
+            return
+
+        remove_large_volumes(client, self.__prefix, self.__max_size, self.__container_pool)
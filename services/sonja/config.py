@@ -2,6 +2,7 @@ from sonja.database import Base, engine, logger, session_scope
 import logging
 import logging.config
 import os
+import socket
 import sqlalchemy
 import time
 import yaml
@@ -12,6 +13,7 @@ from alembic.runtime import migration
 
 
 log_config = os.path.join(os.path.dirname(__file__), "logging.yaml")
+sonja_agent_id = os.environ.get("SONJA_AGENT_ID", socket.gethostname())
 
 
 def setup_logging():
@@ -0,0 +1,196 @@
+import docker
+import os
+import threading
+
+from collections import OrderedDict
+from sonja.config import logger
+from typing import List, Optional, Tuple
+
+
+CONTAINER_POOL_SIZE = int(os.environ.get("SONJA_CONTAINER_POOL_SIZE", "0"))
+CONTAINER_POOL_MAX_CONTAINERS = int(os.environ.get("SONJA_CONTAINER_POOL_MAX_CONTAINERS", "8"))
+
+
+def _get_key(image: str, command: str, volumes: Optional[dict], environment: Optional[dict]) -> Tuple[str, str, str]:
+    return image, command, repr((sorted((volumes or {}).items()), sorted((environment or {}).items())))
+
+
+class ContainerPool(object):
+    """Keeps pre-created build containers ready for each image, build command and container configuration.
+
+    A container is handed out to exactly one build and removed by the builder afterwards, the pool is refilled in the
+    background so that the next build of the same image finds a created container. Containers which were created from
+    an outdated version of their image are discarded. At most ``max_containers`` containers are kept in total, if the
+    pool is full the containers of the least recently used configuration are removed first.
+    """
+    def __init__(self, size: int = CONTAINER_POOL_SIZE, max_containers: int = CONTAINER_POOL_MAX_CONTAINERS,
+                 replenish_in_background: bool = True):
+        self.__size = size
+        self.__max_containers = max_containers
+        self.__replenish_in_background = replenish_in_background
+        self.__lock = threading.Lock()
+        self.__containers = OrderedDict()
+        self.__volumes = dict()
+        self.__replenishing = set()
+        self.__hits = 0
+        self.__misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.__size > 0
+
+    def acquire(self, client: docker.DockerClient, image: str, command: str, volumes: Optional[dict] = None,
+                environment: Optional[dict] = None):
+        if not self.enabled:
+            return None
+
+        key = _get_key(image, command, volumes, environment)
+        container = None
+        try:
+            image_id = client.images.get(image).id
+        except docker.errors.APIError as e:
+            logger.warning("Failed to inspect image '%s': %s", image, e)
+            image_id = None
+
+        while not container:
+            with self.__lock:
+                pooled = self.__containers.get(key, [])
+                if not pooled:
+                    break
+                self.__containers.move_to_end(key)
+                container_id, container_image_id = pooled.pop(0)
+
+            if container_image_id != image_id:
+                logger.info("Discard pooled container '%s' of outdated image '%s'", container_id[:10], image)
+                self.__remove(client, container_id)
+                continue
+
+            try:
+                container = client.containers.get(container_id)
+            except docker.errors.APIError:
+                logger.warning("Pooled container '%s' does not exist anymore", container_id[:10])
+
+        with self.__lock:
+            if container:
+                self.__hits += 1
+            else:
+                self.__misses += 1
+
+        if container:
+            logger.info("Use pooled docker container '%s'", container.short_id)
+        if self.__replenish_in_background:
+            self.__start_replenish(image, command, volumes, environment)
+        return container
+
+    def replenish(self, client: docker.DockerClient, image: str, command: str, volumes: Optional[dict] = None,
+                  environment: Optional[dict] = None):
+        key = _get_key(image, command, volumes, environment)
+        while True:
+            with self.__lock:
+                pooled = self.__containers.setdefault(key, [])
+                self.__containers.move_to_end(key)
+                self.__volumes[key] = set((volumes or {}).keys())
+                if len(pooled) >= self.__size:
+                    return
+                evicted = self.__evict(key)
+                if evicted is None:
+                    return
+
+            for container_id in evicted:
+                self.__remove(client, container_id)
+
+            try:
+                container = client.containers.create(image=image, command=command, volumes=volumes,
+                                                     environment=environment)
+            except docker.errors.APIError as e:
+                logger.warning("Failed to create pooled container from image '%s': %s", image, e)
+                return
+
+            logger.info("Created pooled docker container '%s'", container.short_id)
+            with self.__lock:
+                self.__containers.setdefault(key, []).append((container.id, container.attrs.get("Image")))
+
+    def clear(self, client: Optional[docker.DockerClient] = None, volume: Optional[str] = None):
+        """Remove all pooled containers or only the ones which mount the given volume."""
+        with self.__lock:
+            keys = [key for key in self.__containers if volume is None or volume in self.__volumes.get(key, set())]
+            container_ids = [container_id for key in keys for container_id, _ in self.__containers.pop(key)]
+            for key in keys:
+                self.__volumes.pop(key, None)
+
+        if not container_ids:
+            return
+
+        try:
+            client = client if client else docker.from_env()
+        except docker.errors.DockerException as e:
+            logger.error("Failed to instantiate docker client for clearing the container pool: '%s'", e)
+            return
+
+        for container_id in container_ids:
+            self.__remove(client, container_id)
+
+    def statistics(self) -> dict:
+        with self.__lock:
+            containers = dict()
+            for (image, _, _), pooled in self.__containers.items():
+                containers[image] = containers.get(image, 0) + len(pooled)
+            return {
+                "size": self.__size,
+                "max_containers": self.__max_containers,
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "containers": containers
+            }
+
+    def __evict(self, key: Tuple[str, str, str]) -> Optional[List[str]]:
+        """Make room for one more container of the given configuration by removing containers of the least recently
+        used configurations. Returns the IDs of the containers to remove or None if there is no room. Must be called
+        with the lock held."""
+        evicted = []
+        total = sum(len(pooled) for pooled in self.__containers.values())
+        for other_key in list(self.__containers.keys()):
+            if total < self.__max_containers:
+                break
+            if other_key == key:
+                continue
+            pooled = self.__containers.pop(other_key)
+            self.__volumes.pop(other_key, None)
+            total -= len(pooled)
+            evicted += [container_id for container_id, _ in pooled]
+
+        if total >= self.__max_containers:
+            return None
+        return evicted
+
+    def __start_replenish(self, image: str, command: str, volumes: Optional[dict], environment: Optional[dict]):
+        key = _get_key(image, command, volumes, environment)
+        with self.__lock:
+            if key in self.__replenishing:
+                return
+            self.__replenishing.add(key)
+
+        threading.Thread(target=self.__replenish, args=(key, image, command, volumes, environment),
+                         daemon=True).start()
+
+    def __replenish(self, key: Tuple[str, str, str], image: str, command: str, volumes: Optional[dict],
+                    environment: Optional[dict]):
+        try:
+            client = docker.from_env()
+            try:
+                self.replenish(client, image, command, volumes, environment)
+            finally:
+                client.close()
+        except docker.errors.DockerException as e:
+            logger.error("Failed to replenish container pool for image '%s': %s", image, e)
+        finally:
+            with self.__lock:
+                self.__replenishing.discard(key)
+
+    @staticmethod
+    def __remove(client: docker.DockerClient, container_id: str):
+        try:
+            logger.info("Remove pooled docker container '%s'", container_id[:10])
+            client.containers.get(container_id).remove(force=True)
+        except docker.errors.APIError:
+            pass
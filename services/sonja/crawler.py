@@ -2,11 +2,14 @@ import gitdb.exc
 
 from sonja.config import connect_to_database, logger
 from sonja.credential_helper import build_credential_helper
-from sonja.database import Session, session_scope, get_current_configuration
-from sonja.model import CommitStatus, Commit, Channel, Repo
+from sonja.database import Session, session_scope
+from sonja.entity_cache import entity_cache
+from sonja.model import CommitStatus, Commit, Repo
+from sonja.redis import RedisClient
 from sonja.ssh import decode
 from sonja.worker import Worker
 from queue import Empty, SimpleQueue
+from types import SimpleNamespace
 import asyncio
 import datetime
 import git
@@ -170,6 +173,7 @@ class Crawler(Worker):
         self.__repos.put(RepoUpdate(repo_id, sha, ref))
 
     async def work(self, payload):
+        entity_cache.start(RedisClient())
         try:
             if payload == ALL_REPOS or self.__periodic:
                 self.__periodic = False
@@ -185,6 +189,7 @@ class Crawler(Worker):
             time.sleep(TIMEOUT)
 
     def cleanup(self):
+        entity_cache.stop()
         shutil.rmtree(self.__data_dir)
         logger.info("Removed data directory '%s'", self.__data_dir)
 
@@ -223,7 +228,7 @@ class Crawler(Worker):
             if not controller.is_clone_of(repo.url):
                 logger.info("Create repo for URL '%s' in '%s'", repo.url, work_dir)
                 await loop.run_in_executor(None, controller.create_new_repo, repo.url)
-            configuration = get_current_configuration(session)
+            configuration = entity_cache.configuration()
             logger.info("Setup SSH in '%s'", work_dir)
             await loop.run_in_executor(None, controller.setup_ssh, configuration.ssh_key,
                                         configuration.known_hosts)
@@ -239,7 +244,7 @@ class Crawler(Worker):
             logger.info("Fetch repo '%s' for URL '%s'", work_dir, repo.url)
             await loop.run_in_executor(None, controller.fetch)
 
-            for channel in session.query(Channel).all():
+            for channel in entity_cache.channels():
                 if sha and ref:
                     if re.fullmatch(channel.ref_pattern, ref):
                         logger.info("Ref '%s' matches '%s'", ref, channel.ref_pattern)
@@ -264,11 +269,11 @@ class Crawler(Worker):
             if not self.__scheduler.process_commits():
                 logger.error("Failed to trigger scheduler")
     
-    def __process_commit(self, session: Session, controller: RepoController, repo: Repo, channel: Channel):
+    def __process_commit(self, session: Session, controller: RepoController, repo: Repo, channel: SimpleNamespace):
         sha = controller.get_sha()
 
         commits = session.query(Commit).filter_by(repo=repo,
-                                                  sha=sha, channel=channel)
+                                                  sha=sha, channel_id=channel.id)
 
         # continue if this commit has already been stored
         if list(commits):
@@ -277,7 +282,7 @@ class Crawler(Worker):
 
         old_commits = session.query(Commit).filter(
             Commit.repo == repo,
-            Commit.channel == channel,
+            Commit.channel_id == channel.id,
             Commit.sha != sha,
             Commit.status != CommitStatus.old
         )
@@ -294,7 +299,7 @@ class Crawler(Worker):
         commit.user_name = controller.get_user_name()
         commit.user_email = controller.get_user_email()
         commit.repo = repo
-        commit.channel = channel
+        commit.channel_id = channel.id
         commit.status = CommitStatus.new
         session.add(commit)
 
@@ -1,16 +1,21 @@
-from sqlalchemy import create_engine, exists, literal, select
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import create_engine, event, exists, literal, select, update
+from sqlalchemy.exc import OperationalError, TimeoutError as SQLAlchemyTimeoutError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sonja.auth import hash_password
 from sonja.model import User, Permission, PermissionLabel, Ecosystem, Base, Build, missing_package, missing_recipe, \
-    package_requirement, Package, RecipeRevision, Recipe, Commit, Channel, DockerCredential, GitCredential, \
+    ApiToken, package_requirement, Package, RecipeRevision, Recipe, Commit, Channel, DockerCredential, GitCredential, \
     profile_label, Profile, Label, Repo, Option, repo_label, Run, LogLine, Configuration, ConanCredential
 from sonja.ssh import encode, generate_rsa_key
 
 from contextlib import contextmanager
+from datetime import datetime
 from secrets import token_hex
+from typing import List
 import logging
 import os
+import threading
+import time
 
 # start MySQL:
 # docker run --rm -d --name mysql -p 3306:3306 -e MYSQL_DATABASE=sonja -e MYSQL_ROOT_PASSWORD=secret mysql:8.0.21
@@ -28,10 +33,100 @@ connection_string = 'mysql+mysqldb://root:{0}@{1}/sonja'.format(
     os.environ.get('MYSQL_ROOT_PASSWORD', 'secret'),
     os.environ.get('MYSQL_URL', '127.0.0.1')
 )
-engine = create_engine(connection_string, echo=False)
+# engine options, each service can tune its pool in its own environment
+pool_size = int(os.environ.get('SONJA_DB_POOL_SIZE', '5'))
+max_overflow = int(os.environ.get('SONJA_DB_MAX_OVERFLOW', '10'))
+pool_timeout = int(os.environ.get('SONJA_DB_POOL_TIMEOUT', '30'))
+pool_recycle = int(os.environ.get('SONJA_DB_POOL_RECYCLE', '3600'))
+pool_pre_ping = os.environ.get('SONJA_DB_POOL_PRE_PING', '1') == '1'
+isolation_level = os.environ.get('SONJA_DB_ISOLATION_LEVEL', '')
+statement_timeout_ms = int(os.environ.get('SONJA_DB_STATEMENT_TIMEOUT', '0'))
+
+
+class PoolMetrics(object):
+    """Counts the checkouts of connections from the pool and the time spent waiting for them."""
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__checkouts = 0
+        self.__timeouts = 0
+        self.__total_wait = 0.0
+        self.__max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self.__lock:
+            if timed_out:
+                self.__timeouts += 1
+            else:
+                self.__checkouts += 1
+            self.__total_wait += wait
+            self.__max_wait = max(self.__max_wait, wait)
+
+    def statistics(self) -> dict:
+        with self.__lock:
+            return {
+                "checkouts": self.__checkouts,
+                "timeouts": self.__timeouts,
+                "total_wait_seconds": self.__total_wait,
+                "max_wait_seconds": self.__max_wait
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeasuredQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except SQLAlchemyTimeoutError:
+            pool_metrics.record(time.monotonic() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.monotonic() - start)
+        return connection
+
+
+def _create_engine():
+    options = {
+        "echo": False,
+        "poolclass": MeasuredQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping
+    }
+    if isolation_level:
+        options["isolation_level"] = isolation_level
+    new_engine = create_engine(connection_string, **options)
+
+    if statement_timeout_ms:
+        @event.listens_for(new_engine, "connect")
+        def set_statement_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET SESSION max_execution_time = {statement_timeout_ms}")
+            cursor.close()
+
+    return new_engine
+
+
+engine = _create_engine()
 Session = sessionmaker(engine)
 
 
+def get_pool_statistics() -> dict:
+    pool = engine.pool
+    checked_out = pool.checkedout()
+    capacity = pool.size() + max_overflow
+    return {
+        "size": pool.size(),
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "utilization": checked_out / capacity if capacity else 0.0,
+        **pool_metrics.statistics()
+    }
+
+
 class NotFound(Exception):
     pass
 
@@ -121,6 +216,18 @@ def get_current_configuration(session: Session) -> Configuration:
     return session.query(Configuration).first()
 
 
+def update_run_heartbeats(session: Session, run_ids: List[int]) -> int:
+    """Set the update time of the given runs in a single statement and return the number of matched runs."""
+    if not run_ids:
+        return 0
+
+    statement = update(Run) \
+        .where(Run.id.in_(run_ids)) \
+        .values(updated=datetime.utcnow()) \
+        .execution_options(synchronize_session=False)
+    return session.execute(statement).rowcount
+
+
 def remove_but_last_user(session: Session, user_id: str):
     record = session.query(User).filter_by(id=user_id).first()
     if not record:
@@ -182,6 +289,7 @@ def clear_database():
     _drop_table(ConanCredential.__table__)
     _drop_table(Ecosystem.__table__)
     _drop_table(Permission.__table__)
+    _drop_table(ApiToken.__table__)
     _drop_table(User.__table__)
     _drop_table(Configuration.__table__)
 
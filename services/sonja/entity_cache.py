@@ -0,0 +1,126 @@
+from sonja.cache import TtlCache
+from sonja.config import logger
+from sonja.database import Session, get_current_configuration, session_scope
+from sonja.model import Channel, Ecosystem, Profile, Repo
+from sonja.redis import RedisClient, Subscriber
+from sqlalchemy import inspect
+from types import SimpleNamespace
+from typing import Callable, Hashable, List, Optional, Tuple
+import os
+import threading
+
+ENTITY_CACHE_TTL = float(os.environ.get("SONJA_ENTITY_CACHE_TTL", "300"))
+ENTITY_CACHE_SIZE = int(os.environ.get("SONJA_ENTITY_CACHE_SIZE", "1024"))
+
+
+def _snapshot(obj: Optional[object], *relationships: str) -> Optional[SimpleNamespace]:
+    """Copy the columns and the given relationships of an ORM object so that it can be used outside its session."""
+    if obj is None:
+        return None
+    values = {attribute.key: getattr(obj, attribute.key) for attribute in inspect(obj).mapper.column_attrs}
+    for relationship in relationships:
+        values[relationship] = [_snapshot(child) for child in getattr(obj, relationship)]
+    return SimpleNamespace(**values)
+
+
+class EntityCache(object):
+    """Keeps read-only copies of the configuration, the ecosystems, profiles, channels and repos in memory.
+
+    The cache is only used while the process is subscribed to the invalidations which are published when these
+    entities are written, otherwise each call reads the database. Entities are loaded in their own session, the
+    TTL bounds the age of an entry if an invalidation is lost nevertheless.
+    """
+    def __init__(self, ttl: float = ENTITY_CACHE_TTL, max_size: int = ENTITY_CACHE_SIZE):
+        self.__cache = TtlCache(ttl, max_size)
+        self.__lock = threading.Lock()
+        self.__generation = 0
+        self.__subscribed = False
+        self.__subscriber: Optional[Subscriber] = None
+
+    def start(self, redis_client: RedisClient):
+        if not self.__subscriber:
+            self.__subscriber = redis_client.subscribe_invalidations(self.invalidate, self.__on_subscribe,
+                                                                     self.__on_unsubscribe)
+
+    def stop(self):
+        if self.__subscriber:
+            self.__subscriber.stop()
+            self.__subscriber = None
+
+    def configuration(self) -> Optional[SimpleNamespace]:
+        return self.__get(("configuration", None), lambda session: _snapshot(
+            get_current_configuration(session), "git_credentials", "docker_credentials"))
+
+    def ecosystem(self, ecosystem_id: int) -> Optional[SimpleNamespace]:
+        return self.__get(("ecosystems", ecosystem_id), lambda session: _snapshot(
+            session.query(Ecosystem).filter_by(id=ecosystem_id).first(), "conan_credentials"))
+
+    def profile(self, profile_id: int) -> Optional[SimpleNamespace]:
+        return self.__get(("profiles", profile_id), lambda session: _snapshot(
+            session.query(Profile).filter_by(id=profile_id).first()))
+
+    def channel(self, channel_id: int) -> Optional[SimpleNamespace]:
+        return self.__get(("channels", channel_id), lambda session: _snapshot(
+            session.query(Channel).filter_by(id=channel_id).first()))
+
+    def channels(self) -> List[SimpleNamespace]:
+        return self.__get(("channels", None), lambda session: [
+            _snapshot(channel) for channel in session.query(Channel).all()])
+
+    def repo(self, repo_id: int) -> Optional[SimpleNamespace]:
+        return self.__get(("repos", repo_id), lambda session: _snapshot(
+            session.query(Repo).filter_by(id=repo_id).first(), "options"))
+
+    def invalidate(self, entities: List[Tuple[str, Optional[int]]]):
+        with self.__lock:
+            self.__generation += 1
+            for type_, id_ in entities:
+                self.__cache.invalidate((type_, id_))
+                # the lists of a type contain the entity too
+                self.__cache.invalidate((type_, None))
+
+    def statistics(self) -> dict:
+        return {
+            "subscribed": self.__subscribed,
+            **self.__cache.statistics()
+        }
+
+    def __get(self, key: Hashable, load: Callable[[Session], object]):
+        if not self.__subscribed:
+            return self.__load(load)
+
+        value = self.__cache.get(key)
+        if value is not None:
+            return value
+
+        with self.__lock:
+            generation = self.__generation
+        value = self.__load(load)
+        with self.__lock:
+            # an entity which was invalidated while it was loaded might be outdated
+            if value is not None and generation == self.__generation and self.__subscribed:
+                self.__cache.set(key, value)
+        return value
+
+    @staticmethod
+    def __load(load: Callable[[Session], object]):
+        # a new transaction sees all writes whose invalidations were received before
+        with session_scope() as session:
+            return load(session)
+
+    def __on_subscribe(self):
+        with self.__lock:
+            # invalidations might have been lost while the process was not subscribed
+            self.__generation += 1
+            self.__cache.clear()
+            self.__subscribed = True
+        logger.info("Use entity cache")
+
+    def __on_unsubscribe(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__subscribed = False
+            self.__cache.clear()
+
+
+entity_cache = EntityCache()
@@ -0,0 +1,61 @@
+import docker
+import hashlib
+import os
+import threading
+import time
+
+from sonja.config import logger, sonja_agent_id
+from sonja.container_pool import ContainerPool
+from sonja.volumes import remove_large_volumes
+from typing import Optional
+
+
+GIT_MIRROR_ENABLED = os.environ.get("SONJA_GIT_MIRROR", "1") == "1"
+GIT_MIRROR_MAX_SIZE_MB = int(os.environ.get("SONJA_GIT_MIRROR_MAX_SIZE", "4096"))
+GIT_MIRROR_CHECK_PERIOD_SECONDS = 600
+
+
+class GitMirror(object):
+    """Manages the docker volumes which hold the bare git mirrors of an agent.
+
+    There is one volume per repo URL. Before a build the commit is fetched into the mirror by a separate container
+    if it is not contained yet, the build container mounts the mirror read-only and uses it as alternate object store,
+    i.e. a commit which is built for many profiles is fetched from the git server once. Mirrors which grow beyond the
+    configured size are removed and fetched again by the next build.
+    """
+    def __init__(self, enabled: bool = GIT_MIRROR_ENABLED, max_size_mb: int = GIT_MIRROR_MAX_SIZE_MB,
+                 agent_id: str = sonja_agent_id, container_pool: Optional[ContainerPool] = None):
+        self.__enabled = enabled
+        self.__max_size = max_size_mb * 1024 * 1024
+        self.__prefix = f"sonja-git-{agent_id}-"
+        self.__container_pool = container_pool
+        self.__lock = threading.Lock()
+        self.__last_check = None
+
+    def volume_name(self, url: str) -> str:
+        if not self.__enabled or not url:
+            return ""
+        return f"{self.__prefix}{hashlib.sha256(url.encode('utf-8')).hexdigest()[:16]}"
+
+    def lock(self) -> threading.Lock:
+        """Serializes the updates and the removal of the mirrors."""
+        return self.__lock
+
+    def cleanup(self, client: docker.DockerClient = None, force: bool = False):
+        if not self.__enabled:
+            return
+
+        with self.__lock:
+            now = time.monotonic()
+            if not force and self.__last_check is not None \
+                    and now - self.__last_check < GIT_MIRROR_CHECK_PERIOD_SECONDS:
+                return
+            self.__last_check = now
+
+            try:
+                client = client if client else docker.from_env()
+            except docker.errors.DockerException as e:
+                logger.error("Failed to instantiate docker client for the cleanup of the git mirrors: %s", e)
+                return
+
+            remove_large_volumes(client, self.__prefix, self.__max_size, self.__container_pool)
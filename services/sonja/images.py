@@ -0,0 +1,157 @@
+import docker
+import os
+import re
+import threading
+import time
+
+from sonja.config import logger
+from typing import List, Optional, Set, Tuple
+
+
+docker_image_pattern = ("(([a-z0-9-]+\\.[a-z0-9\\.-]+(:[0-9]+)?/)?"
+                        "[a-z0-9\\.-/]+)[:@]([a-z0-9\\.-]+)$")
+IMAGE_TTL_SECONDS = int(os.environ.get("SONJA_IMAGE_TTL", "600"))
+
+
+class PullFailed(Exception):
+    pass
+
+
+def parse_image(image: str) -> Tuple[str, str, str]:
+    m = re.match(docker_image_pattern, image)
+    if not m:
+        raise PullFailed(f"The image '{image}' is not a valid docker image name")
+    repository = m.group(1)
+    tag = m.group(4)
+    server = m.group(2).strip("/") if m.group(2) else ""
+    return repository, tag, server
+
+
+def _get_auth_config(server: str, docker_credentials: List[dict]) -> Optional[dict]:
+    credentials = next((c for c in docker_credentials if c["server"] == server), None)
+    if credentials is None:
+        return None
+
+    return {
+        "username": credentials['username'],
+        "password": credentials['password']
+    }
+
+
+def _get_repo_digests(image) -> Set[str]:
+    return {d.split("@")[-1] for d in image.attrs.get("RepoDigests", [])}
+
+
+class ImageManager(object):
+    """Pulls docker images on behalf of all builds of an agent.
+
+    Images which were refreshed less than ``ttl`` seconds ago and still exist locally are not pulled again, images
+    whose local digest matches the registry are not downloaded and concurrent pulls of the same image are serialized
+    so that only the first one hits the registry.
+    """
+    def __init__(self, ttl: int = IMAGE_TTL_SECONDS):
+        self.__ttl = ttl
+        self.__lock = threading.Lock()
+        self.__pull_locks = dict()
+        self.__digests = dict()
+        self.__refreshed = dict()
+        self.__prewarm_thread = None
+
+    def digest(self, image: str) -> Optional[str]:
+        with self.__lock:
+            return self.__digests.get(image)
+
+    def pull(self, client: docker.DockerClient, image: str, docker_credentials: List[dict]) -> str:
+        repository, tag, server = parse_image(image)
+        if tag == "local":
+            logger.info("Do not pull local image '%s'", image)
+            return ""
+
+        with self.__get_pull_lock(image):
+            if self.__is_fresh(image) and self.__exists_locally(client, image):
+                logger.info("Image '%s' was refreshed less than %i seconds ago", image, self.__ttl)
+                return self.digest(image)
+
+            auth_config = _get_auth_config(server, docker_credentials)
+            local_digests = self.__get_local_digests(client, image)
+            remote_digest = self.__get_remote_digest(client, image, auth_config)
+            if remote_digest and remote_digest in local_digests:
+                logger.info("Local image '%s' is up to date", image)
+                digest = remote_digest
+            else:
+                logger.info("Pull docker image '%s'", image)
+                try:
+                    pulled_image = client.images.pull(repository=repository, tag=tag, auth_config=auth_config)
+                except docker.errors.APIError as e:
+                    raise PullFailed(f"Failed to pull docker container '{image}': {e}")
+                digest = remote_digest or next(iter(sorted(_get_repo_digests(pulled_image))), "")
+
+            with self.__lock:
+                self.__digests[image] = digest
+                self.__refreshed[image] = time.monotonic()
+            return digest
+
+    def prewarm(self, images: List[str], docker_credentials: List[dict]):
+        with self.__lock:
+            if self.__prewarm_thread and self.__prewarm_thread.is_alive():
+                logger.debug("Images are already being pre-warmed")
+                return
+            self.__prewarm_thread = threading.Thread(target=self.__prewarm_images, args=(images, docker_credentials),
+                                                     daemon=True)
+            self.__prewarm_thread.start()
+
+    def __prewarm_images(self, images: List[str], docker_credentials: List[dict]):
+        try:
+            client = docker.from_env()
+        except docker.errors.DockerException as e:
+            logger.error("Failed to instantiate docker client for pre-warming images: '%s'", e)
+            return
+
+        try:
+            for image in images:
+                logger.info("Pre-warm docker image '%s'", image)
+                try:
+                    self.pull(client, image, docker_credentials)
+                except PullFailed as e:
+                    logger.warning("Failed to pre-warm image '%s': %s", image, e)
+        finally:
+            client.close()
+
+    def __get_pull_lock(self, image: str) -> threading.Lock:
+        with self.__lock:
+            return self.__pull_locks.setdefault(image, threading.Lock())
+
+    def __is_fresh(self, image: str) -> bool:
+        with self.__lock:
+            refreshed = self.__refreshed.get(image)
+        return refreshed is not None and time.monotonic() - refreshed < self.__ttl
+
+    @staticmethod
+    def __exists_locally(client: docker.DockerClient, image: str) -> bool:
+        try:
+            client.images.get(image)
+            return True
+        except docker.errors.ImageNotFound:
+            logger.info("Image '%s' was removed since it was refreshed", image)
+            return False
+        except docker.errors.APIError as e:
+            logger.warning("Failed to inspect local image '%s': %s", image, e)
+            return False
+
+    @staticmethod
+    def __get_local_digests(client: docker.DockerClient, image: str) -> Set[str]:
+        try:
+            return _get_repo_digests(client.images.get(image))
+        except docker.errors.ImageNotFound:
+            return set()
+        except docker.errors.APIError as e:
+            logger.warning("Failed to inspect local image '%s': %s", image, e)
+            return set()
+
+    @staticmethod
+    def __get_remote_digest(client: docker.DockerClient, image: str, auth_config: Optional[dict]) -> str:
+        try:
+            return client.images.get_registry_data(image, auth_config=auth_config).id
+        except docker.errors.APIError as e:
+            logger.warning("Failed to obtain registry digest of image '%s': %s", image, e)
+            return ""
@@ -0,0 +1,47 @@
+from typing import List, Optional, Pattern, Tuple
+import json
+import os
+import re
+
+# the maximum number of errors which are stored per run and the maximum length of a stored line
+ERROR_SUMMARY_SIZE = int(os.environ.get("SONJA_ERROR_SUMMARY_SIZE", "20"))
+ERROR_LINE_LENGTH = 1000
+
+ERROR_PATTERNS: List[Tuple[str, Pattern]] = [
+    # GCC/Clang "file:line:column: error:", MSVC "file(line): error C1234:"
+    ("compiler", re.compile(r":\d+(:\d+)?: (fatal )?error: |\): (fatal )?error C\d{4}")),
+    ("linker", re.compile(r"undefined reference to |ld returned \d+ exit status|error LNK\d{4}|"
+                          r"ld: symbol\(s\) not found")),
+    ("cmake", re.compile(r"^CMake Error")),
+    ("conan", re.compile(r"^ERROR: |ConanException|ConanInvalidConfiguration")),
+]
+
+
+def get_error_category(content: str) -> Optional[str]:
+    for category, pattern in ERROR_PATTERNS:
+        if pattern.search(content):
+            return category
+    return None
+
+
+class ErrorSummary(object):
+    """Collects the compiler, linker, CMake and Conan errors of a log while its lines are appended.
+
+    All errors are counted but only the first ``size`` ones are kept, the first error is usually the cause of the
+    others.
+    """
+    def __init__(self, size: int = ERROR_SUMMARY_SIZE):
+        self.__size = size
+        self.__count = 0
+        self.__errors = []
+
+    def add(self, number: int, content: str):
+        category = get_error_category(content)
+        if not category:
+            return
+        self.__count += 1
+        if len(self.__errors) < self.__size:
+            self.__errors.append({"number": number, "category": category, "content": content[:ERROR_LINE_LENGTH]})
+
+    def to_json(self) -> str:
+        return json.dumps({"count": self.__count, "errors": self.__errors})
@@ -0,0 +1,120 @@
+import os
+import threading
+
+from collections import deque
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+LOG_BUFFER_SIZE = int(os.environ.get("SONJA_LOG_BUFFER_SIZE", "10000"))
+MAX_LINE_LENGTH = 64 * 1024
+
+
+def _get_cut(data: bytes, limit: int) -> int:
+    # do not cut within a multi-byte UTF-8 character
+    cut = limit
+    while cut > 0 and data[cut] & 0xC0 == 0x80:
+        cut -= 1
+    return cut if cut > 0 else limit
+
+
+def _get_timestamp_prefix(line: bytes) -> bytes:
+    timestamp, separator, _ = line.partition(b" ")
+    try:
+        parse_timestamp(timestamp.decode("ascii"))
+        return timestamp + separator
+    except (UnicodeDecodeError, ValueError):
+        return b""
+
+
+def frame_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a stream of byte chunks into lines.
+
+    Lines longer than MAX_LINE_LENGTH are split at a character boundary, the pieces after the first one are prefixed
+    with the docker timestamp of the original line.
+    """
+    pending = b""
+    prefix = None
+    for chunk in chunks:
+        pending += chunk
+        start = 0
+        while True:
+            newline = pending.find(b"\n", start)
+            end = newline if newline >= 0 else len(pending)
+            limit = MAX_LINE_LENGTH - len(prefix or b"")
+            if end - start > limit:
+                cut = start + _get_cut(pending[start:end], limit)
+                if prefix is None:
+                    yield pending[start:cut]
+                    prefix = _get_timestamp_prefix(pending[start:cut])
+                else:
+                    yield prefix + pending[start:cut]
+                start = cut
+            elif newline >= 0:
+                yield (prefix or b"") + pending[start:newline].rstrip(b"\r")
+                prefix = None
+                start = newline + 1
+            else:
+                break
+        pending = pending[start:]
+    if pending:
+        yield (prefix or b"") + pending.rstrip(b"\r")
+
+
+def parse_timestamp(timestamp: str) -> datetime:
+    # docker uses RFC 3339 with nanoseconds in UTC, e.g. '2021-04-17T11:54:37.967903123Z'
+    date_time, _, fraction = timestamp.rstrip("Z").partition(".")
+    time = datetime.strptime(date_time, "%Y-%m-%dT%H:%M:%S")
+    if fraction:
+        time = time.replace(microsecond=int(fraction[:6].ljust(6, "0")))
+    return time
+
+
+def parse_log_line(line: bytes) -> Tuple[datetime, str]:
+    """Split a docker log line obtained with 'timestamps=True' into its time and its content."""
+    decoded = line.decode("utf-8", errors="replace")
+    timestamp, _, content = decoded.partition(" ")
+    try:
+        return parse_timestamp(timestamp), content
+    except ValueError:
+        return datetime.utcnow(), decoded
+
+
+class LogBuffer(object):
+    """Bounded buffer between the thread reading the container logs and the agent writing them to the database.
+
+    If the buffer is full, new lines are dropped and replaced by a single marker line when the buffer is drained.
+    The callback is called from the reading thread whenever lines become available in an empty buffer.
+    """
+    def __init__(self, max_size: int = LOG_BUFFER_SIZE):
+        self.__max_size = max_size
+        self.__lines = deque()
+        self.__lock = threading.Lock()
+        self.__dropped = 0
+        self.__dropped_time = None
+        self.__callback = None
+
+    def set_callback(self, callback: Optional[Callable[[], None]]):
+        self.__callback = callback
+
+    def put(self, time: datetime, content: str):
+        with self.__lock:
+            if len(self.__lines) >= self.__max_size:
+                self.__dropped += 1
+                self.__dropped_time = time
+                return
+            self.__lines.append((time, content))
+            notify = len(self.__lines) == 1
+
+        if notify and self.__callback:
+            self.__callback()
+
+    def get_all(self) -> List[Tuple[datetime, str]]:
+        with self.__lock:
+            lines = list(self.__lines)
+            self.__lines.clear()
+            if self.__dropped:
+                lines.append((self.__dropped_time, f"[sonja] {self.__dropped} log lines were dropped"))
+                self.__dropped = 0
+                self.__dropped_time = None
+        return lines
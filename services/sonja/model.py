@@ -1,7 +1,7 @@
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Table, Text, BigInteger
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String, Table, Text, BigInteger
 from sqlalchemy.dialects.mysql import LONGTEXT, TEXT
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from sonja.auth import hash_password
 
 import enum
@@ -51,6 +51,17 @@ class Permission(Base):
     label = Column(Enum(PermissionLabel), nullable=False)
 
 
+class ApiToken(Base):
+    __tablename__ = 'api_token'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    user = relationship("User", backref=backref("api_tokens", cascade="all, delete-orphan"))
+    name = Column(String(255), nullable=False)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    created = Column(DateTime, nullable=False)
+
+
 class GitCredential(Base):
     __tablename__ = 'git_credential'
 
@@ -119,6 +130,9 @@ class Ecosystem(Base):
     conan_config_url = Column(String(255))
     conan_config_path = Column(String(255))
     conan_config_branch = Column(String(255))
+    # the log retention policy of the channels which do not define their own, None keeps the logs
+    log_keep_runs = Column(Integer)
+    log_retention_days = Column(Integer)
 
     @property
     def conan_credential_values(self):
@@ -191,6 +205,9 @@ class Channel(Base):
     conan_channel = Column(String(255))
     conan_remote = Column(String(255))
     ref_pattern = Column(String(255))
+    # keep the last runs of each build and drop the logs of old commits after the number of days
+    log_keep_runs = Column(Integer)
+    log_retention_days = Column(Integer)
 
 
 class Platform(enum.Enum):
@@ -252,6 +269,11 @@ class Commit(Base):
     channel_id = Column(Integer, ForeignKey('channel.id'), nullable=False)
     channel = relationship('Channel', backref='commits')
 
+    __table_args__ = (
+        Index("ix_commit_status", "status"),
+        Index("ix_commit_repo_id_channel_id_sha", "repo_id", "channel_id", "sha"),
+    )
+
 
 class BuildStatus(enum.Enum):
     new = 1
@@ -278,6 +300,14 @@ class Run(Base):
     status = Column(Enum(RunStatus), nullable=False)
     build_id = Column(Integer, ForeignKey('build.id'), index=True)
     build = relationship("Build", backref="runs")
+    # JSON document with the number of errors in the log and the first of them, it is written when the run ends
+    error_summary = Column(Text)
+    # the time when the log lines were moved to the archive
+    log_archived = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_run_build_id_updated", "build_id", "updated"),
+    )
 
     @property
     def status_value(self):
@@ -316,6 +346,10 @@ class Build(Base):
     missing_packages = relationship("Package", secondary=missing_package)
     missing_recipes = relationship("Recipe", secondary=missing_recipe, backref="required_by")
 
+    __table_args__ = (
+        Index("ix_build_status_profile_id", "status", "profile_id"),
+    )
+
     @property
     def ecosystem(self):
         return self.profile.ecosystem
@@ -331,6 +365,9 @@ class Build(Base):
 
 class LogLine(Base):
     __tablename__ = 'log_line'
+    __table_args__ = (
+        Index("ix_log_line_run_id_number", "run_id", "number"),
+    )
 
     id = Column(BigInteger, primary_key=True)
     number = Column(Integer, nullable=False, index=True)
@@ -347,6 +384,10 @@ class RecipeRevision(Base):
     recipe_id = Column(Integer, ForeignKey('recipe.id'))
     revision = Column(String(255))
 
+    __table_args__ = (
+        Index("ix_recipe_revision_recipe_id_revision", "recipe_id", "revision"),
+    )
+
 
 class Recipe(Base):
     __tablename__ = 'recipe'
@@ -363,6 +404,11 @@ class Recipe(Base):
                                     primaryjoin=current_revision_id==RecipeRevision.id, post_update=True)
     revisions = relationship("RecipeRevision", primaryjoin=id == RecipeRevision.recipe_id, backref="recipe")
 
+    # user and channel are not part of the index to stay below the maximal key length of InnoDB
+    __table_args__ = (
+        Index("ix_recipe_ecosystem_id_name_version", "ecosystem_id", "name", "version"),
+    )
+
 
 package_requirement = Table('package_requirement', Base.metadata,
     Column('package_id', Integer, ForeignKey('package.id'), primary_key=True),
@@ -381,3 +427,7 @@ class Package(Base):
                             primaryjoin=package_requirement.c.package_id == id,
                             secondaryjoin=package_requirement.c.requirement_id == id,
                             backref='required_by')
+
+    __table_args__ = (
+        Index("ix_package_recipe_revision_id_package_id", "recipe_revision_id", "package_id"),
+    )
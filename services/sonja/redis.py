@@ -1,13 +1,50 @@
-from sonja.model import Build, LogLine, Run
+from sonja.model import Build, Channel, Commit, ConanCredential, Configuration, DockerCredential, Ecosystem, \
+    GitCredential, LogLine, Option, Package, Profile, Recipe, RecipeRevision, Repo, Run
 from sonja.config import logger
-from typing import List
+from sonja.database import Session
+from typing import Callable, Iterable, List, Optional, Set, Tuple, Type
 from os import environ
 from redis import Redis, ConnectionError
+from sqlalchemy import event
 from contextlib import contextmanager
-from json import dumps
+from json import dumps, loads
+
+import threading
+import time
 
 
 redis_host = environ.get("REDIS_HOST", "127.0.0.1")
+CANCEL_CHANNEL = "cancel"
+INVALIDATE_CHANNEL = "invalidate"
+RECONNECT_TIMEOUT = 10
+# attach the updated entity to its event so that the event consumers do not have to read it from the database
+rich_events = environ.get("SONJA_RICH_EVENTS", "1") == "1"
+VERSION_KEY = "version:{}"
+# the versions of the API resources which change if an entity of a class is written, the ETags of the public API are
+# computed from them
+VERSIONS = {
+    Ecosystem: ("ecosystems",),
+    Channel: ("channels", "ecosystems"),
+    Profile: ("profiles", "ecosystems"),
+    Repo: ("repos",),
+    Recipe: ("recipes",),
+    RecipeRevision: ("recipes",),
+    Package: ("recipes",),
+    Build: ("builds", "recipes"),
+    Commit: ("commits",)
+}
+# the entities which the services keep in their entity cache as (type, ID), an entity without ID is a singleton
+CACHED_ENTITIES = {
+    Configuration: lambda obj: ("configuration", None),
+    GitCredential: lambda obj: ("configuration", None),
+    DockerCredential: lambda obj: ("configuration", None),
+    Ecosystem: lambda obj: ("ecosystems", obj.id),
+    ConanCredential: lambda obj: ("ecosystems", obj.ecosystem_id),
+    Profile: lambda obj: ("profiles", obj.id),
+    Channel: lambda obj: ("channels", obj.id),
+    Repo: lambda obj: ("repos", obj.id),
+    Option: lambda obj: ("repos", obj.repo_id)
+}
 
 
 @contextmanager
@@ -19,34 +56,236 @@ def get_redis():
         redis.close()
 
 
+def get_versions(classes: Iterable[Type]) -> Set[str]:
+    return set(name for cls in classes for name in VERSIONS.get(cls, ()))
+
+
+def bump_versions(names: Iterable[str]):
+    """Increment the versions of the resources. A version which does not exist starts at the current time in
+    milliseconds so that it does not repeat an earlier value if Redis lost its data."""
+    try:
+        with get_redis() as redis:
+            pipeline = redis.pipeline(transaction=False)
+            for name in sorted(names):
+                key = VERSION_KEY.format(name)
+                pipeline.set(key, int(time.time() * 1000), nx=True)
+                pipeline.incr(key)
+            pipeline.execute()
+    except ConnectionError as e:
+        logger.error("Failed to bump versions: %s", e)
+
+
+def get_cached_entities(objs: Iterable[object]) -> Set[Tuple[str, Optional[int]]]:
+    return set(CACHED_ENTITIES[type(obj)](obj) for obj in objs if type(obj) in CACHED_ENTITIES)
+
+
+def publish_invalidations(entities: Iterable[Tuple[str, Optional[int]]]):
+    try:
+        with get_redis() as redis:
+            logger.debug("Publish invalidation of %s on channel '%s'", entities, INVALIDATE_CHANNEL)
+            redis.publish(INVALIDATE_CHANNEL, dumps({"entities": sorted(entities, key=str)}))
+    except ConnectionError as e:
+        logger.error("Failed to publish invalidations: %s", e)
+
+
+CHANGED_VERSIONS = "changed_versions"
+CHANGED_ENTITIES = "changed_entities"
+
+
+def touch_versions(session: Session, *classes: Type):
+    """Bump the versions of the classes when the session commits, bulk statements are not tracked by the session."""
+    session.info.setdefault(CHANGED_VERSIONS, set()).update(get_versions(classes))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    objs = session.new | session.dirty | session.deleted
+    touch_versions(session, *(type(obj) for obj in objs))
+    session.info.setdefault(CHANGED_ENTITIES, set()).update(get_cached_entities(objs))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    # the changes are published after the commit, a client which learns about a change also reads the new data
+    names = session.info.pop(CHANGED_VERSIONS, None)
+    if names:
+        bump_versions(names)
+    entities = session.info.pop(CHANGED_ENTITIES, None)
+    if entities:
+        publish_invalidations(entities)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    session.info.pop(CHANGED_VERSIONS, None)
+    session.info.pop(CHANGED_ENTITIES, None)
+
+
+def _get_reference(id_: Optional[int]) -> Optional[dict]:
+    return {"id": id_} if id_ else None
+
+
+def _get_build_data(build: Build) -> dict:
+    return {
+        "id": build.id,
+        "status_value": build.status.name,
+        "created": build.created.isoformat(),
+        "commit": _get_reference(build.commit_id),
+        "profile": _get_reference(build.profile_id),
+        "package": _get_reference(build.package_id),
+        "recipe_revision": _get_reference(build.recipe_revision_id),
+        "missing_packages": [{"id": package.id} for package in build.missing_packages],
+        "missing_recipes": [{"id": recipe.id} for recipe in build.missing_recipes]
+    }
+
+
+def _get_run_data(run: Run) -> dict:
+    return {
+        "id": run.id,
+        "status_value": run.status.name,
+        "started": run.started.isoformat(),
+        "build": _get_reference(run.build_id)
+    }
+
+
+def _get_log_line_data(log_line: LogLine) -> dict:
+    content = log_line.content
+    return {
+        "id": log_line.id,
+        "number": log_line.number,
+        "time": log_line.time.isoformat(),
+        "content": content.decode("cp1252", errors="replace") if isinstance(content, bytes) else content
+    }
+
+
+def _get_event(id_: int, type_: str, get_data: Callable[[], dict]) -> str:
+    event = {"id": id_, "type": type_}
+    if rich_events:
+        event["data"] = get_data()
+    return dumps(event)
+
+
+class Subscriber(threading.Thread):
+    """Calls the callback with each message published on a channel and reconnects if the connection is lost.
+
+    The optional callbacks are called when the channel is subscribed and when the subscription is lost, messages
+    which are published in between are not received.
+    """
+    def __init__(self, channel: str, callback: Callable[[dict], None],
+                 on_subscribe: Optional[Callable[[], None]] = None,
+                 on_unsubscribe: Optional[Callable[[], None]] = None):
+        super().__init__(daemon=True)
+        self.__channel = channel
+        self.__callback = callback
+        self.__on_subscribe = on_subscribe
+        self.__on_unsubscribe = on_unsubscribe
+        self.__stopped = threading.Event()
+
+    def run(self):
+        while not self.__stopped.is_set():
+            try:
+                with get_redis() as redis:
+                    pubsub = redis.pubsub()
+                    pubsub.subscribe(self.__channel)
+                    while not self.__stopped.is_set():
+                        message = pubsub.get_message(timeout=1.0)
+                        if not message:
+                            continue
+                        if message["type"] == "subscribe":
+                            logger.info("Subscribed to channel '%s'", self.__channel)
+                            if self.__on_subscribe:
+                                self.__on_subscribe()
+                        elif message["type"] == "message":
+                            self.__callback(loads(message["data"]))
+                    pubsub.close()
+            except ConnectionError as e:
+                logger.error("Lost connection to channel '%s': %s", self.__channel, e)
+                self.__stopped.wait(RECONNECT_TIMEOUT)
+            finally:
+                if self.__on_unsubscribe:
+                    self.__on_unsubscribe()
+
+    def stop(self):
+        self.__stopped.set()
+
+
 class RedisClient(object):
     def publish_build_updates(self, builds: List[Build]):
         try:
+            events = [_get_event(build.id, "build", lambda: _get_build_data(build)) for build in builds]
             with get_redis() as redis:
-                for build in builds:
-                    channel = f"general"
+                channel = f"general"
+                pipeline = redis.pipeline(transaction=False)
+                for build, event in zip(builds, events):
                     logger.debug("Publish update for build '%s' on channel '%s'", build.id, channel)
-                    redis.publish(channel, dumps({"id": build.id, "type": "build"}))
+                    pipeline.publish(channel, event)
+                pipeline.execute()
+        except ConnectionError as e:
+            logger.error("Failed to publish builds: %s", e)
+
+    def publish_build_updates_by_id(self, build_ids: List[int]):
+        """Publish updates without the builds, the consumers read them from the database."""
+        try:
+            with get_redis() as redis:
+                channel = f"general"
+                pipeline = redis.pipeline(transaction=False)
+                for build_id in build_ids:
+                    logger.debug("Publish update for build '%s' on channel '%s'", build_id, channel)
+                    pipeline.publish(channel, dumps({"id": build_id, "type": "build"}))
+                pipeline.execute()
         except ConnectionError as e:
             logger.error("Failed to publish builds: %s", e)
 
     def publish_build_update(self, build: Build):
         self.publish_build_updates([build])
 
-    def publish_log_line_update(self, log_line: LogLine):
+    def publish_build_cancel(self, build: Build):
         try:
             with get_redis() as redis:
-                channel = f"run:{log_line.run.id}"
-                logger.debug("Publish update for log line '%s' on channel '%s'", log_line.id, channel)
-                redis.publish(channel, dumps({"id": log_line.id, "type": "log_line"}))
+                logger.debug("Publish cancel request for build '%s' on channel '%s'", build.id, CANCEL_CHANNEL)
+                redis.publish(CANCEL_CHANNEL, dumps({"id": build.id, "type": "build"}))
         except ConnectionError as e:
-            logger.error("Failed to publish log line: %s", e)
+            logger.error("Failed to publish cancel request: %s", e)
+
+    def subscribe_build_cancels(self, callback: Callable[[int], None]) -> Subscriber:
+        subscriber = Subscriber(CANCEL_CHANNEL, lambda message: callback(message["id"]))
+        subscriber.start()
+        return subscriber
+
+    def subscribe_invalidations(self, callback: Callable[[List[Tuple[str, Optional[int]]]], None],
+                                on_subscribe: Callable[[], None], on_unsubscribe: Callable[[], None]) -> Subscriber:
+        subscriber = Subscriber(INVALIDATE_CHANNEL,
+                                lambda message: callback([tuple(entity) for entity in message["entities"]]),
+                                on_subscribe, on_unsubscribe)
+        subscriber.start()
+        return subscriber
+
+    def publish_log_line_updates(self, run_id: int, log_lines: List[LogLine]):
+        """Publish consecutive log lines of a run as one event with the range of their line numbers."""
+        if not log_lines:
+            return
+
+        try:
+            event = {"type": "log_lines", "run_id": run_id, "first": log_lines[0].number,
+                     "last": log_lines[-1].number}
+            if rich_events:
+                event["lines"] = [_get_log_line_data(log_line) for log_line in log_lines]
+            with get_redis() as redis:
+                channel = f"run:{run_id}"
+                logger.debug("Publish update for log lines %d to %d on channel '%s'", event["first"], event["last"],
+                             channel)
+                redis.publish(channel, dumps(event))
+        except ConnectionError as e:
+            logger.error("Failed to publish log lines: %s", e)
+
+    def publish_log_line_update(self, log_line: LogLine):
+        self.publish_log_line_updates(log_line.run_id, [log_line])
 
     def publish_run_update(self, run: Run):
         try:
             with get_redis() as redis:
                 channel = f"general"
                 logger.debug("Publish update for run '%s' on channel '%s'", run.id, channel)
-                redis.publish(channel, dumps({"id": run.id, "type": "run"}))
+                redis.publish(channel, _get_event(run.id, "run", lambda: _get_run_data(run)))
         except ConnectionError as e:
             logger.error("Failed to publish run: %s", e)
\ No newline at end of file
@@ -0,0 +1,169 @@
+from sonja.config import connect_to_database, logger
+from sonja.database import Session, session_scope
+from sonja.model import Build, Channel, Commit, CommitStatus, LogLine, Run, RunStatus
+from sonja.redis import touch_versions
+from sonja.worker import Worker
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from typing import List, Optional
+import gzip
+import os
+
+# the logs are archived below this path before they are deleted, the retention is disabled if it is not set
+LOG_ARCHIVE_PATH = os.environ.get("SONJA_LOG_ARCHIVE_PATH", "")
+RETENTION_PERIOD_SECONDS = int(os.environ.get("SONJA_RETENTION_PERIOD", "3600"))
+RETENTION_BATCH_SIZE = int(os.environ.get("SONJA_RETENTION_BATCH_SIZE", "1000"))
+
+
+class RetentionPolicy(object):
+    """The retention policy of a channel, the values which the channel does not set are taken from its ecosystem."""
+    def __init__(self, channel: Channel):
+        ecosystem = channel.ecosystem
+        self.channel_id = channel.id
+        self.keep_runs: Optional[int] = channel.log_keep_runs if channel.log_keep_runs is not None \
+            else ecosystem.log_keep_runs if ecosystem else None
+        self.retention_days: Optional[int] = channel.log_retention_days if channel.log_retention_days is not None \
+            else ecosystem.log_retention_days if ecosystem else None
+
+
+def get_policies(session: Session) -> List[RetentionPolicy]:
+    return [RetentionPolicy(channel) for channel in session.query(Channel).all()]
+
+
+def get_surplus_runs(session: Session, channel_id: int, keep_runs: int) -> List[int]:
+    """Return the IDs of the runs which are older than the last ``keep_runs`` runs of their build."""
+    build_ids = session.query(Run.build_id) \
+        .join(Run.build) \
+        .join(Build.commit) \
+        .filter(Commit.channel_id == channel_id) \
+        .group_by(Run.build_id) \
+        .having(func.count(Run.id) > keep_runs) \
+        .all()
+
+    run_ids = []
+    for build_id, in build_ids:
+        rows = session.query(Run.id) \
+            .filter(Run.build_id == build_id) \
+            .order_by(Run.started.desc(), Run.id.desc()) \
+            .offset(keep_runs) \
+            .all()
+        run_ids += [run_id for run_id, in rows]
+    return run_ids
+
+
+def get_expired_runs(session: Session, channel_id: int, retention_days: int) -> List[int]:
+    """Return the IDs of the runs of old commits which were not updated for ``retention_days`` days and which still
+    have log lines. This includes runs whose logs were archived but not completely deleted."""
+    expired_before = datetime.utcnow() - timedelta(days=retention_days)
+    has_log_lines = session.query(LogLine.id).filter(LogLine.run_id == Run.id).exists()
+    rows = session.query(Run.id) \
+        .join(Run.build) \
+        .join(Build.commit) \
+        .filter(Commit.channel_id == channel_id, Commit.status == CommitStatus.old, Run.updated < expired_before,
+                Run.status != RunStatus.active, has_log_lines) \
+        .all()
+    return [run_id for run_id, in rows]
+
+
+def get_archive_path(archive_path: str, run: Run) -> str:
+    return os.path.join(archive_path, str(run.build_id), f"{run.id}.log.gz")
+
+
+def archive_log(session: Session, run: Run, archive_path: str, batch_size: int) -> Optional[str]:
+    """Write the log of the run to a compressed text file, returns the path of the file or None if the run has no
+    log lines. The file is renamed only after it is complete."""
+    if not session.query(LogLine.id).filter(LogLine.run_id == run.id).first():
+        return None
+
+    path = get_archive_path(archive_path, run)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(f"{path}.tmp", "wb") as f:
+        log_lines = session.query(LogLine.content) \
+            .filter(LogLine.run_id == run.id) \
+            .order_by(LogLine.number, LogLine.id) \
+            .yield_per(batch_size)
+        for content, in log_lines:
+            if isinstance(content, bytes):
+                content = content.decode("cp1252", errors="replace")
+            f.write(f"{content}\n".encode())
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def delete_log(session: Session, run_id: int, batch_size: int) -> int:
+    """Delete the log lines of the run in batches of ``batch_size`` rows, each batch is committed on its own so that
+    the table is never locked for long."""
+    deleted = 0
+    while True:
+        ids = [log_line_id for log_line_id, in session.query(LogLine.id)
+               .filter(LogLine.run_id == run_id)
+               .limit(batch_size)
+               .all()]
+        if not ids:
+            return deleted
+        session.query(LogLine).filter(LogLine.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+        deleted += len(ids)
+
+
+class Retention(Worker):
+    """Archives and deletes the logs of runs according to the retention policies of the channels.
+
+    Runs which are older than the last ``log_keep_runs`` runs of their build are deleted with their logs. The logs
+    of old commits are deleted ``log_retention_days`` days after their last update, their runs are kept.
+    """
+    def __init__(self, archive_path: str = LOG_ARCHIVE_PATH, batch_size: int = RETENTION_BATCH_SIZE):
+        super().__init__()
+        connect_to_database()
+        self.__archive_path = archive_path
+        self.__batch_size = batch_size
+
+    async def work(self, payload):
+        if not self.__archive_path:
+            logger.info("Log retention is disabled because no archive path is set")
+            return
+
+        try:
+            self.__process_policies()
+        except Exception as e:
+            logger.error("Log retention failed: %s", e)
+        self.reschedule_internally(RETENTION_PERIOD_SECONDS)
+
+    def __process_policies(self):
+        with session_scope() as session:
+            policies = get_policies(session)
+
+        for policy in policies:
+            if policy.keep_runs is not None:
+                with session_scope() as session:
+                    run_ids = get_surplus_runs(session, policy.channel_id, policy.keep_runs)
+                for run_id in run_ids:
+                    self.__process_run(run_id, delete_run=True)
+
+            if policy.retention_days is not None:
+                with session_scope() as session:
+                    run_ids = get_expired_runs(session, policy.channel_id, policy.retention_days)
+                for run_id in run_ids:
+                    self.__process_run(run_id, delete_run=False)
+
+    def __process_run(self, run_id: int, delete_run: bool):
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=run_id).first()
+            if not run or run.status == RunStatus.active:
+                return
+
+            if not run.log_archived:
+                path = archive_log(session, run, self.__archive_path, self.__batch_size)
+                if path:
+                    logger.info("Archived log of run '%d' to '%s'", run_id, path)
+                run.log_archived = datetime.utcnow()
+                session.commit()
+
+            deleted = delete_log(session, run_id, self.__batch_size)
+            logger.info("Deleted %d log lines of run '%d'", deleted, run_id)
+
+            if delete_run:
+                logger.info("Delete run '%d'", run_id)
+                session.delete(run)
+                touch_versions(session, Build)
+                session.commit()
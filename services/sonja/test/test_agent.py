@@ -1,13 +1,124 @@
-from sonja.agent import Agent
+from datetime import datetime
+from sonja.agent import Agent, _monitor_build
 from sonja.database import session_scope, reset_database
-from sonja.model import BuildStatus, Build
+from sonja.log_stream import LogBuffer
+from sonja.model import BuildStatus, Build, Configuration
 from sonja.test import util
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
+import asyncio
+import threading
 import time
 import unittest
 
 
+class FakeBuilder(object):
+    def __init__(self, duration=0.0, lines_per_second=0):
+        self.logs = LogBuffer()
+        self.duration = duration
+        self.lines_per_second = lines_per_second
+        self.lines = 0
+        self.release = threading.Event()
+
+    def pull_image(self):
+        pass
+
+    def create_build_files(self):
+        pass
+
+    def update_git_mirror(self):
+        pass
+
+    def setup_container(self):
+        pass
+
+    def run_build(self):
+        end = time.monotonic() + self.duration
+        while time.monotonic() < end:
+            if self.lines_per_second:
+                self.logs.put(datetime.utcnow(), f"line {self.lines}")
+                self.lines += 1
+                time.sleep(1 / self.lines_per_second)
+            else:
+                self.release.wait(end - time.monotonic())
+                if self.release.is_set():
+                    return
+
+    def set_log_callback(self, callback):
+        self.logs.set_callback(callback)
+
+    def get_log_lines(self):
+        yield from self.logs.get_all()
+
+
+class TestMonitorBuild(unittest.TestCase):
+    def setUp(self):
+        self.append_to_logs = Mock()
+        self.update_run = Mock()
+        self.cancel_stopping_build = Mock(return_value=False)
+
+    def __monitor(self, builder, cancel_after=None):
+        async def monitor():
+            cancel_event = asyncio.Event()
+            if cancel_after is not None:
+                asyncio.get_running_loop().call_later(cancel_after, cancel_event.set)
+            start = time.monotonic()
+            result = await _monitor_build(builder, cancel_event, self.append_to_logs, self.update_run,
+                                          self.cancel_stopping_build)
+            duration = time.monotonic() - start
+            await asyncio.sleep(0)
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task() and not t.done()]
+            return result, duration, pending
+
+        return asyncio.run(monitor())
+
+    def __get_logged_line_count(self):
+        return sum(len(c.args[0]) for c in self.append_to_logs.call_args_list)
+
+    def test_prompt_completion(self):
+        result, duration, _ = self.__monitor(FakeBuilder())
+        self.assertTrue(result)
+        self.assertLess(duration, 1)
+        self.update_run.assert_called_once()
+        self.assertFalse(self.cancel_stopping_build.called)
+
+    @patch("sonja.agent.LOG_FLUSH_PERIOD_SECONDS", 0.2)
+    def test_rate_limited_log_flush(self):
+        builder = FakeBuilder(duration=1.0, lines_per_second=200)
+        result, _, _ = self.__monitor(builder)
+        self.assertTrue(result)
+        self.assertEqual(builder.lines, self.__get_logged_line_count())
+        self.assertGreaterEqual(self.append_to_logs.call_count, 3)
+        self.assertLessEqual(self.append_to_logs.call_count, 8)
+
+    @patch("sonja.agent.HEARTBEAT_PERIOD_SECONDS", 0.1)
+    def test_heartbeat(self):
+        result, _, _ = self.__monitor(FakeBuilder(duration=0.55))
+        self.assertTrue(result)
+        self.assertGreaterEqual(self.update_run.call_count, 5)
+        self.assertLessEqual(self.update_run.call_count, 7)
+
+    @patch("sonja.agent.CANCEL_CHECK_PERIOD_SECONDS", 0.1)
+    def test_cancel_check_fallback(self):
+        result, _, _ = self.__monitor(FakeBuilder(duration=0.35))
+        self.assertTrue(result)
+        self.assertEqual(3, self.cancel_stopping_build.call_count)
+
+    def test_cancel(self):
+        builder = FakeBuilder(duration=10)
+
+        def cancel_stopping_build():
+            builder.release.set()
+            return True
+
+        self.cancel_stopping_build.side_effect = cancel_stopping_build
+        result, duration, pending = self.__monitor(builder, cancel_after=0.1)
+        self.assertFalse(result)
+        self.assertLess(duration, 1)
+        self.cancel_stopping_build.assert_called_once()
+        self.assertEqual([], pending)
+
+
 class TestAgent(unittest.TestCase):
     def setUp(self):
         self.scheduler = Mock()
@@ -32,6 +143,9 @@ class TestAgent(unittest.TestCase):
                     return build.status
             time.sleep(1)
 
+    def __get_published_log_line_count(self):
+        return sum(len(c.args[1]) for c in self.redis_client.publish_log_line_updates.call_args_list)
+
     def __get_build_status(self):
         with session_scope() as session:
             build = session.query(Build).first()
@@ -65,7 +179,17 @@ class TestAgent(unittest.TestCase):
         self.assertEqual(self.__get_build_status(), BuildStatus.success)
         self.assertEqual(self.redis_client.publish_build_update.call_count, 2)
         self.assertEqual(self.redis_client.publish_run_update.call_count, 2)
-        self.assertGreater(self.redis_client.publish_log_line_update.call_count, 100)
+        self.assertGreater(self.__get_published_log_line_count(), 100)
+
+    def test_build_without_configuration(self):
+        with session_scope() as session:
+            session.query(Configuration).delete()
+            session.add(util.create_build(dict()))
+        self.agent.start()
+        self.agent.try_pause()
+        self.assertEqual(self.__get_build_status(), BuildStatus.error)
+        self.assertEqual(self.redis_client.publish_build_update.call_count, 2)
+        self.assertEqual(self.redis_client.publish_run_update.call_count, 2)
 
     def test_complete_build_with_missing_recipe(self):
         with session_scope() as session:
@@ -90,7 +214,7 @@ class TestAgent(unittest.TestCase):
         self.assertEqual(self.__get_build_status(), BuildStatus.success)
         self.assertEqual(self.redis_client.publish_build_update.call_count, 2)
         self.assertEqual(self.redis_client.publish_run_update.call_count, 2)
-        self.assertGreater(self.redis_client.publish_log_line_update.call_count, 100)
+        self.assertGreater(self.__get_published_log_line_count(), 100)
 
     def test_stop_build(self):
         with session_scope() as session:
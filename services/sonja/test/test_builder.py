@@ -1,6 +1,7 @@
-from sonja.builder import Builder, BuildFailed
+from sonja.builder import Builder, BuildFailed, build_package_dir_name
 
 import os
+import tarfile
 import time
 import threading
 import unittest
@@ -42,6 +43,12 @@ K1Rwb2NrZz0K
 """)
 
 
+def get_build_script(builder, file_name):
+    builder.build_files.seek(0)
+    with tarfile.open(fileobj=builder.build_files) as tar:
+        return tar.extractfile(f"{build_package_dir_name}/{file_name}").read().decode("utf-8")
+
+
 @contextmanager
 def environment(key, value):
     os.environ[key] = value
@@ -138,6 +145,50 @@ class TestBuilder(unittest.TestCase):
             # with open("build.tar", "wb") as dump:
             #     dump.write(builder.build_files.read())
 
+    def test_create_build_files_conan_cache_linux(self):
+        parameters = get_build_parameters("linux-debug")
+        parameters["conan_cache_volume"] = "sonja-conan-sonja-1"
+        with environment("DOCKER_HOST", ""), Builder("Linux", "uboot/invalid:1.2.3", parameters) as builder:
+            builder.create_build_files()
+
+    def test_create_build_files_conan_cache_restores_remotes(self):
+        parameters = get_build_parameters("linux-debug")
+        parameters["conan_cache_volume"] = "sonja-conan-sonja-1"
+        with environment("DOCKER_HOST", ""), Builder("Linux", "uboot/invalid:1.2.3", parameters) as builder:
+            builder.create_build_files()
+            script = get_build_script(builder, "build.sh")
+        self.assertIn("cp /conan_cache/config_remotes.json /conan_cache/.conan/remotes.json", script)
+        self.assertLess(script.index("remotes.json"), script.index("conan remote enable"))
+        self.assertIn("The image must provide flock", script)
+
+    def test_create_build_files_conan_cache_windows(self):
+        parameters = get_build_parameters("windows-debug")
+        parameters["conan_cache_volume"] = "sonja-conan-sonja-1"
+        with environment("DOCKER_HOST", ""), Builder("Windows", "uboot/invalid:1.2.3", parameters) as builder:
+            builder.create_build_files()
+
+    def test_create_build_files_git_mirror_linux(self):
+        parameters = get_build_parameters("linux-debug")
+        parameters["git_mirror_volume"] = "sonja-git-sonja-1"
+        with environment("DOCKER_HOST", ""), Builder("Linux", "uboot/invalid:1.2.3", parameters) as builder:
+            builder.create_build_files()
+
+    def test_create_build_files_git_mirror_script(self):
+        parameters = get_build_parameters("linux-debug")
+        parameters["git_mirror_volume"] = "sonja-git-sonja-1"
+        with environment("DOCKER_HOST", ""), Builder("Linux", "uboot/invalid:1.2.3", parameters) as builder:
+            builder.create_build_files()
+            build_script = get_build_script(builder, "build.sh")
+            mirror_script = get_build_script(builder, "mirror.sh")
+        self.assertNotIn("/git_mirror/repo.git fetch", build_script)
+        self.assertIn("/git_mirror/repo.git fetch", mirror_script)
+
+    def test_create_build_files_git_mirror_windows(self):
+        parameters = get_build_parameters("windows-debug")
+        parameters["git_mirror_volume"] = "sonja-git-sonja-1"
+        with environment("DOCKER_HOST", ""), Builder("Windows", "uboot/invalid:1.2.3", parameters) as builder:
+            builder.create_build_files()
+
     def test_run_linux(self):
         docker_host = os.environ.get("LINUX_DOCKER_HOST", "")
         parameters = get_build_parameters("linux-debug")
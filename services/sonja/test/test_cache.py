@@ -0,0 +1,43 @@
+from sonja.cache import TtlCache
+from unittest.mock import patch
+
+import unittest
+
+
+class TestTtlCache(unittest.TestCase):
+    def test_get(self):
+        cache = TtlCache(10)
+        cache.set("1", ["read"])
+        self.assertEqual(["read"], cache.get("1"))
+        self.assertIsNone(cache.get("2"))
+        self.assertEqual({"size": 1, "max_size": 1024, "hits": 1, "misses": 1}, cache.statistics())
+
+    def test_expire(self):
+        cache = TtlCache(10)
+        with patch("sonja.cache.time.monotonic", return_value=100):
+            cache.set("1", ["read"])
+        with patch("sonja.cache.time.monotonic", return_value=105):
+            self.assertEqual(["read"], cache.get("1"))
+        with patch("sonja.cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get("1"))
+        self.assertEqual(0, cache.statistics()["size"])
+
+    def test_invalidate(self):
+        cache = TtlCache(10)
+        cache.set("1", ["read"])
+        cache.set("2", ["write"])
+        cache.invalidate("1")
+        self.assertIsNone(cache.get("1"))
+        self.assertEqual(["write"], cache.get("2"))
+        cache.clear()
+        self.assertIsNone(cache.get("2"))
+
+    def test_drop_least_recently_used(self):
+        cache = TtlCache(10, max_size=2)
+        cache.set("1", ["read"])
+        cache.set("2", ["write"])
+        cache.get("1")
+        cache.set("3", ["admin"])
+        self.assertEqual(["read"], cache.get("1"))
+        self.assertIsNone(cache.get("2"))
+        self.assertEqual(["admin"], cache.get("3"))
@@ -0,0 +1,55 @@
+from sonja.conan_cache import ConanCache
+from unittest.mock import Mock
+
+import docker
+import unittest
+
+
+def create_client(size):
+    client = Mock()
+    client.df.return_value = {
+        "Volumes": [
+            {"Name": "sonja-conan-agent-1", "UsageData": {"Size": size}},
+            {"Name": "other-volume", "UsageData": {"Size": size}}
+        ]
+    }
+    return client
+
+
+class TestConanCache(unittest.TestCase):
+    def test_volume_name(self):
+        self.assertEqual("sonja-conan-agent-1", ConanCache(True, 1, "agent").volume_name(1))
+
+    def test_volume_name_disabled(self):
+        self.assertEqual("", ConanCache(False, 1, "agent").volume_name(1))
+
+    def test_cleanup_small_volume(self):
+        client = create_client(1024)
+        ConanCache(True, 1, "agent").cleanup(client)
+        self.assertFalse(client.volumes.get.called)
+
+    def test_cleanup_large_volume(self):
+        client = create_client(2 * 1024 * 1024)
+        ConanCache(True, 1, "agent").cleanup(client)
+        client.volumes.get.assert_called_once_with("sonja-conan-agent-1")
+        client.volumes.get.return_value.remove.assert_called_once()
+
+    def test_cleanup_volume_in_use(self):
+        client = create_client(2 * 1024 * 1024)
+        client.volumes.get.return_value.remove.side_effect = docker.errors.APIError("volume is in use")
+        ConanCache(True, 1, "agent").cleanup(client)
+
+    def test_cleanup_evicts_pooled_containers(self):
+        client = create_client(2 * 1024 * 1024)
+        container_pool = Mock()
+        ConanCache(True, 1, "agent", container_pool).cleanup(client)
+        container_pool.clear.assert_called_once_with(client, volume="sonja-conan-agent-1")
+
+    def test_cleanup_period(self):
+        client = create_client(1024)
+        conan_cache = ConanCache(True, 1, "agent")
+        conan_cache.cleanup(client)
+        conan_cache.cleanup(client)
+        self.assertEqual(1, client.df.call_count)
+        conan_cache.cleanup(client, force=True)
+        self.assertEqual(2, client.df.call_count)
@@ -0,0 +1,113 @@
+from sonja.container_pool import ContainerPool
+from unittest.mock import Mock
+
+import docker
+import unittest
+
+
+def create_client(image_id="sha256:1234"):
+    client = Mock()
+    client.images.get.return_value.id = image_id
+    counter = iter(range(1000))
+
+    def create_container(image, command, volumes, environment):
+        container = Mock()
+        container.id = f"container{next(counter)}"
+        container.attrs = {"Image": "sha256:1234"}
+        return container
+
+    client.containers.create.side_effect = create_container
+    return client
+
+
+class TestContainerPool(unittest.TestCase):
+    def test_disabled(self):
+        client = create_client()
+        pool = ContainerPool(0, replenish_in_background=False)
+        self.assertIsNone(pool.acquire(client, "uboot/gcc9:latest", "sh build.sh"))
+        self.assertFalse(client.containers.create.called)
+        self.assertEqual(0, pool.statistics()["misses"])
+
+    def test_replenish(self):
+        client = create_client()
+        pool = ContainerPool(2, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        self.assertEqual(2, client.containers.create.call_count)
+        self.assertEqual({"uboot/gcc9:latest": 2}, pool.statistics()["containers"])
+
+    def test_acquire_hit(self):
+        client = create_client()
+        pool = ContainerPool(1, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        self.assertIsNotNone(pool.acquire(client, "uboot/gcc9:latest", "sh build.sh"))
+        client.containers.get.assert_called_with("container0")
+        self.assertEqual(1, pool.statistics()["hits"])
+        self.assertEqual(0, pool.statistics()["misses"])
+
+    def test_acquire_miss(self):
+        client = create_client()
+        pool = ContainerPool(1, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        self.assertIsNone(pool.acquire(client, "uboot/gcc9:latest", "cmd /s /c build.ps1"))
+        self.assertEqual(0, pool.statistics()["hits"])
+        self.assertEqual(1, pool.statistics()["misses"])
+
+    def test_acquire_outdated_image(self):
+        client = create_client()
+        pool = ContainerPool(1, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        client.images.get.return_value.id = "sha256:5678"
+        self.assertIsNone(pool.acquire(client, "uboot/gcc9:latest", "sh build.sh"))
+        client.containers.get.return_value.remove.assert_called_with(force=True)
+        self.assertEqual(1, pool.statistics()["misses"])
+
+    def test_acquire_removed_container(self):
+        client = create_client()
+        pool = ContainerPool(1, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        client.containers.get.side_effect = docker.errors.NotFound("not found")
+        self.assertIsNone(pool.acquire(client, "uboot/gcc9:latest", "sh build.sh"))
+        self.assertEqual(1, pool.statistics()["misses"])
+
+    def test_clear(self):
+        client = create_client()
+        pool = ContainerPool(2, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        pool.clear(client)
+        self.assertEqual(2, client.containers.get.return_value.remove.call_count)
+        self.assertEqual(dict(), pool.statistics()["containers"])
+
+    def test_acquire_other_volume(self):
+        client = create_client()
+        pool = ContainerPool(1, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh", {"sonja-conan-1": {"bind": "/conan_cache"}})
+        self.assertIsNone(pool.acquire(client, "uboot/gcc9:latest", "sh build.sh",
+                                       {"sonja-conan-2": {"bind": "/conan_cache"}}))
+        self.assertIsNotNone(pool.acquire(client, "uboot/gcc9:latest", "sh build.sh",
+                                          {"sonja-conan-1": {"bind": "/conan_cache"}}))
+
+    def test_max_containers(self):
+        client = create_client()
+        pool = ContainerPool(2, max_containers=3, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        pool.replenish(client, "uboot/clang12:latest", "sh build.sh")
+        self.assertEqual({"uboot/clang12:latest": 2}, pool.statistics()["containers"])
+        self.assertEqual(4, client.containers.create.call_count)
+
+    def test_evict_least_recently_used(self):
+        client = create_client()
+        pool = ContainerPool(1, max_containers=2, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        pool.replenish(client, "uboot/clang12:latest", "sh build.sh")
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh")
+        pool.replenish(client, "uboot/gcc11:latest", "sh build.sh")
+        self.assertEqual({"uboot/gcc9:latest": 1, "uboot/gcc11:latest": 1}, pool.statistics()["containers"])
+
+    def test_clear_volume(self):
+        client = create_client()
+        pool = ContainerPool(1, replenish_in_background=False)
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh", {"sonja-conan-1": {"bind": "/conan_cache"}})
+        pool.replenish(client, "uboot/gcc9:latest", "sh build.sh", {"sonja-conan-2": {"bind": "/conan_cache"}})
+        pool.clear(client, volume="sonja-conan-1")
+        self.assertEqual(1, client.containers.get.return_value.remove.call_count)
+        self.assertEqual({"uboot/gcc9:latest": 1}, pool.statistics()["containers"])
@@ -1,7 +1,28 @@
 import unittest
 
+from datetime import datetime
 from sonja import database
 from sonja.test import util
+from sqlalchemy import create_engine
+
+
+class TestPoolMetrics(unittest.TestCase):
+    def test_record(self):
+        metrics = database.PoolMetrics()
+        metrics.record(0.5)
+        metrics.record(0.1)
+        metrics.record(1.0, timed_out=True)
+        statistics = metrics.statistics()
+        self.assertEqual(2, statistics["checkouts"])
+        self.assertEqual(1, statistics["timeouts"])
+        self.assertEqual(1.0, statistics["max_wait_seconds"])
+
+    def test_measured_pool(self):
+        checkouts = database.pool_metrics.statistics()["checkouts"]
+        engine = create_engine("sqlite://", poolclass=database.MeasuredQueuePool)
+        with engine.connect() as connection:
+            connection.execute("SELECT 1")
+        self.assertEqual(checkouts + 1, database.pool_metrics.statistics()["checkouts"])
 
 
 class TestDatabase(unittest.TestCase):
@@ -164,3 +185,16 @@ class TestDatabase(unittest.TestCase):
             recipe_revision.recipe = recipe
             recipe.current_revision = recipe_revision
             session.commit()
+
+    def test_update_run_heartbeats(self):
+        run_id = util.run_create_operation(util.create_run, dict())
+        with database.session_scope() as session:
+            self.assertEqual(1, database.update_run_heartbeats(session, [run_id]))
+        with database.session_scope() as session:
+            run = session.query(database.Run).filter_by(id=run_id).first()
+            self.assertGreater(run.updated, datetime(year=2000, month=1, day=2, hour=13, minute=45))
+
+    def test_update_run_heartbeats_missing_run(self):
+        with database.session_scope() as session:
+            self.assertEqual(0, database.update_run_heartbeats(session, [1]))
+            self.assertEqual(0, database.update_run_heartbeats(session, []))
@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+from sonja.entity_cache import EntityCache
+from sonja.model import Channel, Configuration, GitCredential
+from unittest.mock import Mock, patch
+
+import unittest
+
+
+class FakeRedisClient(object):
+    def subscribe_invalidations(self, callback, on_subscribe, on_unsubscribe):
+        self.callback = callback
+        self.on_subscribe = on_subscribe
+        self.on_unsubscribe = on_unsubscribe
+        return Mock()
+
+
+def create_configuration(ssh_key: str) -> Configuration:
+    configuration = Configuration()
+    configuration.id = 1
+    configuration.ssh_key = ssh_key
+    configuration.git_credentials = [GitCredential(url="https://github.com", username="user", password="secret")]
+    return configuration
+
+
+class TestEntityCache(unittest.TestCase):
+    def setUp(self):
+        self.session = Mock()
+        self.configuration = Mock(side_effect=lambda session: create_configuration("key"))
+        self.redis_client = FakeRedisClient()
+        self.cache = EntityCache(10)
+        session_scope_patch = patch("sonja.entity_cache.session_scope", self.session_scope)
+        configuration_patch = patch("sonja.entity_cache.get_current_configuration", self.configuration)
+        session_scope_patch.start()
+        configuration_patch.start()
+        self.addCleanup(session_scope_patch.stop)
+        self.addCleanup(configuration_patch.stop)
+
+    @contextmanager
+    def session_scope(self):
+        yield self.session
+
+    def subscribe(self):
+        self.cache.start(self.redis_client)
+        self.redis_client.on_subscribe()
+
+    def test_snapshot(self):
+        self.subscribe()
+        configuration = self.cache.configuration()
+        self.assertEqual("key", configuration.ssh_key)
+        self.assertEqual("https://github.com", configuration.git_credentials[0].url)
+        self.assertNotIsInstance(configuration, Configuration)
+
+    def test_read_database_if_not_subscribed(self):
+        self.cache.configuration()
+        self.cache.configuration()
+        self.assertEqual(2, self.configuration.call_count)
+
+    def test_cache_if_subscribed(self):
+        self.subscribe()
+        self.cache.configuration()
+        self.cache.configuration()
+        self.assertEqual(1, self.configuration.call_count)
+        self.assertEqual(1, self.cache.statistics()["hits"])
+
+    def test_invalidate(self):
+        self.subscribe()
+        self.cache.configuration()
+        self.redis_client.callback([("configuration", None)])
+        self.cache.configuration()
+        self.assertEqual(2, self.configuration.call_count)
+
+    def test_invalidate_list(self):
+        self.subscribe()
+        channel = Channel(id=2, name="stable")
+        self.session.query.return_value.all.return_value = [channel]
+        self.session.query.return_value.filter_by.return_value.first.return_value = channel
+        self.cache.channels()
+        self.cache.channel(2)
+        self.redis_client.callback([("channels", 2)])
+        self.cache.channels()
+        self.cache.channel(2)
+        self.assertEqual(2, self.session.query.return_value.all.call_count)
+        self.assertEqual(2, self.session.query.return_value.filter_by.return_value.first.call_count)
+
+    def test_do_not_cache_entity_invalidated_while_loading(self):
+        self.subscribe()
+
+        def load(session):
+            self.redis_client.callback([("configuration", None)])
+            return create_configuration("old")
+
+        self.configuration.side_effect = load
+        self.cache.configuration()
+        self.configuration.side_effect = lambda session: create_configuration("new")
+        self.assertEqual("new", self.cache.configuration().ssh_key)
+
+    def test_clear_if_unsubscribed(self):
+        self.subscribe()
+        self.cache.configuration()
+        self.redis_client.on_unsubscribe()
+        self.cache.configuration()
+        self.cache.configuration()
+        self.assertEqual(3, self.configuration.call_count)
+        self.assertEqual(0, self.cache.statistics()["size"])
@@ -0,0 +1,34 @@
+from sonja.git_mirror import GitMirror
+from unittest.mock import Mock
+
+import unittest
+
+
+class TestGitMirror(unittest.TestCase):
+    def test_volume_name(self):
+        git_mirror = GitMirror(True, agent_id="agent")
+        volume_name = git_mirror.volume_name("git@github.com:uboot/sonja-backend.git")
+        self.assertTrue(volume_name.startswith("sonja-git-agent-"))
+        self.assertEqual(volume_name, git_mirror.volume_name("git@github.com:uboot/sonja-backend.git"))
+
+    def test_volume_name_other_url(self):
+        git_mirror = GitMirror(True, agent_id="agent")
+        self.assertNotEqual(git_mirror.volume_name("git@github.com:uboot/sonja-backend.git"),
+                            git_mirror.volume_name("https://uboot@github.com/uboot/private-packages.git"))
+
+    def test_volume_name_disabled(self):
+        self.assertEqual("", GitMirror(False, agent_id="agent").volume_name("git@github.com:uboot/sonja-backend.git"))
+
+    def test_cleanup(self):
+        client = Mock()
+        client.df.return_value = {
+            "Volumes": [
+                {"Name": "sonja-git-agent-1234", "UsageData": {"Size": 2 * 1024 * 1024}},
+                {"Name": "sonja-git-agent-5678", "UsageData": {"Size": 1024}},
+                {"Name": "sonja-conan-agent-1", "UsageData": {"Size": 2 * 1024 * 1024}}
+            ]
+        }
+        container_pool = Mock()
+        GitMirror(True, 1, "agent", container_pool).cleanup(client)
+        client.volumes.get.assert_called_once_with("sonja-git-agent-1234")
+        container_pool.clear.assert_called_once_with(client, volume="sonja-git-agent-1234")
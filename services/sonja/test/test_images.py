@@ -0,0 +1,100 @@
+from sonja.images import ImageManager, PullFailed, parse_image
+from unittest.mock import Mock
+
+import docker
+import threading
+import time
+import unittest
+
+
+def create_client(local_digest="sha256:1234", remote_digest="sha256:1234"):
+    client = Mock()
+    image = Mock()
+    image.attrs = {"RepoDigests": [f"uboot/gcc9@{local_digest}"]} if local_digest else {}
+    client.images.get.return_value = image
+    client.images.get_registry_data.return_value.id = remote_digest
+    client.images.pull.return_value.attrs = {"RepoDigests": [f"uboot/gcc9@{remote_digest}"]}
+    return client
+
+
+class TestImages(unittest.TestCase):
+    def test_parse_image(self):
+        self.assertEqual(("uboot/gcc9", "latest", ""), parse_image("uboot/gcc9:latest"))
+
+    def test_parse_image_with_server(self):
+        self.assertEqual(("registry.acme.com:5000/gcc9", "1.2.3", "registry.acme.com:5000"),
+                         parse_image("registry.acme.com:5000/gcc9:1.2.3"))
+
+    def test_parse_invalid_image(self):
+        self.assertRaises(PullFailed, parse_image, "uboot/gcc9")
+
+    def test_pull_local_image(self):
+        client = create_client()
+        ImageManager().pull(client, "msvc15:local", [])
+        self.assertFalse(client.images.pull.called)
+
+    def test_pull_missing_image(self):
+        client = create_client()
+        client.images.get.side_effect = docker.errors.ImageNotFound("not found")
+        digest = ImageManager().pull(client, "uboot/gcc9:latest", [])
+        self.assertTrue(client.images.pull.called)
+        self.assertEqual("sha256:1234", digest)
+
+    def test_pull_up_to_date_image(self):
+        client = create_client()
+        image_manager = ImageManager()
+        image_manager.pull(client, "uboot/gcc9:latest", [])
+        self.assertFalse(client.images.pull.called)
+        self.assertEqual("sha256:1234", image_manager.digest("uboot/gcc9:latest"))
+
+    def test_pull_outdated_image(self):
+        client = create_client(remote_digest="sha256:5678")
+        digest = ImageManager().pull(client, "uboot/gcc9:latest", [])
+        self.assertTrue(client.images.pull.called)
+        self.assertEqual("sha256:5678", digest)
+
+    def test_pull_with_credentials(self):
+        client = create_client(remote_digest="sha256:5678")
+        ImageManager().pull(client, "uboot/gcc9:latest", [{"server": "", "username": "user", "password": "secret"}])
+        client.images.pull.assert_called_with(repository="uboot/gcc9", tag="latest",
+                                              auth_config={"username": "user", "password": "secret"})
+
+    def test_pull_failed(self):
+        client = create_client(remote_digest="sha256:5678")
+        client.images.pull.side_effect = docker.errors.APIError("failed")
+        self.assertRaises(PullFailed, ImageManager().pull, client, "uboot/gcc9:latest", [])
+
+    def test_pull_within_ttl(self):
+        client = create_client()
+        image_manager = ImageManager(ttl=600)
+        image_manager.pull(client, "uboot/gcc9:latest", [])
+        image_manager.pull(client, "uboot/gcc9:latest", [])
+        self.assertEqual(1, client.images.get_registry_data.call_count)
+
+    def test_pull_removed_image_within_ttl(self):
+        client = create_client()
+        image_manager = ImageManager(ttl=600)
+        image_manager.pull(client, "uboot/gcc9:latest", [])
+        client.images.get.side_effect = docker.errors.ImageNotFound("not found")
+        image_manager.pull(client, "uboot/gcc9:latest", [])
+        self.assertEqual(2, client.images.get_registry_data.call_count)
+        self.assertTrue(client.images.pull.called)
+
+    def test_pull_after_ttl(self):
+        client = create_client()
+        image_manager = ImageManager(ttl=0)
+        image_manager.pull(client, "uboot/gcc9:latest", [])
+        image_manager.pull(client, "uboot/gcc9:latest", [])
+        self.assertEqual(2, client.images.get_registry_data.call_count)
+
+    def test_concurrent_pulls(self):
+        client = create_client(remote_digest="sha256:5678")
+        client.images.pull.side_effect = lambda **kwargs: time.sleep(0.2) or Mock(attrs={})
+        image_manager = ImageManager(ttl=600)
+        threads = [threading.Thread(target=image_manager.pull, args=(client, "uboot/gcc9:latest", []))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, client.images.pull.call_count)
@@ -0,0 +1,27 @@
+from sonja.log_errors import ErrorSummary, get_error_category
+
+import json
+import unittest
+
+
+class TestLogErrors(unittest.TestCase):
+    def test_get_error_category(self):
+        self.assertEqual("compiler", get_error_category("src/main.cpp:5:3: error: expected ';' before '}'"))
+        self.assertEqual("compiler", get_error_category("main.cpp(5): error C2143: syntax error"))
+        self.assertEqual("linker", get_error_category("main.cpp:(.text+0x5): undefined reference to `hello()'"))
+        self.assertEqual("linker", get_error_category("main.obj : error LNK2019: unresolved external symbol"))
+        self.assertEqual("cmake", get_error_category("CMake Error at CMakeLists.txt:3 (project):"))
+        self.assertEqual("conan", get_error_category("ERROR: hello/1.0: Error in build() method, line 20"))
+        self.assertIsNone(get_error_category("-- Configuring done"))
+        self.assertIsNone(get_error_category("src/main.cpp:5:3: warning: unused variable 'x'"))
+
+    def test_error_summary(self):
+        summary = ErrorSummary(size=1)
+        summary.add(1, "-- Configuring done")
+        summary.add(2, "src/main.cpp:5:3: error: expected ';'")
+        summary.add(3, "ERROR: hello/1.0: Error in build() method")
+
+        self.assertEqual({
+            "count": 2,
+            "errors": [{"number": 2, "category": "compiler", "content": "src/main.cpp:5:3: error: expected ';'"}]
+        }, json.loads(summary.to_json()))
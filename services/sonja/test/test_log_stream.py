@@ -0,0 +1,72 @@
+from datetime import datetime
+from sonja.log_stream import LogBuffer, frame_lines, parse_log_line, MAX_LINE_LENGTH
+from unittest.mock import Mock
+
+import unittest
+
+
+class TestLogStream(unittest.TestCase):
+    def test_frame_lines(self):
+        chunks = [b"first\nsec", b"ond\r\n", b"third"]
+        self.assertEqual([b"first", b"second", b"third"], list(frame_lines(chunks)))
+
+    def test_frame_lines_split_utf8(self):
+        data = "äöü\n".encode("utf-8")
+        chunks = [data[:1], data[1:]]
+        self.assertEqual(["äöü"], [line.decode("utf-8") for line in frame_lines(chunks)])
+
+    def test_frame_lines_empty_lines(self):
+        self.assertEqual([b"", b"line", b""], list(frame_lines([b"\nline\n\r\n"])))
+
+    def test_frame_lines_long_line(self):
+        lines = list(frame_lines([b"x" * (MAX_LINE_LENGTH + 1)]))
+        self.assertEqual([MAX_LINE_LENGTH, 1], [len(line) for line in lines])
+
+    def test_frame_lines_long_line_utf8(self):
+        lines = list(frame_lines([b"x" * (MAX_LINE_LENGTH - 1) + "\u00e4".encode("utf-8") + b"\n"]))
+        self.assertEqual(["x" * (MAX_LINE_LENGTH - 1), "\u00e4"], [line.decode("utf-8") for line in lines])
+
+    def test_frame_lines_long_line_timestamp(self):
+        timestamp = b"2021-04-17T11:54:37.967903123Z "
+        chunks = [timestamp + b"x" * MAX_LINE_LENGTH, b"x" * MAX_LINE_LENGTH, b"\n"]
+        lines = list(frame_lines(chunks))
+        self.assertEqual(3, len(lines))
+        for line in lines:
+            self.assertEqual(datetime(2021, 4, 17, 11, 54, 37, 967903), parse_log_line(line)[0])
+        self.assertEqual(2 * MAX_LINE_LENGTH, sum(len(parse_log_line(line)[1]) for line in lines))
+
+    def test_parse_log_line(self):
+        self.assertEqual((datetime(2021, 4, 17, 11, 54, 37, 967903), "Start build..."),
+                         parse_log_line(b"2021-04-17T11:54:37.967903123Z Start build..."))
+
+    def test_parse_log_line_without_timestamp(self):
+        time, content = parse_log_line(b"Start build...")
+        self.assertEqual("Start build...", content)
+
+    def test_log_buffer(self):
+        log_buffer = LogBuffer(2)
+        log_buffer.put(datetime(2000, 1, 1), "first")
+        log_buffer.put(datetime(2000, 1, 2), "second")
+        self.assertEqual([(datetime(2000, 1, 1), "first"), (datetime(2000, 1, 2), "second")], log_buffer.get_all())
+        self.assertEqual([], log_buffer.get_all())
+
+    def test_log_buffer_overflow(self):
+        log_buffer = LogBuffer(1)
+        log_buffer.put(datetime(2000, 1, 1), "first")
+        log_buffer.put(datetime(2000, 1, 2), "second")
+        log_buffer.put(datetime(2000, 1, 3), "third")
+        self.assertEqual([(datetime(2000, 1, 1), "first"),
+                          (datetime(2000, 1, 3), "[sonja] 2 log lines were dropped")], log_buffer.get_all())
+        log_buffer.put(datetime(2000, 1, 4), "fourth")
+        self.assertEqual([(datetime(2000, 1, 4), "fourth")], log_buffer.get_all())
+
+    def test_log_buffer_callback(self):
+        callback = Mock()
+        log_buffer = LogBuffer(10)
+        log_buffer.set_callback(callback)
+        log_buffer.put(datetime(2000, 1, 1), "first")
+        log_buffer.put(datetime(2000, 1, 2), "second")
+        self.assertEqual(1, callback.call_count)
+        log_buffer.get_all()
+        log_buffer.put(datetime(2000, 1, 3), "third")
+        self.assertEqual(2, callback.call_count)
@@ -0,0 +1,69 @@
+from datetime import datetime
+from sonja.database import session_scope, reset_database
+from sonja.model import Build, BuildStatus, Commit, CommitStatus, LogLine, Package, Platform, Profile, Recipe, \
+    RecipeRevision, Run
+from sonja.test import util
+
+import unittest
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Fails if MySQL can not use the index which is meant for one of the hot queries of the services."""
+    @classmethod
+    def setUpClass(cls):
+        reset_database()
+        ecosystem_id = util.run_create_operation(util.create_ecosystem, dict())
+        for status in (BuildStatus.new, BuildStatus.active, BuildStatus.success, BuildStatus.error):
+            for _ in range(5):
+                util.run_create_operation(util.create_run, {"build.status": status,
+                                                            "build.with_dependencies": True}, ecosystem_id)
+        with session_scope() as session:
+            for table in ("build", "commit", "run", "recipe", "recipe_revision", "package"):
+                session.execute(f"ANALYZE TABLE `{table}`")
+
+    def assertUsesIndex(self, query, table, index):
+        with session_scope() as session:
+            self.assertIn(index, util.get_possible_keys(session, query(session), table))
+
+    def test_agent_claim_build(self):
+        self.assertUsesIndex(lambda session: session.query(Build)
+                             .join(Build.profile)
+                             .filter(Profile.platform == Platform.linux, Build.status == BuildStatus.new),
+                             "build", "ix_build_status_profile_id")
+
+    def test_scheduler_new_commits(self):
+        self.assertUsesIndex(lambda session: session.query(Commit).filter_by(status=CommitStatus.new), "commit",
+                             "ix_commit_status")
+
+    def test_crawler_existing_commit(self):
+        self.assertUsesIndex(lambda session: session.query(Commit)
+                             .filter_by(repo_id=1, channel_id=1, sha="c25c786b0f4e4b8fcaa247feb4809b68e671522d"),
+                             "commit", "ix_commit_repo_id_channel_id_sha")
+
+    def test_manager_recipe(self):
+        self.assertUsesIndex(lambda session: session.query(Recipe)
+                             .filter_by(ecosystem_id=1, name="app", version="1.2.3", user=None, channel=None),
+                             "recipe", "ix_recipe_ecosystem_id_name_version")
+
+    def test_manager_recipe_revision(self):
+        self.assertUsesIndex(lambda session: session.query(RecipeRevision)
+                             .filter_by(recipe_id=1, revision="2b44d2dde63878dd279ebe5d38c60dfa"),
+                             "recipe_revision", "ix_recipe_revision_recipe_id_revision")
+
+    def test_manager_package(self):
+        self.assertUsesIndex(lambda session: session.query(Package)
+                             .filter_by(package_id="227220812d7ea3aa060187bae41abbc9911dfdfd", recipe_revision_id=1),
+                             "package", "ix_package_recipe_revision_id_package_id")
+
+    def test_watchdog_stalled_runs(self):
+        self.assertUsesIndex(lambda session: session.query(Run.id, Run.build_id)
+                             .join(Run.build)
+                             .filter(Build.status == BuildStatus.active, Run.updated < datetime.utcnow()),
+                             "build", "ix_build_status_profile_id")
+
+    def test_log_tail(self):
+        self.assertUsesIndex(lambda session: session.query(LogLine)
+                             .filter(LogLine.run_id == 1)
+                             .order_by(LogLine.number.desc(), LogLine.id.desc())
+                             .limit(10),
+                             "log_line", "ix_log_line_run_id_number")
@@ -1,5 +1,11 @@
-from sonja.redis import RedisClient
-from sonja.model import Build, Ecosystem, Profile
+from datetime import datetime
+from sonja.database import Session
+from sonja.redis import bump_versions, get_cached_entities, get_versions, touch_versions, RedisClient
+from sonja.model import Build, BuildStatus, Ecosystem, LogLine, Profile, Run, RunStatus, Channel, Commit, GitCredential, Option
+from unittest.mock import Mock, patch
+
+import json
+import time
 import unittest
 
 # Requires:
@@ -8,22 +14,170 @@ import unittest
 # docker run --rm -d --name redis -p 6379:6379 redis:6.2.6
 
 
+def create_build() -> Build:
+    ecosystem = Ecosystem()
+    profile = Profile()
+    profile.ecosystem = ecosystem
+    build = Build()
+    build.id = 1
+    build.profile = profile
+    build.profile_id = 2
+    build.status = BuildStatus.new
+    build.created = datetime(year=2000, month=1, day=2, hour=13, minute=30)
+    return build
+
+
 class TestRedis(unittest.TestCase):
     def setUp(self):
         self.redis_client = RedisClient()
 
+    def get_published(self, redis) -> list:
+        pipeline = redis.return_value.pipeline.return_value
+        calls = pipeline.publish.call_args_list + redis.return_value.publish.call_args_list
+        return [(c.args[0], json.loads(c.args[1])) for c in calls]
+
     def test_publish_build_update(self):
-        ecosystem = Ecosystem()
-        profile = Profile()
-        profile.ecosystem = ecosystem
-        build = Build()
-        build.profile = profile
-        self.redis_client.publish_build_update(build)
+        self.redis_client.publish_build_update(create_build())
 
     def test_publish_build_updates(self):
-        ecosystem = Ecosystem()
-        profile = Profile()
-        profile.ecosystem = ecosystem
-        build = Build()
-        build.profile = profile
-        self.redis_client.publish_build_updates([build])
+        self.redis_client.publish_build_updates([create_build()])
+
+    def test_publish_rich_build_update(self):
+        with patch("sonja.redis.Redis") as redis:
+            self.redis_client.publish_build_update(create_build())
+        self.assertEqual([("general", {
+            "id": 1,
+            "type": "build",
+            "data": {
+                "id": 1,
+                "status_value": "new",
+                "created": "2000-01-02T13:30:00",
+                "commit": None,
+                "profile": {"id": 2},
+                "package": None,
+                "recipe_revision": None,
+                "missing_packages": [],
+                "missing_recipes": []
+            }
+        })], self.get_published(redis))
+
+    def test_publish_build_update_without_data(self):
+        with patch("sonja.redis.Redis") as redis, patch("sonja.redis.rich_events", False):
+            self.redis_client.publish_build_update(create_build())
+        self.assertEqual([("general", {"id": 1, "type": "build"})], self.get_published(redis))
+
+    def test_publish_rich_run_update(self):
+        run = Run()
+        run.id = 3
+        run.build_id = 1
+        run.status = RunStatus.active
+        run.started = datetime(year=2000, month=1, day=2, hour=13, minute=40)
+        with patch("sonja.redis.Redis") as redis:
+            self.redis_client.publish_run_update(run)
+        self.assertEqual([("general", {
+            "id": 3,
+            "type": "run",
+            "data": {"id": 3, "status_value": "active", "started": "2000-01-02T13:40:00", "build": {"id": 1}}
+        })], self.get_published(redis))
+
+    def test_publish_rich_log_line_updates(self):
+        log_line = LogLine()
+        log_line.id = 4
+        log_line.run_id = 3
+        log_line.number = 1
+        log_line.time = datetime(year=2000, month=1, day=2, hour=13, minute=50)
+        log_line.content = "Start build \u00e4".encode("cp1252")
+        with patch("sonja.redis.Redis") as redis:
+            self.redis_client.publish_log_line_updates(3, [log_line])
+        self.assertEqual([("run:3", {
+            "type": "log_lines",
+            "run_id": 3,
+            "first": 1,
+            "last": 1,
+            "lines": [{"id": 4, "number": 1, "time": "2000-01-02T13:50:00", "content": "Start build \u00e4"}]
+        })], self.get_published(redis))
+
+    def test_publish_log_line_updates_without_data(self):
+        log_lines = []
+        for number in (5, 6, 7):
+            log_line = LogLine()
+            log_line.id = number
+            log_line.number = number
+            log_lines.append(log_line)
+        with patch("sonja.redis.Redis") as redis, patch("sonja.redis.rich_events", False):
+            self.redis_client.publish_log_line_updates(3, log_lines)
+        self.assertEqual([("run:3", {"type": "log_lines", "run_id": 3, "first": 5, "last": 7})],
+                         self.get_published(redis))
+
+    def test_subscribe_build_cancels(self):
+        with patch("sonja.redis.Redis") as redis:
+            messages = iter([{"type": "subscribe", "data": 1},
+                             {"type": "message", "data": '{"id": 1, "type": "build"}'}])
+            pubsub = redis.return_value.pubsub.return_value
+            pubsub.get_message.side_effect = lambda timeout: next(messages, None) or time.sleep(0.01)
+            callback = Mock()
+            subscriber = self.redis_client.subscribe_build_cancels(callback)
+            start = time.time()
+            while not callback.called and time.time() - start < 2:
+                time.sleep(0.01)
+            subscriber.stop()
+            subscriber.join()
+        pubsub.subscribe.assert_called_once_with("cancel")
+        callback.assert_called_once_with(1)
+
+    def test_get_versions(self):
+        self.assertEqual({"channels", "ecosystems"}, get_versions([Channel, Run]))
+        self.assertEqual({"commits"}, get_versions([Commit]))
+
+    def test_bump_versions(self):
+        with patch("sonja.redis.Redis") as redis:
+            bump_versions(["repos"])
+        pipeline = redis.return_value.pipeline.return_value
+        self.assertEqual("version:repos", pipeline.set.call_args.args[0])
+        self.assertTrue(pipeline.set.call_args.kwargs["nx"])
+        pipeline.incr.assert_called_once_with("version:repos")
+
+    def test_bump_versions_after_commit(self):
+        session = Session()
+        with patch("sonja.redis.bump_versions") as bump:
+            touch_versions(session, Build)
+            bump.assert_not_called()
+            session.commit()
+        bump.assert_called_once_with({"builds", "recipes"})
+
+    def test_discard_versions_after_rollback(self):
+        session = Session()
+        session.begin()
+        with patch("sonja.redis.bump_versions") as bump:
+            touch_versions(session, Build)
+            session.rollback()
+            session.commit()
+        bump.assert_not_called()
+
+    def test_get_cached_entities(self):
+        self.assertEqual({("configuration", None), ("repos", 3)},
+                         get_cached_entities([GitCredential(), Option(repo_id=3), Run()]))
+
+    def test_publish_invalidations_after_commit(self):
+        session = Session()
+        with patch("sonja.redis.publish_invalidations") as publish:
+            session.info["changed_entities"] = {("repos", 3)}
+            session.commit()
+        publish.assert_called_once_with({("repos", 3)})
+
+    def test_subscribe_invalidations(self):
+        with patch("sonja.redis.Redis") as redis:
+            messages = iter([{"type": "subscribe", "data": 1},
+                             {"type": "message", "data": '{"entities": [["repos", 3], ["configuration", null]]}'}])
+            pubsub = redis.return_value.pubsub.return_value
+            pubsub.get_message.side_effect = lambda timeout: next(messages, None) or time.sleep(0.01)
+            callback, on_subscribe, on_unsubscribe = Mock(), Mock(), Mock()
+            subscriber = self.redis_client.subscribe_invalidations(callback, on_subscribe, on_unsubscribe)
+            start = time.time()
+            while not callback.called and time.time() - start < 2:
+                time.sleep(0.01)
+            subscriber.stop()
+            subscriber.join()
+        on_subscribe.assert_called_once()
+        callback.assert_called_once_with([("repos", 3), ("configuration", None)])
+        on_unsubscribe.assert_called_once()
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from sonja.database import session_scope, reset_database
+from sonja.model import CommitStatus, LogLine, Run, RunStatus
+from sonja.retention import Retention, archive_log, delete_log, get_archive_path
+from sonja.test import util
+
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+
+def create_run_with_log(session, build, started: datetime, lines: int) -> Run:
+    run = Run()
+    run.build = build
+    run.started = started
+    run.updated = started
+    run.status = RunStatus.success
+    for number in range(1, lines + 1):
+        log_line = util.create_log_line(dict())
+        log_line.number = number
+        log_line.content = f"line {number}"
+        run.log_lines.append(log_line)
+    session.add(run)
+    return run
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        reset_database()
+        self.archive = tempfile.TemporaryDirectory()
+        self.retention = Retention(self.archive.name, batch_size=2)
+        with session_scope() as session:
+            build = util.create_build(dict())
+            session.add(build)
+            self.started = datetime.utcnow() - timedelta(days=10)
+            self.run_ids = []
+            for index in range(3):
+                run = create_run_with_log(session, build, self.started + timedelta(hours=index), 3)
+                session.commit()
+                self.run_ids.append(run.id)
+            self.build_id = build.id
+
+    def tearDown(self):
+        self.retention.cancel()
+        self.retention.join()
+        self.archive.cleanup()
+
+    def read_archive(self, run_id: int) -> str:
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=run_id).first()
+            path = get_archive_path(self.archive.name, run) if run else \
+                os.path.join(self.archive.name, str(self.build_id), f"{run_id}.log.gz")
+        with gzip.open(path, "rt") as f:
+            return f.read()
+
+    def test_archive_and_delete_log(self):
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=self.run_ids[0]).first()
+            path = archive_log(session, run, self.archive.name, 2)
+            self.assertEqual(3, delete_log(session, run.id, 2))
+            self.assertEqual(0, session.query(LogLine).filter_by(run_id=run.id).count())
+
+        with gzip.open(path, "rt") as f:
+            self.assertEqual("line 1\nline 2\nline 3\n", f.read())
+
+    def test_keep_runs(self):
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=self.run_ids[0]).first()
+            run.build.commit.channel.log_keep_runs = 1
+
+        self.retention.start()
+        time.sleep(1)
+
+        with session_scope() as session:
+            self.assertEqual([self.run_ids[2]], [run.id for run in session.query(Run).all()])
+            self.assertEqual(3, session.query(LogLine).count())
+        self.assertEqual("line 1\nline 2\nline 3\n", self.read_archive(self.run_ids[0]))
+
+    def test_keep_runs_of_ecosystem(self):
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=self.run_ids[0]).first()
+            run.build.commit.channel.ecosystem.log_keep_runs = 2
+
+        self.retention.start()
+        time.sleep(1)
+
+        with session_scope() as session:
+            self.assertEqual(self.run_ids[1:], sorted(run.id for run in session.query(Run).all()))
+
+    def test_expired_logs_of_old_commits(self):
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=self.run_ids[0]).first()
+            run.build.commit.channel.log_retention_days = 5
+            run.build.commit.status = CommitStatus.old
+
+        self.retention.start()
+        time.sleep(1)
+
+        with session_scope() as session:
+            self.assertEqual(3, session.query(Run).filter(Run.log_archived.isnot(None)).count())
+            self.assertEqual(0, session.query(LogLine).count())
+        self.assertEqual("line 1\nline 2\nline 3\n", self.read_archive(self.run_ids[1]))
+
+    def test_delete_remaining_logs_of_archived_runs(self):
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=self.run_ids[0]).first()
+            run.build.commit.channel.log_retention_days = 5
+            run.build.commit.status = CommitStatus.old
+            # the archive was written but the deletion of the log lines failed
+            run.log_archived = datetime.utcnow()
+
+        self.retention.start()
+        time.sleep(1)
+
+        with session_scope() as session:
+            self.assertEqual(0, session.query(LogLine).count())
+        self.assertFalse(os.path.exists(os.path.join(self.archive.name, str(self.build_id),
+                                                     f"{self.run_ids[0]}.log.gz")))
+
+    def test_keep_logs_of_current_commits(self):
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=self.run_ids[0]).first()
+            run.build.commit.channel.log_retention_days = 5
+
+        self.retention.start()
+        time.sleep(1)
+
+        with session_scope() as session:
+            self.assertEqual(9, session.query(LogLine).count())
+
+    def test_disabled_without_archive_path(self):
+        self.retention.cancel()
+        self.retention.join()
+        self.retention = Retention("")
+        with session_scope() as session:
+            run = session.query(Run).filter_by(id=self.run_ids[0]).first()
+            run.build.commit.channel.log_keep_runs = 1
+
+        self.retention.start()
+        time.sleep(1)
+
+        with session_scope() as session:
+            self.assertEqual(3, session.query(Run).count())
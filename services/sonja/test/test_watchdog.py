@@ -42,7 +42,7 @@ class TestWatchdog(unittest.TestCase):
 
         self.assertFalse(self.linux_agent.process_builds.called)
         self.assertFalse(self.windows_agent.process_builds.called)
-        self.assertFalse(self.redis_client.publish_build_updates.called)
+        self.assertFalse(self.redis_client.publish_build_updates_by_id.called)
 
     def test_active_stalled_build(self):
         with session_scope() as session:
@@ -61,7 +61,7 @@ class TestWatchdog(unittest.TestCase):
 
         self.assertTrue(self.linux_agent.process_builds.called)
         self.assertTrue(self.windows_agent.process_builds.called)
-        self.assertTrue(self.redis_client.publish_build_updates.called)
+        self.assertTrue(self.redis_client.publish_build_updates_by_id.called)
 
     def test_stopping_stalled_build(self):
         with session_scope() as session:
@@ -80,7 +80,24 @@ class TestWatchdog(unittest.TestCase):
 
         self.assertFalse(self.linux_agent.process_builds.called)
         self.assertFalse(self.windows_agent.process_builds.called)
-        self.assertTrue(self.redis_client.publish_build_updates.called)
+        self.assertTrue(self.redis_client.publish_build_updates_by_id.called)
+
+    def test_many_stalled_builds(self):
+        with session_scope() as session:
+            for _ in range(20):
+                session.add(util.create_run({
+                    "build.status": BuildStatus.active,
+                    "run.status": RunStatus.active
+                }))
+
+        self.watchdog.start()
+        time.sleep(1)
+
+        with session_scope() as session:
+            self.assertEqual(20, session.query(Run).filter_by(status=RunStatus.stalled).count())
+
+        self.redis_client.publish_build_updates_by_id.assert_called_once()
+        self.assertEqual(20, len(self.redis_client.publish_build_updates_by_id.call_args.args[0]))
 
     def test_inactive_run(self):
         with session_scope() as session:
@@ -96,4 +113,4 @@ class TestWatchdog(unittest.TestCase):
 
         self.assertFalse(self.linux_agent.process_builds.called)
         self.assertFalse(self.windows_agent.process_builds.called)
-        self.assertFalse(self.redis_client.publish_build_updates.called)
+        self.assertFalse(self.redis_client.publish_build_updates_by_id.called)
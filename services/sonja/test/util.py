@@ -1,11 +1,15 @@
 from datetime import datetime
-from typing import Callable
+from typing import Callable, List
 from sonja.auth import hash_password
 from sonja.database import session_scope
+from sonja.redis import VERSION_KEY
 from sonja.model import Permission, Ecosystem, PermissionLabel, Base, User, GitCredential, Repo, Option, Label, \
     Commit, CommitStatus, Channel, Profile, Platform, Build, BuildStatus, Recipe, RecipeRevision, Package, Run, \
     RunStatus, LogLine, Configuration, ConanCredential
 
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Query, Session
+
 import os
 
 
@@ -211,3 +215,42 @@ def create_package(parameters):
     package.package_id = parameters.get("package.package_id", "227220812d7ea3aa060187bae41abbc9911dfdfd")
     package.recipe_revision = recipe_revision
     return package
+
+
+def explain(session: Session, query: Query) -> List[dict]:
+    """Return the rows of MySQL's EXPLAIN for the query."""
+    statement = query.statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True})
+    result = session.execute(f"EXPLAIN {statement}")
+    return [dict(row._mapping) for row in result]
+
+
+def get_possible_keys(session: Session, query: Query, table: str) -> List[str]:
+    """Return the indexes which MySQL considers to read the table in the query.
+
+    Unlike the chosen access type they do not depend on the number of rows in the table.
+    """
+    keys = []
+    for row in explain(session, query):
+        if row["table"] == table and row["possible_keys"]:
+            keys += row["possible_keys"].split(",")
+    return keys
+
+
+class FakeVersionRedis(object):
+    """Stores the versions of the resources like the aioredis client of the public API."""
+    SET_IF_NOT_EXIST = "SET_IF_NOT_EXIST"
+
+    def __init__(self):
+        self.values = dict()
+
+    async def mget(self, *keys):
+        return [self.values.get(key) for key in keys]
+
+    async def set(self, key, value, exist=None):
+        if exist != self.SET_IF_NOT_EXIST or key not in self.values:
+            self.values[key] = str(value).encode()
+
+    def bump_versions(self, names):
+        for name in names:
+            key = VERSION_KEY.format(name)
+            self.values[key] = str(int(self.values.get(key, b"0")) + 1).encode()
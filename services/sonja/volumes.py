@@ -0,0 +1,33 @@
+import docker
+
+from sonja.config import logger
+from sonja.container_pool import ContainerPool
+from typing import Optional
+
+
+def remove_large_volumes(client: docker.DockerClient, prefix: str, max_size: int,
+                         container_pool: Optional[ContainerPool] = None):
+    """Remove the volumes whose name starts with ``prefix`` and which are larger than ``max_size`` bytes.
+
+    Pooled containers which mount such a volume are removed first because docker does not remove volumes which are
+    referenced by a container. Volumes which are used by a running build can not be removed and are kept.
+    """
+    try:
+        usage = client.df()
+    except docker.errors.DockerException as e:
+        logger.error("Failed to obtain size of volumes: %s", e)
+        return
+
+    for volume in usage.get("Volumes") or []:
+        name = volume.get("Name", "")
+        size = (volume.get("UsageData") or {}).get("Size", -1)
+        if not name.startswith(prefix) or size <= max_size:
+            continue
+
+        logger.info("Remove volume '%s' with %i MB", name, size // (1024 * 1024))
+        if container_pool:
+            container_pool.clear(client, volume=name)
+        try:
+            client.volumes.get(name).remove()
+        except docker.errors.APIError as e:
+            logger.info("Failed to remove volume '%s': %s", name, e)
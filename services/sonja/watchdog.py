@@ -1,12 +1,39 @@
 from sonja.config import connect_to_database, logger
 from sonja.client import WindowsAgent, LinuxAgent
-from sonja.database import session_scope
+from sonja.database import Session, session_scope
 from sonja.model import Build, Run, BuildStatus, RunStatus
-from sonja.redis import RedisClient
+from sonja.redis import RedisClient, touch_versions
 from sonja.worker import Worker
 from datetime import datetime, timedelta
+from sqlalchemy import update
+from typing import List
 
 WATCHDOG_PERIOD_SECONDS = 60
+STALLED_RUN_TIMEOUT_SECONDS = 60
+
+
+def _set_stalled(session: Session, stalled_before: datetime, build_status: BuildStatus,
+                 new_build_status: BuildStatus) -> List[int]:
+    """Set all runs of builds with the given status which were not updated since ``stalled_before`` to stalled and
+    their builds to the new status. Returns the IDs of the updated builds."""
+    rows = session.query(Run.id, Run.build_id) \
+        .join(Run.build) \
+        .filter(Build.status == build_status, Run.updated < stalled_before) \
+        .with_for_update() \
+        .all()
+    if not rows:
+        return []
+
+    run_ids = [run_id for run_id, _ in rows]
+    build_ids = sorted({build_id for _, build_id in rows})
+    logger.info("Set runs %s to stalled, set builds %s to '%s'", run_ids, build_ids, new_build_status.name)
+    statement = update(Run) \
+        .where(Run.build_id == Build.id, Run.id.in_(run_ids)) \
+        .values({Run.status: RunStatus.stalled, Build.status: new_build_status}) \
+        .execution_options(synchronize_session=False)
+    session.execute(statement)
+    touch_versions(session, Build)
+    return build_ids
 
 
 class Watchdog(Worker):
@@ -25,33 +52,17 @@ class Watchdog(Worker):
         self.reschedule_internally(WATCHDOG_PERIOD_SECONDS)
 
     def __process_stalled_runs(self):
+        stalled_before = datetime.utcnow() - timedelta(seconds=STALLED_RUN_TIMEOUT_SECONDS)
         with session_scope() as session:
-            # query all stalled runs of active builds
-            runs = session.query(Run)\
-                .join(Run.build)\
-                .filter(Run.updated < datetime.utcnow() - timedelta(seconds=60),
-                        Build.status == BuildStatus.active).all()
-            updated_builds = []
-            for run in runs:
-                updated_builds.append(run.build)
-                logger.info("Set run '%d' to stalled, reschedule build '%d'", run.id, run.build.id)
-                run.status = RunStatus.stalled
-                run.build.status = BuildStatus.new
-            builds_were_restarted = len(updated_builds) > 0
-
-            # query all stalled runs of stopping builds
-            runs = session.query(Run)\
-                .join(Run.build)\
-                .filter(Run.updated < datetime.utcnow() - timedelta(seconds=60),
-                        Build.status == BuildStatus.stopping).all()
-            for run in runs:
-                updated_builds.append(run.build)
-                logger.info("Set run '%d' to stalled, stop build '%d'", run.id, run.build.id)
-                run.status = RunStatus.stalled
-                run.build.status = BuildStatus.stopped
-
-            if len(updated_builds):
-                self.__redis_client.publish_build_updates(updated_builds)
+            # restart active builds and stop stopping builds
+            restarted_build_ids = _set_stalled(session, stalled_before, BuildStatus.active, BuildStatus.new)
+            stopped_build_ids = _set_stalled(session, stalled_before, BuildStatus.stopping, BuildStatus.stopped)
+            session.commit()
+
+            updated_build_ids = restarted_build_ids + stopped_build_ids
+            if updated_build_ids:
+                self.__redis_client.publish_build_updates_by_id(updated_build_ids)
+        builds_were_restarted = len(restarted_build_ids) > 0
 
         if builds_were_restarted:
             logger.info('Trigger linux agent: process builds')
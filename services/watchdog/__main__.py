@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 import uvicorn
-from watchdog.config import watchdog
+from watchdog.config import retention, watchdog
 from watchdog.main import app
 from sonja.config import setup_logging, logger, log_config
 
@@ -11,9 +11,13 @@ def shutdown_event():
     logger.info("Shutdown watchdog")
     watchdog.cancel()
     watchdog.join()
+    logger.info("Shutdown log retention")
+    retention.cancel()
+    retention.join()
 
 
 if __name__ == '__main__':
     setup_logging()
     watchdog.start()
+    retention.start()
     uvicorn.run(app, host="0.0.0.0", port=8080, log_config=log_config)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from sonja.database import get_pool_statistics
 
 
 router = APIRouter()
@@ -7,3 +8,8 @@ router = APIRouter()
 @router.get("/ping")
 def get_ping():
     pass
+
+
+@router.get("/database_pool")
+def get_database_pool():
+    return get_pool_statistics()
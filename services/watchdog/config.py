@@ -1,6 +1,8 @@
+from sonja.retention import Retention
 from sonja.watchdog import Watchdog
 from sonja.client import LinuxAgent, WindowsAgent
 from sonja.redis import RedisClient
 
 
 watchdog = Watchdog(LinuxAgent(), WindowsAgent(), RedisClient())
+retention = Retention()